@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+Benchmark WSGI en proceso
+Llama directamente a patron_mvc.wsgi.application con environ sintéticos, sin
+socket, loopback ni servidor HTTP, para medir solo el costo de Django (vistas,
+ORM, templates, middleware). Ejecuta los escenarios de laboratorio_rendimiento.py
+con sus mismas definiciones y variables LAB_*: carga concurrente por endpoint,
+estrés sobre /, claves calientes en las páginas de detalle, perfiles de carga
+(LAB_PERFILES) y recorridos de usuario (LAB_RECORRIDOS, escenarios_carga.py,
+con las sesiones de requests montadas sobre la aplicación). Compresión, carga
+de página completa y carga abierta miden el transporte y no se repiten aquí.
+
+Si resultados/rendimiento_resultados.csv es una corrida HTTP de esta máquina
+sobre el mismo snapshot (LAB_SNAPSHOT), atribuye la diferencia de latencia al
+transporte (red, servidor HTTP, cliente). Ambos lados excluyen el calentamiento
+en las mismas pruebas (LAB_CALENTAMIENTO).
+
+    python benchmark_wsgi.py                       # hilos (comparten el GIL, como runserver)
+    python benchmark_wsgi.py --modo procesos       # un proceso por CPU, como gunicorn pre-fork
+"""
+
+import io
+import os
+import csv
+import sys
+import time
+import uuid
+import argparse
+import platform
+import threading
+import http.client
+import itertools
+import multiprocessing
+from datetime import datetime
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patron_mvc'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'patron_mvc.settings')
+
+from patron_mvc.distribuciones import UNIFORME
+from carga_async import CAPACIDAD_POR_SEGUNDO, AcumuladorCarga, parsear_server_timing
+from escenarios_carga import RECORRIDOS, MotorEscenarios
+from estado_estable import aplicar_calentamiento
+from perfiles_carga import analizar_soak, detectar_saturacion
+from laboratorio_rendimiento import (
+    CARGA_CONCURRENTE, CLAVES_CALIENTES, CREDENCIALES_LAB, ESTRES, MAX_REDIRECCIONES, PAGINAS_DETALLE,
+    RUTAS_PRUEBA, RendimientoAnalyzer, estadisticas_claves, secuencia_claves,
+)
+
+HOST = 'localhost:8002'
+
+RESULTADOS_CSV = "resultados/benchmark_wsgi.csv"
+RESULTADOS_HTTP_CSV = "resultados/rendimiento_resultados.csv"
+# Una corrida HTTP más antigua puede ser de otro código o configuración
+ANTIGUEDAD_MAXIMA_H = 24
+
+# Campos que distinguen las filas de una misma URL y prueba
+CLAVE_FILA = ('tipo_prueba', 'distribucion', 'perfil', 'paso', 'recorrido')
+
+_aplicacion = None
+
+
+def aplicacion():
+    """La aplicación WSGI del proyecto, importada una vez por proceso"""
+    global _aplicacion
+    if _aplicacion is None:
+        from patron_mvc.wsgi import application
+        _aplicacion = application
+    return _aplicacion
+
+
+def cookies_sesion(num_usuarios=10):
+    """Cabecera Cookie de sesiones creadas en la base, sin pasar por el login (ni su hash)"""
+    aplicacion()
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    usuarios = get_user_model().objects.in_bulk(
+        [usuario for usuario, _ in CREDENCIALES_LAB], field_name='username')
+    cookies = []
+    for i in range(num_usuarios):
+        usuario = usuarios.get(CREDENCIALES_LAB[i % len(CREDENCIALES_LAB)][0])
+        if usuario:
+            cliente = Client()
+            cliente.force_login(usuario)
+            cookies.append(f"sessionid={cliente.cookies['sessionid'].value}")
+    return cookies or [None]
+
+
+def crear_environ(ruta, cookie, metodo='GET', cuerpo=b'', cabeceras=None, host=HOST):
+    url = urlsplit(ruta)
+    environ = {
+        'REQUEST_METHOD': metodo,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'HTTP_HOST': host,
+        'SERVER_PORT': host.rpartition(':')[2] or '80',
+        'HTTP_ACCEPT_ENCODING': 'gzip',
+        'CONTENT_LENGTH': str(len(cuerpo)),
+        'wsgi.input': io.BytesIO(cuerpo),
+    }
+    for nombre, valor in (cabeceras or {}).items():
+        clave = nombre.upper().replace('-', '_')
+        environ[clave if clave in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{clave}'] = valor
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+    setup_testing_defaults(environ)
+    return environ
+
+
+def invocar(environ):
+    """Un request a la aplicación: (línea de status, lista de cabeceras, cuerpo)"""
+    respuesta = {}
+
+    def start_response(status, cabeceras, exc_info=None):
+        respuesta['status'] = status
+        respuesta['cabeceras'] = cabeceras
+        return lambda datos: None
+
+    cuerpo = aplicacion()(environ, start_response)
+    try:
+        contenido = b''.join(cuerpo)
+    finally:
+        if hasattr(cuerpo, 'close'):
+            cuerpo.close()
+    return respuesta['status'], respuesta['cabeceras'], contenido
+
+
+def llamar(ruta, cookie):
+    """Un GET a la aplicación: (status, cabeceras, bytes del cuerpo)"""
+    status, cabeceras, contenido = invocar(crear_environ(ruta, cookie))
+    return int(status.split(' ', 1)[0]), {nombre.lower(): valor for nombre, valor in cabeceras}, len(contenido)
+
+
+class SocketMemoria:
+    """Lo único que http.client.HTTPResponse usa de un socket"""
+
+    def __init__(self, datos):
+        self.datos = datos
+
+    def makefile(self, modo):
+        return io.BytesIO(self.datos)
+
+
+class AdaptadorWSGI(requests.adapters.HTTPAdapter):
+    """Transporte de requests que entrega cada request a la aplicación en proceso
+
+    La respuesta se arma como la de un socket real para que la sesión guarde
+    las cookies, siga las redirecciones y descomprima el cuerpo igual que en HTTP.
+    """
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        cuerpo = request.body or b''
+        if isinstance(cuerpo, str):
+            cuerpo = cuerpo.encode()
+        environ = crear_environ(url.path + (f"?{url.query}" if url.query else ''), None,
+                                request.method, cuerpo, request.headers, url.netloc)
+        status, cabeceras, contenido = invocar(environ)
+
+        crudo = f"HTTP/1.1 {status}\r\n" + ''.join(f"{nombre}: {valor}\r\n" for nombre, valor in cabeceras)
+        original = http.client.HTTPResponse(SocketMemoria(crudo.encode('latin-1') + b'\r\n' + contenido),
+                                            method=request.method)
+        original.begin()
+        encabezados = urllib3.HTTPHeaderDict()
+        for nombre, valor in cabeceras:
+            encabezados.add(nombre, valor)
+        respuesta = urllib3.HTTPResponse(body=original, headers=encabezados, status=original.status,
+                                         reason=original.reason, preload_content=False,
+                                         decode_content=False, original_response=original)
+        return self.build_response(request, respuesta)
+
+
+class EscenariosWSGI(MotorEscenarios):
+    """Los recorridos de escenarios_carga.py contra la aplicación en proceso"""
+
+    def crear_sesion(self):
+        sesion = requests.Session()
+        # Todo el tráfico de la sesión queda en proceso, nunca sale a la red
+        adaptador = AdaptadorWSGI()
+        sesion.mount('http://', adaptador)
+        sesion.mount('https://', adaptador)
+        return sesion
+
+
+def medir(ruta, cookie):
+    """Resultado con el esquema de carga_async.medir, siguiendo las redirecciones"""
+    enviado_ns = time.time_ns()
+    inicio = time.perf_counter()
+    tiempo_redirect = 0.0
+    redirecciones = 0
+    ruta_actual = ruta
+    while True:
+        inicio_salto = time.perf_counter()
+        status, cabeceras, bytes_cuerpo = llamar(ruta_actual, cookie)
+        tiempo_salto = (time.perf_counter() - inicio_salto) * 1000
+        if status not in (301, 302, 303, 307, 308) or redirecciones >= MAX_REDIRECCIONES:
+            break
+        tiempo_redirect += tiempo_salto
+        redirecciones += 1
+        destino = urlsplit(cabeceras['location'])
+        ruta_actual = destino.path + (f"?{destino.query}" if destino.query else '')
+
+    server_timing = parsear_server_timing(cabeceras.get('server-timing'))
+    servidor_ms = server_timing.get('total')
+    return {
+        'url': ruta,
+        'tiempo_ms': (time.perf_counter() - inicio) * 1000,
+        'tiempo_redirect_ms': tiempo_redirect,
+        'redirecciones': redirecciones,
+        'servidor_ms': servidor_ms,
+        'sql_ms': server_timing.get('sql'),
+        'template_ms': server_timing.get('tpl'),
+        # Fuera de los middlewares: manejador WSGI, señales y el armado del environ
+        'transporte_ms': tiempo_salto - servidor_ms if servidor_ms is not None else None,
+        'bytes_transferidos': bytes_cuerpo,
+        'status_code': status,
+        'success': status == 200,
+        'enviado_ns': enviado_ns,
+    }
+
+
+def ejecutar_lote(rutas, hilos, cookies, primer_worker=0, duracion=None):
+    """Reparte `rutas` (un request por ruta) en `hilos` hilos de este proceso; con
+    `duracion`, cada hilo las recorre en ciclo hasta cumplirla. Devuelve el acumulador"""
+    acumulador = AcumuladorCarga(int(CAPACIDAD_POR_SEGUNDO * duracion) if duracion else len(rutas))
+    lock = threading.Lock()
+    limite = time.perf_counter() + duracion if duracion else None
+    siguiente_ruta = iter(rutas).__next__
+
+    def hilo(indice):
+        worker = primer_worker + indice
+        pendientes = itertools.cycle(rutas) if duracion else iter(siguiente_ruta, None)
+        for ruta in pendientes:
+            if limite and time.perf_counter() >= limite:
+                break
+            resultado = medir(ruta, cookies[worker % len(cookies)])
+            resultado['worker'] = worker
+            with lock:
+                acumulador.registrar(resultado)
+
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        list(executor.map(hilo, range(hilos)))
+    return acumulador
+
+
+def ejecutar_lote_proceso(argumentos):
+    return ejecutar_lote(*argumentos).a_dict()
+
+
+class BenchmarkWSGI:
+    def __init__(self, modo='hilos', procesos=None, usuarios=10):
+        self.modo = modo
+        self.procesos = procesos or os.cpu_count()
+        # Misma configuración de escenarios que el laboratorio HTTP (variables LAB_*)
+        self.lab = RendimientoAnalyzer()
+        self.cookies = cookies_sesion(usuarios)
+        # Primera pasada de cada vista fuera de la medición (imports perezosos, templates)
+        for ruta in RUTAS_PRUEBA:
+            llamar(ruta, self.cookies[0])
+
+    def prueba_carga(self, rutas, concurrencia, duracion=None):
+        """Carga cerrada: un request por elemento de `rutas` o, con `duracion`, las rutas en ciclo"""
+        inicio, cpu_inicio = time.perf_counter(), time.process_time()
+        if self.modo == 'procesos':
+            from django.db import connections
+            # Las conexiones SQLite no se heredan entre procesos
+            connections.close_all()
+            procesos = min(self.procesos, concurrencia)
+            lotes = []
+            primer_worker = 0
+            for i in range(procesos):
+                hilos = concurrencia // procesos + (i < concurrencia % procesos)
+                # Intercaladas: cada proceso conserva la distribución de la secuencia
+                lotes.append((rutas if duracion else rutas[i::procesos], hilos, self.cookies,
+                              primer_worker, duracion))
+                primer_worker += hilos
+            with multiprocessing.Pool(procesos) as pool:
+                acumulador = AcumuladorCarga(0)
+                for datos in pool.map(ejecutar_lote_proceso, lotes):
+                    acumulador.combinar(AcumuladorCarga.desde_dict(datos))
+        else:
+            procesos = 1
+            acumulador = ejecutar_lote(rutas, concurrencia, self.cookies, duracion=duracion)
+        duracion_real = time.perf_counter() - inicio
+
+        resultado = acumulador.resumen(acumulador.enviados if duracion else len(rutas), duracion_real)
+        if resultado:
+            resultado.update({
+                'motor': 'wsgi',
+                'modo': self.modo,
+                'procesos': procesos,
+                'usuarios': concurrencia,
+                # Solo el proceso principal: en modo procesos no incluye a los hijos
+                'cpu_cliente': 100 * (time.process_time() - cpu_inicio) / duracion_real,
+            })
+        return resultado
+
+    def prueba_carga_concurrente(self, rutas, concurrencia):
+        """Como en el laboratorio, las estadísticas excluyen el calentamiento"""
+        return aplicar_calentamiento(self.prueba_carga(rutas, concurrencia), self.lab.calentamiento)
+
+    def imprimir(self, resultado, etiqueta):
+        print(f"   ✓ {etiqueta}: {resultado['tiempo_promedio']:.2f}ms promedio, "
+              f"P99 {resultado['percentil_99']:.2f}ms, {resultado['throughput']:.1f} req/s")
+
+    def ejecutar(self):
+        print("=== BENCHMARK WSGI EN PROCESO ===")
+        print(f"Modo: {self.modo}" + (f" ({self.procesos} procesos)" if self.modo == 'procesos' else ''))
+        print(f"Sesiones: {len(self.cookies)}")
+        print()
+
+        resultados = []
+        num_requests, concurrencia = CARGA_CONCURRENTE
+        print(f"1. carga_concurrente: {num_requests} requests, concurrencia {concurrencia}")
+        for ruta in RUTAS_PRUEBA:
+            resultado = self.prueba_carga_concurrente([ruta] * num_requests, concurrencia)
+            if not resultado:
+                print(f"   ⚠ {ruta}: sin respuestas exitosas")
+                continue
+            resultado.update({'url': ruta, 'tipo_prueba': 'carga_concurrente'})
+            resultados.append(resultado)
+            self.imprimir(resultado, ruta)
+        print()
+
+        num_requests, concurrencia = ESTRES
+        print(f"2. estres: {num_requests} requests, concurrencia {concurrencia}")
+        resultado = self.prueba_carga_concurrente([RUTAS_PRUEBA[0]] * num_requests, concurrencia)
+        if resultado:
+            resultado.update({'url': RUTAS_PRUEBA[0], 'tipo_prueba': 'estres'})
+            resultados.append(resultado)
+            self.imprimir(resultado, RUTAS_PRUEBA[0])
+        print()
+
+        print("3. Claves calientes en páginas de detalle...")
+        for patron, tabla in PAGINAS_DETALLE.items():
+            pks = self.lab.cargar_pks(tabla)
+            if not pks:
+                print(f"   ⚠ Sin filas en {tabla} (ejecute poblar_db.py)")
+                continue
+            for distribucion in (UNIFORME, self.lab.distribucion_claves):
+                rutas, descripcion = secuencia_claves(patron, pks, distribucion)
+                resultado = self.prueba_carga_concurrente(rutas, CLAVES_CALIENTES[1])
+                if not resultado:
+                    continue
+                resultado.update({'url': patron, 'tipo_prueba': 'claves_calientes', 'distribucion': descripcion,
+                                  **estadisticas_claves(rutas, len(pks))})
+                resultados.append(resultado)
+                self.imprimir(resultado, f"{patron} [{descripcion}]")
+        print()
+
+        print("4. Perfiles de carga...")
+        for perfil in self.lab.perfiles:
+            for ruta in RUTAS_PRUEBA:
+                filas = []
+                for paso, (usuarios, segundos) in enumerate(perfil['pasos']):
+                    resultado = self.prueba_carga([ruta], usuarios, segundos)
+                    if not resultado:
+                        print(f"   ⚠ {ruta} paso {paso} ({usuarios} usuarios): sin respuestas exitosas")
+                        continue
+                    resultado.update({'url': ruta, 'tipo_prueba': f"perfil_{perfil['tipo']}",
+                                      'perfil': perfil['perfil'], 'paso': paso})
+                    filas.append(resultado)
+                resultados.extend(filas)
+                analisis = analizar_soak(filas) if perfil['tipo'] == 'soak' else detectar_saturacion(filas)
+                if not analisis:
+                    continue
+                if perfil['tipo'] == 'soak':
+                    print(f"   ✓ {ruta} [{perfil['perfil']}]: deriva de throughput "
+                          f"{analisis['deriva_throughput']:+.1%}, P99 {analisis['deriva_percentil_99']:+.1%}")
+                else:
+                    print(f"   ✓ {ruta} [{perfil['perfil']}]: {'capacidad' if analisis['saturado'] else 'capacidad ≥'} "
+                          f"{analisis['capacidad_rps']:.1f} req/s con {analisis['usuarios_saturacion']} usuarios")
+        print()
+
+        print("5. Recorridos de usuario (mezcla ponderada, hilos del proceso principal)...")
+        recorridos = {nombre: RECORRIDOS[nombre] for nombre in self.lab.recorridos}
+        motor = EscenariosWSGI(f"http://{HOST}", recorridos, self.lab.factor_pensar)
+        for fila in motor.ejecutar(self.lab.usuarios_recorridos, self.lab.duracion_recorridos):
+            fila.update({'modo': self.modo, 'procesos': 1})
+            resultados.append(fila)
+            if fila['tipo_prueba'] == 'recorrido':
+                print(f"   ✓ {fila['recorrido']}: {fila['requests_exitosos']}/{fila['total_requests']} completos, "
+                      f"P50 {fila['percentil_50']:.2f}ms, P99 {fila['percentil_99']:.2f}ms")
+        print()
+        return resultados
+
+
+def clave_fila(fila):
+    """(ruta, tipo de prueba, distribución, perfil, paso, recorrido) de una fila de resultados"""
+    return (urlsplit(fila['url']).path or '/',) + tuple(
+        '' if fila.get(campo) is None else str(fila[campo]) for campo in CLAVE_FILA)
+
+
+def corrida_comparable(filas, snapshot, antiguedad_maxima_h=ANTIGUEDAD_MAXIMA_H):
+    """Motivo por el que la corrida HTTP no es comparable con este benchmark, o None"""
+    if not filas or not filas[0].get('corrida'):
+        return "no registra su corrida (CSV anterior o versionado)"
+    corridas = {fila['corrida'] for fila in filas}
+    if len(corridas) > 1:
+        return f"mezcla {len(corridas)} corridas"
+    fila = filas[0]
+    if fila['host'] != platform.node():
+        return f"se midió en otra máquina ({fila['host']})"
+    if fila.get('snapshot', '') != snapshot:
+        return f"usa el snapshot '{fila['snapshot']}' y este benchmark '{snapshot}' (LAB_SNAPSHOT)"
+    antiguedad_h = (datetime.now() - datetime.fromisoformat(fila['fecha'])).total_seconds() / 3600
+    if antiguedad_h > antiguedad_maxima_h:
+        return f"tiene {antiguedad_h:.0f}h (máximo {antiguedad_maxima_h}h)"
+    return None
+
+
+def comparar_con_http(resultados, snapshot, ruta_csv=RESULTADOS_HTTP_CSV, antiguedad_maxima_h=ANTIGUEDAD_MAXIMA_H):
+    """Añade la latencia HTTP de la misma prueba y la parte atribuible al transporte
+
+    Solo compara con una corrida del laboratorio de esta máquina, sobre el mismo
+    snapshot y reciente; devuelve el id de la corrida, o None si no es comparable.
+    """
+    if not os.path.exists(ruta_csv):
+        print(f"⚠ Sin resultados HTTP en {ruta_csv}: ejecute laboratorio_rendimiento.py para comparar")
+        return None
+    with open(ruta_csv, newline='') as archivo:
+        filas = list(csv.DictReader(archivo))
+    motivo = corrida_comparable(filas, snapshot, antiguedad_maxima_h)
+    if motivo:
+        print(f"⚠ No se compara con {ruta_csv}: la corrida {motivo}. Repita laboratorio_rendimiento.py")
+        return None
+
+    http = {clave_fila(fila): fila for fila in filas}
+    for resultado in resultados:
+        fila = http.get(clave_fila(resultado))
+        if not fila or not fila.get('tiempo_promedio'):
+            continue
+        tiempo_http = float(fila['tiempo_promedio'])
+        resultado.update({
+            'corrida_http': fila['corrida'],
+            'tiempo_http_promedio': tiempo_http,
+            'throughput_http': float(fila['throughput']),
+            'transporte_http_ms': tiempo_http - resultado['tiempo_promedio'],
+            'fraccion_transporte': 1 - resultado['tiempo_promedio'] / tiempo_http if tiempo_http else None,
+        })
+    return filas[0]['corrida']
+
+
+def guardar_resultados(resultados, corrida, ruta_csv=RESULTADOS_CSV):
+    os.makedirs(os.path.dirname(ruta_csv), exist_ok=True)
+    fieldnames = ['corrida', 'fecha', 'host', 'snapshot', 'url', 'tipo_prueba', 'motor', 'modo', 'procesos',
+                  'usuarios', 'distribucion', 'claves_distintas', 'proporcion_top1', 'perfil', 'paso',
+                  'recorrido', 'factor_pensar', 'fallos_extraccion',
+                  'total_requests', 'requests_exitosos', 'errores', 'duracion_total',
+                  'tiempo_promedio', 'percentil_50', 'percentil_90', 'percentil_99', 'percentil_999',
+                  'tiempo_max', 'throughput', 'redirecciones', 'tiempo_redirect_promedio',
+                  'servidor_promedio', 'sql_promedio', 'template_promedio', 'cpu_cliente',
+                  'calentamiento', 'estado_estable', 'calentamiento_requests', 'calentamiento_s',
+                  'tiempo_promedio_total', 'percentil_99_total',
+                  'corrida_http', 'tiempo_http_promedio', 'throughput_http', 'transporte_http_ms',
+                  'fraccion_transporte']
+    with open(ruta_csv, 'w', newline='') as archivo:
+        writer = csv.DictWriter(archivo, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        for resultado in resultados:
+            writer.writerow({**resultado, **corrida})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de las vistas llamando a la aplicación WSGI en proceso")
+    parser.add_argument('--modo', choices=['hilos', 'procesos'], default='hilos',
+                        help="Concurrencia con hilos de un proceso o con procesos (por defecto hilos)")
+    parser.add_argument('--procesos', type=int, help="Modo procesos: número de procesos (por defecto uno por CPU)")
+    parser.add_argument('--usuarios', type=int, default=10, help="Sesiones autenticadas (por defecto 10)")
+    parser.add_argument('--comparar', default=RESULTADOS_HTTP_CSV, metavar='CSV',
+                        help=f"Resultados HTTP con los que comparar (por defecto {RESULTADOS_HTTP_CSV})")
+    parser.add_argument('--antiguedad-maxima', type=float, default=ANTIGUEDAD_MAXIMA_H, metavar='HORAS',
+                        help=f"Antigüedad máxima de la corrida HTTP (por defecto {ANTIGUEDAD_MAXIMA_H}h)")
+    args = parser.parse_args()
+
+    benchmark = BenchmarkWSGI(args.modo, args.procesos, args.usuarios)
+    resultados = benchmark.ejecutar()
+    snapshot = benchmark.lab.servidor['snapshot']
+
+    if comparar_con_http(resultados, snapshot, args.comparar, args.antiguedad_maxima):
+        print("Framework vs transporte (promedio WSGI en proceso / HTTP):")
+        for resultado in resultados:
+            if 'tiempo_http_promedio' in resultado:
+                etiqueta = ' '.join(str(resultado[campo]) for campo in ('distribucion', 'perfil', 'paso', 'recorrido')
+                                    if resultado.get(campo) is not None)
+                print(f"   {resultado['tipo_prueba']} {resultado['url']} {etiqueta}: "
+                      f"{resultado['tiempo_promedio']:.2f}ms / {resultado['tiempo_http_promedio']:.2f}ms "
+                      f"→ transporte {resultado['transporte_http_ms']:.2f}ms ({resultado['fraccion_transporte']:.0%})")
+        print()
+
+    corrida = {'corrida': uuid.uuid4().hex[:12], 'fecha': datetime.now().isoformat(timespec='seconds'),
+               'host': platform.node(), 'snapshot': snapshot}
+    guardar_resultados(resultados, corrida)
+    print(f"✅ Resultados guardados en: {RESULTADOS_CSV}")
@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+"""
+Motor de Carga asyncio
+Genera carga HTTP/1.1 desde un solo hilo con asyncio: miles de usuarios
+virtuales comparten un pool acotado de conexiones keep-alive, sin un hilo ni
+una conexión TCP nueva por request. Solo usa la biblioteca estándar.
+
+Cada usuario virtual es una corrutina que toma el siguiente request de un
+contador compartido, y los tiempos se acumulan en histogramas HDR de memoria
+fija, así que la memoria no crece con num_requests.
+
+Modo abierto (prueba_tasa): los requests se lanzan en instantes programados
+(tasa constante, Poisson o un programa por tramos) sin esperar respuestas.
+La latencia se informa sin corregir (desde el envío real) y corregida por
+omisión coordinada (desde el instante en que el request debía salir), que es
+la que refleja las pausas del servidor.
+"""
+
+import time
+import uuid
+import zlib
+import random
+import asyncio
+from itertools import count
+from urllib.parse import urljoin, urlsplit
+
+from histograma_latencias import ESPECTRO, HistogramaLatencias
+from muestras_carga import MuestrasCarga
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAX_REDIRECCIONES = 5
+TIMEOUT_REQUEST = 30
+LIMITE_CABECERAS = 64 * 1024
+
+# Requests en vuelo a partir de los cuales el modo abierto descarta en vez de acumular tareas
+MAX_PENDIENTES = 10000
+
+# Muestras preasignadas por segundo en las pruebas por duración (crecen si no alcanzan)
+CAPACIDAD_POR_SEGUNDO = 500
+
+# Desglose de latencia que se promedia en el resumen (cabecera Server-Timing)
+COMPONENTES = ('servidor_ms', 'sql_ms', 'template_ms', 'transporte_ms')
+
+
+def parsear_server_timing(cabecera):
+    """Convierte 'total;dur=12.1, sql;dur=3.4;desc="5 queries"' en {'total': 12.1, 'sql': 3.4}"""
+    metricas = {}
+    for entrada in (cabecera or '').split(','):
+        partes = [p.strip() for p in entrada.split(';')]
+        if not partes[0]:
+            continue
+        for parametro in partes[1:]:
+            if parametro.startswith('dur='):
+                try:
+                    metricas[partes[0]] = float(parametro[4:])
+                except ValueError:
+                    pass
+    return metricas
+
+
+def parsear_programa(programa):
+    """'10:20,30:50' -> [(10.0, 20.0), (30.0, 50.0)]: tramos de (segundos, requests/s)"""
+    tramos = []
+    for tramo in programa.split(','):
+        duracion, _, tasa = tramo.partition(':')
+        tramos.append((float(duracion), float(tasa)))
+    if any(duracion <= 0 or tasa <= 0 for duracion, tasa in tramos):
+        raise ValueError(f"Programa no válido: {programa!r} (use 'segundos:tasa,segundos:tasa')")
+    return tramos
+
+
+def programar_llegadas(tramos, llegadas='constante', semilla=42):
+    """Instantes de envío (segundos desde el inicio) para una lista de tramos (duración, tasa)"""
+    rng = random.Random(semilla)
+    instantes = []
+    inicio_tramo = 0.0
+    for duracion, tasa in tramos:
+        if llegadas == 'poisson':
+            # Intervalos exponenciales con la misma tasa media
+            t = inicio_tramo + rng.expovariate(tasa)
+            while t < inicio_tramo + duracion:
+                instantes.append(t)
+                t += rng.expovariate(tasa)
+        else:
+            instantes.extend(inicio_tramo + k / tasa for k in range(round(duracion * tasa)))
+        inicio_tramo += duracion
+    return instantes
+
+
+def tamano_decodificado(cuerpo, codificacion):
+    """Bytes del contenido una vez descomprimido (lo que mide requests como len(content))"""
+    if codificacion == 'gzip':
+        return len(zlib.decompress(cuerpo, 16 + zlib.MAX_WBITS))
+    if codificacion == 'zstd' and zstandard is not None:
+        return len(zstandard.ZstdDecompressor().decompressobj().decompress(cuerpo))
+    return len(cuerpo)
+
+
+class ConexionCerrada(Exception):
+    """El servidor cerró una conexión keep-alive antes de responder"""
+
+
+class ConexionHTTP:
+    def __init__(self, lector, escritor):
+        self.lector = lector
+        self.escritor = escritor
+        self.reutilizable = True
+
+    async def solicitar(self, metodo, destino, cabeceras):
+        """Envía un request y lee la respuesta completa: (status, cabeceras, cuerpo, bytes_leidos)"""
+        lineas = [f"{metodo} {destino} HTTP/1.1"] + [f"{k}: {v}" for k, v in cabeceras.items()]
+        self.escritor.write(("\r\n".join(lineas) + "\r\n\r\n").encode('latin-1'))
+        await self.escritor.drain()
+
+        try:
+            crudo = await self.lector.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                raise ConexionCerrada() from e
+            raise
+
+        linea_estado, *lineas_cabecera = crudo.decode('latin-1').split("\r\n")
+        status = int(linea_estado.split(' ', 2)[1])
+        respuesta = {}
+        for linea in lineas_cabecera:
+            if linea:
+                clave, _, valor = linea.partition(':')
+                respuesta[clave.strip().lower()] = valor.strip()
+
+        if metodo == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            cuerpo = b''
+        elif 'chunked' in respuesta.get('transfer-encoding', ''):
+            cuerpo = await self.leer_chunked()
+        elif 'content-length' in respuesta:
+            cuerpo = await self.lector.readexactly(int(respuesta['content-length']))
+        else:
+            cuerpo = await self.lector.read()
+            self.reutilizable = False
+
+        if respuesta.get('connection', '').lower() == 'close':
+            self.reutilizable = False
+        return status, respuesta, cuerpo, len(crudo) + len(cuerpo)
+
+    async def leer_chunked(self):
+        partes = []
+        while True:
+            tamano = int((await self.lector.readline()).split(b';')[0].strip(), 16)
+            if tamano == 0:
+                # Trailers opcionales hasta la línea vacía
+                while (await self.lector.readline()) not in (b"\r\n", b""):
+                    pass
+                return b''.join(partes)
+            partes.append(await self.lector.readexactly(tamano))
+            await self.lector.readexactly(2)
+
+    def cerrar(self):
+        self.escritor.close()
+
+
+class PoolConexiones:
+    """Conexiones keep-alive reutilizables, con un máximo de conexiones abiertas"""
+
+    def __init__(self, host, puerto, maximo=256):
+        self.host = host
+        self.puerto = puerto
+        self.libres = []
+        self.cupos = asyncio.Semaphore(maximo)
+        self.abiertas = 0
+
+    async def adquirir(self):
+        await self.cupos.acquire()
+        if self.libres:
+            return self.libres.pop()
+        try:
+            lector, escritor = await asyncio.open_connection(self.host, self.puerto, limit=LIMITE_CABECERAS)
+        except BaseException:
+            self.cupos.release()
+            raise
+        self.abiertas += 1
+        return ConexionHTTP(lector, escritor)
+
+    def liberar(self, conexion, reutilizar=True):
+        if reutilizar and conexion.reutilizable:
+            self.libres.append(conexion)
+        else:
+            conexion.cerrar()
+        self.cupos.release()
+
+    def cerrar(self):
+        for conexion in self.libres:
+            conexion.cerrar()
+        self.libres.clear()
+
+
+class AcumuladorCarga:
+    """Latencias de una prueba de carga en histogramas HDR y su resumen con el
+    esquema de prueba_carga_concurrente; además guarda cada request en columnas
+    tipadas (MuestrasCarga) preasignadas para `capacidad` requests"""
+
+    def __init__(self, capacidad=1024):
+        self.histograma = HistogramaLatencias()
+        self.muestras = MuestrasCarga(capacidad)
+        # Solo en modo abierto: latencia desde el instante de envío programado
+        self.histograma_corregido = HistogramaLatencias()
+        self.suma_redirect = 0.0
+        # Para los componentes basta la media: suma y cantidad de valores presentes
+        self.componentes = {componente: [0.0, 0] for componente in COMPONENTES}
+        self.redirecciones = 0
+        self.errores = 0
+
+    def registrar(self, resultado):
+        # None: request descartado en modo abierto, nunca llegó a enviarse
+        if resultado is not None:
+            self.muestras.registrar_resultado(resultado)
+        if resultado is None or not resultado['success']:
+            self.errores += 1
+            return
+        self.histograma.registrar_ms(resultado['tiempo_ms'])
+        if resultado.get('tiempo_corregido_ms') is not None:
+            self.histograma_corregido.registrar_ms(resultado['tiempo_corregido_ms'])
+        self.suma_redirect += resultado['tiempo_redirect_ms']
+        self.redirecciones += resultado['redirecciones']
+        for componente, acumulado in self.componentes.items():
+            if resultado.get(componente) is not None:
+                acumulado[0] += resultado[componente]
+                acumulado[1] += 1
+
+    def combinar(self, otro, desplazamiento_worker=0):
+        """Suma otro acumulador (de otro hilo, proceso o worker) a este"""
+        self.histograma.combinar(otro.histograma)
+        self.histograma_corregido.combinar(otro.histograma_corregido)
+        self.muestras.combinar(otro.muestras, desplazamiento_worker)
+        self.suma_redirect += otro.suma_redirect
+        for componente, (suma, cantidad) in otro.componentes.items():
+            self.componentes[componente][0] += suma
+            self.componentes[componente][1] += cantidad
+        self.redirecciones += otro.redirecciones
+        self.errores += otro.errores
+        return self
+
+    @property
+    def enviados(self):
+        """Requests registrados, exitosos o no"""
+        return self.histograma.total + self.errores
+
+    def a_dict(self):
+        """Estado serializable en JSON, para combinarlo en otro proceso o host"""
+        return {
+            'histograma': self.histograma.a_texto(),
+            'histograma_corregido': self.histograma_corregido.a_texto(),
+            'suma_redirect': self.suma_redirect,
+            'componentes': self.componentes,
+            'redirecciones': self.redirecciones,
+            'errores': self.errores,
+            'muestras': self.muestras.a_dict(),
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        acumulador = cls(0)
+        acumulador.histograma = HistogramaLatencias.desde_texto(datos['histograma'])
+        acumulador.histograma_corregido = HistogramaLatencias.desde_texto(datos['histograma_corregido'])
+        acumulador.suma_redirect = datos['suma_redirect']
+        acumulador.componentes = datos['componentes']
+        acumulador.redirecciones = datos['redirecciones']
+        acumulador.errores = datos['errores']
+        acumulador.muestras = MuestrasCarga.desde_dict(datos['muestras'])
+        return acumulador
+
+    @staticmethod
+    def espectro(histograma, sufijo=''):
+        """percentil_50 … percentil_9999 (p99.99) con el sufijo dado"""
+        return {
+            f"percentil_{str(percentil).replace('.', '')}{sufijo}": histograma.percentil(percentil)
+            for percentil in ESPECTRO
+        }
+
+    def resumen(self, num_requests, duracion_total):
+        exitosos = self.histograma.total
+        if not exitosos:
+            return None
+        # Desglose medio de la latencia de la respuesta final: servidor (SQL,
+        # templates, resto de Python) y transporte (red + cola + cliente)
+        desglose = {
+            componente.replace('_ms', '_promedio'): suma / cantidad if cantidad else None
+            for componente, (suma, cantidad) in self.componentes.items()
+        }
+        corregidos = {}
+        if self.histograma_corregido.total:
+            corregidos = {
+                'tiempo_corregido_promedio': self.histograma_corregido.promedio(),
+                **self.espectro(self.histograma_corregido, '_corregido'),
+                'tiempo_corregido_max': self.histograma_corregido.maximo(),
+                'histograma_corregido': self.histograma_corregido.a_texto(),
+            }
+        espectro = self.espectro(self.histograma)
+        return {
+            **desglose,
+            **corregidos,
+            **espectro,
+            'tiempo_promedio': self.histograma.promedio(),
+            'tiempo_mediana': espectro['percentil_50'],
+            'tiempo_min': self.histograma.minimo(),
+            'tiempo_max': self.histograma.maximo(),
+            'tiempo_redirect_promedio': self.suma_redirect / exitosos,
+            'redirecciones': self.redirecciones,
+            'throughput': exitosos / duracion_total,
+            'total_requests': num_requests,
+            'requests_exitosos': exitosos,
+            'errores': self.errores,
+            'duracion_total': duracion_total,
+            # Serializado para volver a combinar entre corridas (script_analisis.py)
+            'histograma': self.histograma.a_texto(),
+            # Se escriben como .npy al guardar los resultados
+            'muestras': self.muestras,
+        }
+
+
+class MotorCargaAsync:
+    """Usuarios virtuales como corrutinas sobre un pool de conexiones keep-alive"""
+
+    def __init__(self, base_url, cookies=None, max_conexiones=256, accept_encoding='gzip'):
+        partes = urlsplit(base_url)
+        self.host = partes.hostname
+        self.puerto = partes.port or 80
+        self.cabecera_host = partes.netloc
+        # Una cabecera Cookie por usuario autenticado; se asignan en round-robin
+        self.cookies = cookies or [None]
+        self.max_conexiones = max_conexiones
+        self.accept_encoding = accept_encoding
+        self.pool = None
+
+    async def enviar(self, metodo, url, cookie):
+        """Un salto HTTP; reintenta una vez si el servidor cerró la conexión reutilizada"""
+        partes = urlsplit(url)
+        destino = partes.path + (f"?{partes.query}" if partes.query else '')
+        cabeceras = {
+            'Host': self.cabecera_host,
+            'Accept-Encoding': self.accept_encoding,
+            'X-Request-ID': uuid.uuid4().hex,
+            'Connection': 'keep-alive',
+        }
+        if cookie:
+            cabeceras['Cookie'] = cookie
+
+        for intento in range(2):
+            conexion = await self.pool.adquirir()
+            enviado = time.perf_counter()
+            try:
+                respuesta = await asyncio.wait_for(conexion.solicitar(metodo, destino, cabeceras), TIMEOUT_REQUEST)
+            except ConexionCerrada:
+                self.pool.liberar(conexion, reutilizar=False)
+                if intento:
+                    raise
+                continue
+            except BaseException:
+                self.pool.liberar(conexion, reutilizar=False)
+                raise
+            self.pool.liberar(conexion)
+            return cabeceras['X-Request-ID'], respuesta, enviado
+
+    async def medir(self, url, cookie=None, previsto=None):
+        """Mismo resultado que RendimientoAnalyzer.medir_tiempo_respuesta, siguiendo redirecciones
+
+        tiempo_ms cuenta desde que el primer salto obtiene conexión; la espera
+        por el pool va aparte. Con `previsto` (modo abierto) se añade la
+        latencia corregida, medida desde ese instante.
+        """
+        inicio = time.perf_counter()
+        enviado_ns = time.time_ns()
+        inicio_envio = None
+        try:
+            tiempo_redirect = 0.0
+            redirecciones = 0
+            url_actual = url
+            while True:
+                request_id, (status, cabeceras, cuerpo, bytes_leidos), enviado = await self.enviar(
+                    'GET', url_actual, cookie)
+                fin_salto = time.perf_counter()
+                tiempo_salto = (fin_salto - enviado) * 1000
+                if inicio_envio is None:
+                    inicio_envio = enviado
+                if status not in (301, 302, 303, 307, 308) or redirecciones >= MAX_REDIRECCIONES:
+                    break
+                tiempo_redirect += tiempo_salto
+                redirecciones += 1
+                url_actual = urljoin(url_actual, cabeceras['location'])
+
+            server_timing = parsear_server_timing(cabeceras.get('server-timing'))
+            servidor_ms = server_timing.get('total')
+            codificacion = cabeceras.get('content-encoding', 'identity')
+            return {
+                'url': url,
+                'request_id': request_id,
+                'url_final': url_actual,
+                'metodo': 'GET',
+                'tiempo_ms': (fin_salto - inicio_envio) * 1000,
+                'tiempo_corregido_ms': (fin_salto - previsto) * 1000 if previsto is not None else None,
+                'espera_conexion_ms': (inicio_envio - inicio) * 1000,
+                'tiempo_final_ms': tiempo_salto,
+                'tiempo_redirect_ms': tiempo_redirect,
+                'redirecciones': redirecciones,
+                'servidor_ms': servidor_ms,
+                'sql_ms': server_timing.get('sql'),
+                'template_ms': server_timing.get('tpl'),
+                'transporte_ms': tiempo_salto - servidor_ms if servidor_ms is not None else None,
+                'bytes_transferidos': bytes_leidos,
+                'bytes_contenido': tamano_decodificado(cuerpo, codificacion),
+                'codificacion': codificacion,
+                'status_code': status,
+                'success': status == 200,
+                'enviado_ns': enviado_ns,
+            }
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ConexionCerrada, ValueError) as e:
+            return {
+                'url': url,
+                'tiempo_ms': (time.perf_counter() - inicio) * 1000,
+                'status_code': 0,
+                'success': False,
+                'error': repr(e),
+                'enviado_ns': enviado_ns,
+            }
+
+    async def ejecutar(self, url, num_requests, usuarios, acumulador, duracion=None):
+        """Reparte num_requests entre `usuarios` corrutinas; `url` puede ser una función
+
+        Con `duracion` (segundos) los usuarios dejan de enviar al cumplirse el
+        plazo; num_requests pasa a ser un tope (None = sin tope).
+        """
+        self.pool = PoolConexiones(self.host, self.puerto, self.max_conexiones)
+        pendientes = iter(range(num_requests)) if num_requests is not None else count()
+        limite = time.perf_counter() + duracion if duracion else None
+
+        async def usuario_virtual(indice):
+            cookie = self.cookies[indice % len(self.cookies)]
+            for _ in pendientes:
+                if limite is not None and time.perf_counter() >= limite:
+                    break
+                resultado = await self.medir(url() if callable(url) else url, cookie)
+                resultado['worker'] = indice
+                acumulador.registrar(resultado)
+
+        try:
+            await asyncio.gather(*(usuario_virtual(i) for i in range(usuarios)))
+        finally:
+            self.pool.cerrar()
+        return self.pool.abiertas
+
+    def prueba_carga(self, url, num_requests=50, usuarios=10, duracion=None):
+        """Ejecuta la carga y la resume; añade el uso de CPU del propio generador"""
+        acumulador = AcumuladorCarga(num_requests or int(CAPACIDAD_POR_SEGUNDO * (duracion or 1)))
+        inicio, cpu_inicio = time.perf_counter(), time.process_time()
+        conexiones = asyncio.run(self.ejecutar(url, num_requests, usuarios, acumulador, duracion))
+        duracion_real = time.perf_counter() - inicio
+
+        resultado = acumulador.resumen(acumulador.enviados if duracion else num_requests, duracion_real)
+        if resultado:
+            resultado.update({
+                'motor': 'asyncio',
+                'modo_carga': 'cerrado',
+                'usuarios': usuarios,
+                'conexiones': conexiones,
+                # Un solo hilo: cerca del 100% el cuello de botella es el generador, no el servidor
+                'cpu_cliente': 100 * (time.process_time() - cpu_inicio) / duracion_real,
+            })
+        return resultado
+
+    async def ejecutar_abierto(self, url, instantes, acumulador):
+        """Lanza un request en cada instante programado sin esperar a los anteriores"""
+        self.pool = PoolConexiones(self.host, self.puerto, self.max_conexiones)
+        en_vuelo = set()
+        descartados = 0
+        retraso_max = 0.0
+
+        async def lanzar(indice, previsto):
+            usuario = indice % len(self.cookies)
+            resultado = await self.medir(url() if callable(url) else url, self.cookies[usuario], previsto)
+            resultado['worker'] = usuario
+            acumulador.registrar(resultado)
+
+        inicio = time.perf_counter()
+        try:
+            for indice, instante in enumerate(instantes):
+                previsto = inicio + instante
+                espera = previsto - time.perf_counter()
+                if espera > 0:
+                    await asyncio.sleep(espera)
+                retraso_max = max(retraso_max, time.perf_counter() - previsto)
+
+                if len(en_vuelo) >= MAX_PENDIENTES:
+                    # El cliente ya no puede sostener la tasa: se cuenta como error, no se encola
+                    descartados += 1
+                    acumulador.registrar(None)
+                    continue
+                tarea = asyncio.create_task(lanzar(indice, previsto))
+                en_vuelo.add(tarea)
+                tarea.add_done_callback(en_vuelo.discard)
+
+            if en_vuelo:
+                await asyncio.gather(*en_vuelo)
+        finally:
+            self.pool.cerrar()
+        return {
+            'conexiones': self.pool.abiertas,
+            'requests_descartados': descartados,
+            'retraso_envio_max_ms': retraso_max * 1000,
+        }
+
+    def prueba_tasa(self, url, tramos, llegadas='constante', semilla=42):
+        """Carga abierta según `tramos` [(segundos, requests/s)]; resumen con latencia corregida"""
+        instantes = programar_llegadas(tramos, llegadas, semilla)
+        acumulador = AcumuladorCarga(len(instantes))
+        inicio, cpu_inicio = time.perf_counter(), time.process_time()
+        extra = asyncio.run(self.ejecutar_abierto(url, instantes, acumulador))
+        duracion = time.perf_counter() - inicio
+
+        resultado = acumulador.resumen(len(instantes), duracion)
+        if resultado:
+            resultado.update({
+                **extra,
+                'motor': 'asyncio',
+                'modo_carga': 'abierto',
+                'llegadas': llegadas,
+                'tasa_objetivo': len(instantes) / sum(segundos for segundos, _ in tramos),
+                'cpu_cliente': 100 * (time.process_time() - cpu_inicio) / duracion,
+            })
+        return resultado
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Carga Distribuida
+Un solo proceso de Python no satura un servidor con varios workers: el GIL
+limita el generador a un núcleo. El coordinador reparte la prueba entre N
+procesos worker locales (y/o workers en otros hosts por TCP), los libera a la
+vez con una barrera de inicio y combina sus acumuladores (histogramas HDR,
+contadores y muestras) en un único resultado con el esquema de carga_async.py.
+
+Protocolo (TCP, mensajes JSON precedidos por su longitud en 4 bytes):
+    worker -> hola        coordinador -> escenario
+    worker -> listo       coordinador -> inicio {en: instante de reloj}
+    worker -> resultado {acumulador, fin, cpu, ...} o error
+
+Uso:
+    python carga_distribuida.py worker <host-coordinador>:9100   # en cada host remoto
+    python carga_distribuida.py autoprueba --procesos 1,2,4       # escalado del generador
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import socket
+import struct
+import asyncio
+import argparse
+import subprocess
+from itertools import cycle
+
+from carga_async import CAPACIDAD_POR_SEGUNDO, AcumuladorCarga, MotorCargaAsync, programar_llegadas
+
+PUERTO_COORDINADOR = 9100
+TIMEOUT_WORKERS = 60
+# Margen entre el último 'listo' y el inicio, para que el mensaje llegue a todos
+MARGEN_INICIO = 0.5
+# URLs precalculadas (y luego recorridas en ciclo) cuando `url` es una función y no hay tope de requests
+URLS_PRECALCULADAS = 10000
+
+RESPUESTA_ECO = (b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nContent-Length: 2\r\n"
+                 b"Server-Timing: total;dur=0\r\nConnection: keep-alive\r\n\r\nok")
+
+
+async def enviar_mensaje(escritor, mensaje):
+    datos = json.dumps(mensaje).encode()
+    escritor.write(struct.pack('!I', len(datos)) + datos)
+    await escritor.drain()
+
+
+async def recibir_mensaje(lector):
+    longitud, = struct.unpack('!I', await lector.readexactly(4))
+    return json.loads(await lector.readexactly(longitud))
+
+
+def repartir(total, partes, indice):
+    """Porción `indice` de `total` repartido en `partes` lo más parejo posible"""
+    return total // partes + (indice < total % partes)
+
+
+async def ejecutar_worker(host, puerto):
+    """Se conecta al coordinador, ejecuta su porción del escenario y le envía el acumulador"""
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    try:
+        await enviar_mensaje(escritor, {'tipo': 'hola', 'host': socket.gethostname(), 'pid': os.getpid()})
+        escenario = await recibir_mensaje(lector)
+
+        motor = MotorCargaAsync(escenario['base_url'], escenario['cookies'], escenario['max_conexiones'])
+        urls = escenario['urls']
+        url = urls[0] if len(urls) == 1 else cycle(urls).__next__
+        if escenario['modo'] == 'cerrado':
+            acumulador = AcumuladorCarga(escenario['num_requests'] or
+                                         int(CAPACIDAD_POR_SEGUNDO * escenario['duracion']))
+        else:
+            acumulador = AcumuladorCarga(len(escenario['instantes']))
+
+        await enviar_mensaje(escritor, {'tipo': 'listo'})
+        inicio = await recibir_mensaje(lector)
+        await asyncio.sleep(max(0.0, inicio['en'] - time.time()))
+
+        cpu_inicio, reloj_inicio = time.process_time(), time.perf_counter()
+        try:
+            if escenario['modo'] == 'cerrado':
+                extra = {'conexiones': await motor.ejecutar(url, escenario['num_requests'], escenario['usuarios'],
+                                                            acumulador, escenario['duracion'])}
+            else:
+                extra = await motor.ejecutar_abierto(url, escenario['instantes'], acumulador)
+        except Exception as e:
+            await enviar_mensaje(escritor, {'tipo': 'error', 'error': repr(e)})
+            return
+        duracion = time.perf_counter() - reloj_inicio
+
+        await enviar_mensaje(escritor, {
+            'tipo': 'resultado',
+            **extra,
+            'acumulador': acumulador.a_dict(),
+            'fin': time.time(),
+            'cpu_cliente': 100 * (time.process_time() - cpu_inicio) / duracion,
+        })
+    finally:
+        escritor.close()
+
+
+class CoordinadorCarga:
+    """Mismo uso que MotorCargaAsync (prueba_carga / prueba_tasa) repartido entre procesos"""
+
+    def __init__(self, base_url, cookies=None, max_conexiones=256, procesos=None,
+                 workers_remotos=0, escuchar=None):
+        self.base_url = base_url
+        self.cookies = cookies or [None]
+        self.max_conexiones = max_conexiones
+        self.procesos = os.cpu_count() if procesos is None else procesos
+        self.workers_remotos = workers_remotos
+        # Con workers remotos hay que escuchar en una dirección alcanzable y un puerto conocido
+        self.escuchar = escuchar or (('0.0.0.0', PUERTO_COORDINADOR) if workers_remotos else ('127.0.0.1', 0))
+
+    @property
+    def total_workers(self):
+        return self.procesos + self.workers_remotos
+
+    def escenario_base(self, indice):
+        return {
+            'base_url': self.base_url,
+            # Cada worker rota sobre todas las sesiones
+            'cookies': self.cookies[indice % len(self.cookies):] + self.cookies[:indice % len(self.cookies)],
+            'max_conexiones': max(1, repartir(self.max_conexiones, self.total_workers, indice)),
+        }
+
+    async def coordinar(self, escenarios):
+        """Conecta los workers, reparte los escenarios, libera la barrera y recoge resultados"""
+        conectados = asyncio.Queue()
+
+        async def atender(lector, escritor):
+            await conectados.put((lector, escritor, await recibir_mensaje(lector)))
+
+        servidor = await asyncio.start_server(atender, *self.escuchar)
+        puerto = servidor.sockets[0].getsockname()[1]
+        if self.workers_remotos:
+            print(f"   Esperando {self.workers_remotos} workers remotos: "
+                  f"python carga_distribuida.py worker <este-host>:{puerto}")
+        locales = [
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker', f"127.0.0.1:{puerto}"])
+            for _ in range(self.procesos)
+        ]
+        workers = []
+        try:
+            for _ in range(self.total_workers):
+                workers.append(await asyncio.wait_for(conectados.get(), TIMEOUT_WORKERS))
+
+            for (lector, escritor, _), escenario in zip(workers, escenarios):
+                await enviar_mensaje(escritor, escenario)
+            for lector, _, _ in workers:
+                await recibir_mensaje(lector)
+
+            inicio = time.time() + MARGEN_INICIO
+            for _, escritor, _ in workers:
+                await enviar_mensaje(escritor, {'tipo': 'inicio', 'en': inicio})
+            resultados = await asyncio.gather(*(recibir_mensaje(lector) for lector, _, _ in workers))
+            return inicio, [(hola, resultado) for (_, _, hola), resultado in zip(workers, resultados)]
+        finally:
+            for _, escritor, _ in workers:
+                escritor.close()
+            servidor.close()
+            for proceso in locales:
+                proceso.wait()
+
+    def distribuir(self, escenarios):
+        """Ejecuta los escenarios en los workers y combina sus respuestas"""
+        try:
+            inicio, respuestas = asyncio.run(self.coordinar(escenarios))
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            print(f"   ❌ Coordinación de workers fallida: {e!r}")
+            return None, None, None
+        return self.combinar(escenarios, respuestas, inicio)
+
+    def combinar(self, escenarios, respuestas, inicio):
+        """Acumulador único, duración de pared y campos extra agregados de todos los workers"""
+        errores = [f"{hola['host']}:{hola['pid']}: {r['error']}" for hola, r in respuestas if r['tipo'] == 'error']
+        if errores:
+            for error in errores:
+                print(f"   ❌ Worker {error}")
+            return None, None, None
+
+        acumulador = AcumuladorCarga(0)
+        desplazamiento = 0
+        for escenario, (_, respuesta) in zip(escenarios, respuestas):
+            acumulador.combinar(AcumuladorCarga.desde_dict(respuesta['acumulador']), desplazamiento)
+            desplazamiento += escenario['usuarios']
+        duracion = max(respuesta['fin'] for _, respuesta in respuestas) - inicio
+        extra = {
+            'motor': 'distribuido',
+            'procesos_carga': len(respuestas),
+            'hosts_carga': len({hola['host'] for hola, _ in respuestas}),
+            'conexiones': sum(respuesta['conexiones'] for _, respuesta in respuestas),
+            # Suma de los núcleos usados: cerca de 100 * procesos el generador sigue siendo el límite
+            'cpu_cliente': sum(respuesta['cpu_cliente'] for _, respuesta in respuestas),
+        }
+        if escenarios[0]['modo'] == 'abierto':
+            extra['requests_descartados'] = sum(respuesta['requests_descartados'] for _, respuesta in respuestas)
+            extra['retraso_envio_max_ms'] = max(respuesta['retraso_envio_max_ms'] for _, respuesta in respuestas)
+        return acumulador, duracion, extra
+
+    def prueba_carga(self, url, num_requests=50, usuarios=10, duracion=None):
+        """Carga cerrada: requests y usuarios se reparten entre los workers
+
+        Con `duracion` todos los workers cargan durante ese tiempo y
+        num_requests es un tope opcional, como en MotorCargaAsync.
+        """
+        urls = [url() for _ in range(num_requests or URLS_PRECALCULADAS)] if callable(url) else [url]
+        escenarios = []
+        for i in range(self.total_workers):
+            escenario = self.escenario_base(i)
+            escenario.update({
+                'modo': 'cerrado',
+                'num_requests': repartir(num_requests, self.total_workers, i) if num_requests else None,
+                'duracion': duracion,
+                'usuarios': max(1, repartir(usuarios, self.total_workers, i)),
+                'urls': urls[i::self.total_workers] if len(urls) > 1 else urls,
+            })
+            escenarios.append(escenario)
+
+        acumulador, duracion_real, extra = self.distribuir(escenarios)
+        if acumulador is None:
+            return None
+        resultado = acumulador.resumen(acumulador.enviados if duracion else num_requests, duracion_real)
+        if resultado:
+            resultado.update({**extra, 'modo_carga': 'cerrado', 'usuarios': usuarios})
+        return resultado
+
+    def prueba_tasa(self, url, tramos, llegadas='constante', semilla=42):
+        """Carga abierta: los instantes programados se reparten en round-robin entre los workers"""
+        instantes = programar_llegadas(tramos, llegadas, semilla)
+        urls = [url() for _ in instantes] if callable(url) else [url]
+        escenarios = []
+        for i in range(self.total_workers):
+            escenario = self.escenario_base(i)
+            escenario.update({
+                'modo': 'abierto',
+                'instantes': instantes[i::self.total_workers],
+                'usuarios': len(self.cookies),
+                'urls': urls[i::self.total_workers] if len(urls) > 1 else urls,
+            })
+            escenarios.append(escenario)
+
+        acumulador, duracion, extra = self.distribuir(escenarios)
+        if acumulador is None:
+            return None
+        resultado = acumulador.resumen(len(instantes), duracion)
+        if resultado:
+            resultado.update({
+                **extra,
+                'modo_carga': 'abierto',
+                'llegadas': llegadas,
+                'tasa_objetivo': len(instantes) / sum(segundos for segundos, _ in tramos),
+            })
+        return resultado
+
+
+class ProtocoloEco(asyncio.Protocol):
+    """Servidor HTTP mínimo para la autoprueba: responde 'ok' a cada request keep-alive"""
+
+    def connection_made(self, transporte):
+        self.transporte = transporte
+        self.buffer = b''
+
+    def data_received(self, datos):
+        self.buffer += datos
+        while (fin := self.buffer.find(b'\r\n\r\n')) >= 0:
+            self.buffer = self.buffer[fin + 4:]
+            self.transporte.write(RESPUESTA_ECO)
+
+
+async def servir_eco(puerto):
+    # SO_REUSEPORT: varios procesos eco en el mismo puerto, el kernel reparte las conexiones
+    servidor = await asyncio.get_running_loop().create_server(
+        ProtocoloEco, '127.0.0.1', puerto, reuse_port=True)
+    await servidor.serve_forever()
+
+
+def autoprueba(procesos=(1, 2, 4), requests_por_proceso=20000, usuarios_por_proceso=64,
+               servidores_eco=None, puerto=8099, archivo_csv="resultados/carga_distribuida_escalado.csv"):
+    """Throughput del generador contra servidores eco triviales con 1..N procesos worker
+
+    El servidor eco casi no trabaja, así que el límite es el generador: con
+    núcleos libres el throughput debe crecer casi linealmente con los procesos.
+    """
+    print("=== AUTOPRUEBA DE ESCALADO DEL GENERADOR ===")
+    servidores_eco = servidores_eco or max(procesos)
+    if os.cpu_count() < max(procesos) + servidores_eco:
+        print(f"⚠ Solo {os.cpu_count()} CPUs para {max(procesos)} workers y {servidores_eco} "
+              f"servidores eco: el escalado quedará limitado por la máquina")
+
+    ecos = [subprocess.Popen([sys.executable, os.path.abspath(__file__), 'eco', str(puerto)])
+            for _ in range(servidores_eco)]
+    filas = []
+    try:
+        time.sleep(1)
+        base = None
+        for n in procesos:
+            coordinador = CoordinadorCarga(f"http://127.0.0.1:{puerto}", procesos=n,
+                                           max_conexiones=usuarios_por_proceso * n)
+            resultado = coordinador.prueba_carga('/', requests_por_proceso * n, usuarios_por_proceso * n)
+            if resultado is None:
+                print(f"❌ {n} procesos: sin resultados")
+                continue
+            base = base or resultado['throughput']
+            fila = {
+                'procesos': n,
+                'requests': resultado['total_requests'],
+                'errores': resultado['errores'],
+                'throughput': round(resultado['throughput'], 1),
+                'aceleracion': round(resultado['throughput'] / base, 2),
+                'eficiencia': round(resultado['throughput'] / base / n, 2),
+                'cpu_cliente': round(resultado['cpu_cliente'], 1),
+                'percentil_99': resultado['percentil_99'],
+            }
+            filas.append(fila)
+            print(f"✓ {n} procesos: {fila['throughput']:.0f} req/s (x{fila['aceleracion']}, "
+                  f"eficiencia {fila['eficiencia']:.0%}), CPU cliente {fila['cpu_cliente']:.0f}%")
+    finally:
+        for eco in ecos:
+            eco.terminate()
+            eco.wait()
+
+    if filas:
+        os.makedirs(os.path.dirname(archivo_csv), exist_ok=True)
+        with open(archivo_csv, 'w', newline='') as archivo:
+            writer = csv.DictWriter(archivo, fieldnames=list(filas[0]))
+            writer.writeheader()
+            writer.writerows(filas)
+        print(f"✅ Escalado guardado en {archivo_csv}")
+    return filas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generador de carga distribuido: workers y autoprueba")
+    subparsers = parser.add_subparsers(dest='accion', required=True)
+
+    worker = subparsers.add_parser('worker', help="Ejecuta un worker conectado al coordinador")
+    worker.add_argument('coordinador', help="host:puerto del coordinador")
+
+    eco = subparsers.add_parser('eco', help="Servidor HTTP trivial para la autoprueba")
+    eco.add_argument('puerto', type=int)
+
+    prueba = subparsers.add_parser('autoprueba', help="Mide el escalado del generador con 1..N procesos")
+    prueba.add_argument('--procesos', default='1,2,4', help="Lista de procesos worker (por defecto 1,2,4)")
+    prueba.add_argument('--requests', type=int, default=20000, help="Requests por proceso worker")
+    prueba.add_argument('--usuarios', type=int, default=64, help="Usuarios virtuales por proceso worker")
+    prueba.add_argument('--servidores-eco', type=int, help="Procesos eco (por defecto el máximo de --procesos)")
+    args = parser.parse_args()
+
+    if args.accion == 'worker':
+        host, _, puerto = args.coordinador.rpartition(':')
+        asyncio.run(ejecutar_worker(host, int(puerto)))
+    elif args.accion == 'eco':
+        try:
+            asyncio.run(servir_eco(args.puerto))
+        except KeyboardInterrupt:
+            pass
+    else:
+        filas = autoprueba([int(n) for n in args.procesos.split(',')], args.requests,
+                           args.usuarios, args.servidores_eco)
+        sys.exit(0 if filas else 1)
@@ -6,15 +6,110 @@ Ejecuta todos los laboratorios en secuencia
 
 import os
 import sys
+import csv
 import time
+import signal
+import shutil
+import socket
+import argparse
 import subprocess
 import threading
 from datetime import datetime
 
+from carga_async import parsear_programa
+from perfiles_carga import parsear_perfil
+from snapshots_dataset import DB_SNAPSHOT_ACTIVO, restaurar_snapshot
+
+PUERTO = 8002
+# Endpoints que laboratorio_rendimiento.py recorre con cada perfil de carga
+ENDPOINTS_PERFILES = 5
+# Margen para las pruebas de volumen fijo (secuencial, concurrente, estrés, compresión, ...)
+MARGEN_LABORATORIO = 300
+
 class EjecutorLaboratorios:
-    def __init__(self):
+    def __init__(self, modo_servidor='runserver', workers=4, threads=2, muestreo=False, muestreo_hz=100,
+                 snapshot=None, timeout_laboratorio=None):
         self.servidor_proceso = None
         self.servidor_pid = None
+        # 'runserver': servidor de desarrollo de un proceso (con autoreloader)
+        # 'produccion': gunicorn pre-fork con varios workers y threads por worker
+        self.modo_servidor = modo_servidor
+        self.workers = workers
+        self.threads = threads
+        # Perfilador por muestreo dentro del servidor: un flamegraph por ejecución
+        self.muestreo = muestreo
+        self.muestreo_hz = muestreo_hz
+        self.ejecucion_muestreo = None
+        # Dataset restaurado antes de cada arranque del servidor (snapshots_dataset.py)
+        self.snapshot = snapshot
+        # Segundos máximos del laboratorio de rendimiento (None = según su configuración)
+        self.timeout_laboratorio = timeout_laboratorio
+    
+    def comando_servidor(self):
+        """Comando para lanzar el servidor según el modo configurado"""
+        if self.modo_servidor == 'produccion':
+            return [
+                sys.executable, '-m', 'gunicorn', 'patron_mvc.wsgi:application',
+                '--bind', f'127.0.0.1:{PUERTO}',
+                '--workers', str(self.workers),
+                '--threads', str(self.threads),
+                '--graceful-timeout', '5',
+            ]
+        return [sys.executable, 'manage.py', 'runserver', str(PUERTO)]
+    
+    def entorno_servidor(self):
+        """Variables de entorno del servidor y de los laboratorios que lo miden"""
+        entorno = dict(os.environ)
+        entorno.update({
+            'LAB_SERVIDOR': self.modo_servidor,
+            'LAB_WORKERS': str(self.workers if self.modo_servidor == 'produccion' else 1),
+            'LAB_THREADS': str(self.threads if self.modo_servidor == 'produccion' else 0),
+            'LAB_SNAPSHOT': self.snapshot or '',
+        })
+        if self.snapshot:
+            # El snapshot se restaura en una copia no versionada (con WAL, como toda base por DJANGO_DB_NAME)
+            entorno['DJANGO_DB_NAME'] = DB_SNAPSHOT_ACTIVO
+        if self.servidor_pid:
+            # El muestreador de recursos del laboratorio sigue este proceso y sus hijos
+            entorno['LAB_SERVIDOR_PID'] = str(self.servidor_pid)
+        if self.modo_servidor == 'produccion':
+            entorno['DJANGO_DEBUG'] = '0'
+            # Con varios workers la L2 debe ser compartida para que un hit en un worker
+            # aproveche lo calculado por otro (locmem es por proceso)
+            if entorno.get('CACHE_L2', 'locmem') == 'locmem':
+                entorno['CACHE_L2'] = 'file'
+        if self.muestreo and self.ejecucion_muestreo:
+            entorno.update({
+                'MUESTREO': '1',
+                'MUESTREO_HZ': str(self.muestreo_hz),
+                'MUESTREO_EJECUCION': self.ejecucion_muestreo,
+            })
+        return entorno
+    
+    def duracion_laboratorio(self, entorno):
+        """Timeout del laboratorio de rendimiento: duración programada de perfiles, carga abierta
+        y recorridos (según las variables LAB_* del entorno) más un margen para el resto"""
+        if self.timeout_laboratorio:
+            return self.timeout_laboratorio
+        perfiles = entorno.get('LAB_PERFILES', 'escalones:1,2,4,8,16,32:5').split(';')
+        segundos_perfiles = sum(segundos for perfil in perfiles for _, segundos in parsear_perfil(perfil)['pasos'])
+        segundos_programa = sum(duracion for duracion, _ in parsear_programa(entorno.get('LAB_PROGRAMA', '10:20')))
+        segundos_recorridos = float(entorno.get('LAB_DURACION_RECORRIDOS', 30))
+        return (ENDPOINTS_PERFILES * segundos_perfiles + segundos_programa + segundos_recorridos
+                + MARGEN_LABORATORIO)
+    
+    def esperar_servidor(self, timeout=30):
+        """Espera hasta que el puerto acepte conexiones o el proceso termine"""
+        limite = time.time() + timeout
+        while time.time() < limite:
+            if self.servidor_proceso.poll() is not None:
+                return False
+            try:
+                with socket.create_connection(('127.0.0.1', PUERTO), timeout=1):
+                    return True
+            except OSError:
+                time.sleep(0.25)
+        return False
         
     def iniciar_servidor_django(self):
         """Inicia servidor Django en background"""
@@ -26,18 +121,43 @@ class EjecutorLaboratorios:
             # Verificar que el servidor no esté corriendo
             self.detener_servidor_existente()
             
+            # Con el servidor detenido, la base vuelve al estado exacto del snapshot
+            if self.snapshot:
+                if not restaurar_snapshot(self.snapshot):
+                    return False
+            
+            # Una L2 en archivo sobrevive al servidor: se vacía para no servir datos de otra ejecución
+            if self.entorno_servidor().get('CACHE_L2') == 'file':
+                shutil.rmtree('cache_l2', ignore_errors=True)
+            
+            if self.muestreo:
+                workers = f"w{self.workers}-" if self.modo_servidor == 'produccion' else ""
+                self.ejecucion_muestreo = (f"{self.modo_servidor}-{workers}"
+                                           f"{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+            
+            # gunicorn sirve los estáticos desde STATIC_ROOT (nombres con hash + .gz/.zst)
+            if self.modo_servidor == 'produccion':
+                subprocess.run([sys.executable, 'manage.py', 'collectstatic', '--noinput', '-v0'],
+                               env=self.entorno_servidor(), check=True)
+            
             # Iniciar servidor
-            self.servidor_proceso = subprocess.Popen([
-                sys.executable, 'manage.py', 'runserver', '8002'
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            self.servidor_proceso = subprocess.Popen(
+                self.comando_servidor(),
+                env=self.entorno_servidor(),
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            self.servidor_pid = self.servidor_proceso.pid
             
             # Esperar a que el servidor inicie
             print("Esperando a que el servidor inicie...")
-            time.sleep(10)
             
             # Verificar que el servidor esté corriendo
-            if self.servidor_proceso.poll() is None:
-                print("✅ Servidor Django iniciado en puerto 8002")
+            if self.esperar_servidor():
+                if self.modo_servidor == 'produccion':
+                    print(f"✅ Servidor gunicorn iniciado en puerto {PUERTO} "
+                          f"({self.workers} workers x {self.threads} threads)")
+                else:
+                    print(f"✅ Servidor Django iniciado en puerto {PUERTO}")
                 return True
             else:
                 print("❌ Error iniciando servidor Django")
@@ -56,10 +176,14 @@ class EjecutorLaboratorios:
             import psutil
             for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
                 try:
-                    if proc.info['cmdline'] and 'runserver' in ' '.join(proc.info['cmdline']):
-                        if '8002' in ' '.join(proc.info['cmdline']):
+                    cmdline = ' '.join(proc.info['cmdline'] or [])
+                    if 'runserver' in cmdline or 'gunicorn' in cmdline:
+                        if str(PUERTO) in cmdline:
                             proc.terminate()
-                            proc.wait(timeout=5)
+                            try:
+                                proc.wait(timeout=5)
+                            except psutil.TimeoutExpired:
+                                proc.kill()
                             print(f"✅ Proceso Django terminado: {proc.info['pid']}")
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     pass
@@ -71,13 +195,23 @@ class EjecutorLaboratorios:
         """Detiene servidor Django"""
         if self.servidor_proceso:
             print("Deteniendo servidor Django...")
-            self.servidor_proceso.terminate()
+            if self.modo_servidor == 'produccion':
+                # SIGINT: apagado rápido de gunicorn sin esperar conexiones keep-alive
+                self.servidor_proceso.send_signal(signal.SIGINT)
+            else:
+                self.servidor_proceso.terminate()
             try:
-                self.servidor_proceso.wait(timeout=5)
+                self.servidor_proceso.wait(timeout=10)
                 print("✅ Servidor Django detenido")
             except subprocess.TimeoutExpired:
                 self.servidor_proceso.kill()
                 print("✅ Servidor Django terminado forzadamente")
+            self.servidor_proceso = None
+            
+            if self.muestreo and self.ejecucion_muestreo:
+                from generar_flamegraph import generar_flamegraph
+                generar_flamegraph(self.ejecucion_muestreo)
+                self.ejecucion_muestreo = None
     
     def ejecutar_laboratorio_rendimiento(self):
         """Ejecuta laboratorio de rendimiento"""
@@ -95,9 +229,12 @@ class EjecutorLaboratorios:
             return False
         
         try:
+            entorno = self.entorno_servidor()
+            timeout = self.duracion_laboratorio(entorno)
+            print(f"Timeout del laboratorio: {timeout:.0f}s")
             result = subprocess.run([
                 sys.executable, 'laboratorio_rendimiento.py'
-            ], capture_output=True, text=True, timeout=300)
+            ], capture_output=True, text=True, timeout=timeout, env=entorno)
             
             if result.returncode == 0:
                 print("✅ Laboratorio de rendimiento completado")
@@ -109,12 +246,63 @@ class EjecutorLaboratorios:
                 return False
                 
         except subprocess.TimeoutExpired:
-            print("❌ Timeout en laboratorio de rendimiento")
+            print("❌ Timeout en laboratorio de rendimiento (amplíelo con --timeout-laboratorio)")
             return False
         except Exception as e:
             print(f"❌ Error ejecutando laboratorio: {e}")
             return False
     
+    def barrido_workers(self, lista_workers, num_requests=200, num_threads=32):
+        """Mide throughput por endpoint variando el número de workers de gunicorn"""
+        print("\n=== BARRIDO DE WORKERS (MODO PRODUCCIÓN) ===")
+        from laboratorio_rendimiento import RendimientoAnalyzer
+        
+        self.modo_servidor = 'produccion'
+        filas = []
+        
+        for workers in lista_workers:
+            self.workers = workers
+            if not self.iniciar_servidor_django():
+                print(f"❌ No se pudo iniciar gunicorn con {workers} workers")
+                continue
+            
+            try:
+                analyzer = RendimientoAnalyzer()
+                analyzer.iniciar_usuarios_virtuales(num_usuarios=min(num_threads, 10))
+                
+                for ruta in ['/clientes/', '/vehiculos/', '/ordenes/', '/accounts/']:
+                    url = f"{analyzer.base_url}{ruta}"
+                    resultado = analyzer.prueba_carga_concurrente(url, num_requests, num_threads)
+                    if not resultado:
+                        continue
+                    
+                    filas.append({
+                        'servidor': self.modo_servidor,
+                        'workers': workers,
+                        'threads': self.threads,
+                        'snapshot': self.snapshot or '',
+                        'url': url,
+                        'throughput': resultado['throughput'],
+                        'tiempo_promedio': resultado['tiempo_promedio'],
+                        'percentil_95': resultado['percentil_95'],
+                        'errores': resultado['errores'],
+                    })
+                    print(f"   ✓ {workers} workers {ruta}: {resultado['throughput']:.2f} req/s")
+            finally:
+                self.detener_servidor_django()
+        
+        os.makedirs('resultados', exist_ok=True)
+        with open('resultados/barrido_workers.csv', 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=[
+                'servidor', 'workers', 'threads', 'snapshot', 'url', 'throughput',
+                'tiempo_promedio', 'percentil_95', 'errores'
+            ])
+            writer.writeheader()
+            writer.writerows(filas)
+        
+        print("✅ Barrido guardado en resultados/barrido_workers.csv")
+        return bool(filas)
+    
     def ejecutar_laboratorios_patrones(self):
         """Ejecuta laboratorios de patrones específicos"""
         print("\n=== EJECUTANDO LABORATORIOS DE PATRONES ===")
@@ -171,6 +359,7 @@ class EjecutorLaboratorios:
         
         dependencias = [
             'django',
+            *(['gunicorn'] if self.modo_servidor == 'produccion' else []),
             'matplotlib',
             'pandas',
             'numpy',
@@ -352,6 +541,29 @@ class EjecutorLaboratorios:
             return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ejecuta todos los laboratorios en secuencia")
+    parser.add_argument('--servidor', choices=['runserver', 'produccion'], default='runserver',
+                        help="runserver (desarrollo) o produccion (gunicorn pre-fork)")
+    parser.add_argument('--workers', type=int, default=4, help="Procesos worker de gunicorn")
+    parser.add_argument('--threads', type=int, default=2, help="Threads por worker de gunicorn")
+    parser.add_argument('--muestreo', action='store_true',
+                        help="Perfilar el servidor por muestreo y generar un flamegraph SVG por ejecución")
+    parser.add_argument('--muestreo-hz', type=int, default=100, help="Frecuencia de muestreo")
+    parser.add_argument('--snapshot', metavar='NOMBRE',
+                        help="Restaurar este snapshot de dataset antes de cada arranque del servidor")
+    parser.add_argument('--barrido-workers', type=int, nargs='+', metavar='N',
+                        help="Solo medir throughput para cada número de workers (p. ej. 1 2 4 8)")
+    parser.add_argument('--timeout-laboratorio', type=float, metavar='SEGUNDOS',
+                        help="Tiempo máximo del laboratorio de rendimiento (por defecto, la duración "
+                             "programada de perfiles, carga abierta y recorridos + 300s)")
+    args = parser.parse_args()
+    
+    if args.barrido_workers:
+        ejecutor = EjecutorLaboratorios('produccion', threads=args.threads,
+                                        muestreo=args.muestreo, muestreo_hz=args.muestreo_hz,
+                                        snapshot=args.snapshot)
+        sys.exit(0 if ejecutor.barrido_workers(args.barrido_workers) else 1)
+    
     print("🎯 Iniciando ejecución completa de laboratorios...")
     print("   Esto puede tomar varios minutos...")
     print("   Presione Ctrl+C para cancelar en cualquier momento")
@@ -363,7 +575,9 @@ if __name__ == "__main__":
         print("Ejecución cancelada por el usuario")
         sys.exit(0)
     
-    ejecutor = EjecutorLaboratorios()
+    ejecutor = EjecutorLaboratorios(args.servidor, args.workers, args.threads,
+                                    args.muestreo, args.muestreo_hz, args.snapshot,
+                                    args.timeout_laboratorio)
     exito = ejecutor.ejecutar_suite_completa()
     
     if exito:
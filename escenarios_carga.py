@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Escenarios de Carga (recorridos de usuario)
+El tráfico real no son cinco URLs con GET: es una recepcionista que inicia
+sesión, busca un cliente, carga sus vehículos por AJAX, crea una orden con
+CSRF y abre su detalle. Cada recorrido se declara como una lista de pasos con
+tiempos de pensar, extracción de datos entre pasos (pks, tokens CSRF) y un
+peso dentro de la mezcla de tráfico.
+
+Cada usuario virtual (un hilo con su propia sesión de requests) elige un
+recorrido según los pesos, lo ejecuta desde una sesión nueva y repite hasta
+cumplir la duración. Se resumen la latencia de cada paso y la de cada
+recorrido (suma de sus pasos, sin los tiempos de pensar) con AcumuladorCarga.
+
+Pasos:
+    'metodo', 'url'         URL relativa; admite {variables} de los pasos anteriores
+    'datos'                 formulario del POST, también con {variables}
+    'cabeceras'             cabeceras extra (p. ej. X-Requested-With para AJAX)
+    'esperar'               regex que debe cumplir la URL final (si no, el paso falla)
+    'extraer'               variable -> ('cookie', nombre) | ('regex', patrón sobre el HTML)
+                            | ('json', clave de un elemento de la lista) | ('url', patrón sobre la URL final)
+    'pensar'                (mínimo, máximo) segundos de espera tras el paso
+"""
+
+import re
+import time
+import random
+import threading
+from datetime import date, timedelta
+from urllib.parse import urljoin
+
+import requests
+
+from carga_async import AcumuladorCarga, parsear_server_timing
+
+PENSAR_LECTURA = (1, 3)
+PENSAR_FORMULARIO = (3, 8)
+
+PASOS_LOGIN = [
+    {'nombre': 'login_form', 'metodo': 'GET', 'url': '/accounts/login/',
+     'extraer': {'csrf': ('cookie', 'csrftoken')}, 'pensar': PENSAR_FORMULARIO},
+    {'nombre': 'login', 'metodo': 'POST', 'url': '/accounts/login/', 'esperar': r'/accounts/$',
+     'datos': {'csrfmiddlewaretoken': '{csrf}', 'username': '{usuario}', 'password': '{password}'},
+     'extraer': {'csrf': ('cookie', 'csrftoken')}, 'pensar': PENSAR_LECTURA},
+]
+
+RECORRIDOS = {
+    # Recepción: alta de una orden para un cliente que llega al taller
+    'recepcion_nueva_orden': {
+        'peso': 2,
+        'credenciales': [('patricia_silva', 'recep123'), ('carmen_ruiz', 'recep123')],
+        'variables': {'busqueda': ['a', 'e', 'o', 'ar', 'ez', 'in']},
+        'pasos': PASOS_LOGIN + [
+            {'nombre': 'buscar_cliente', 'metodo': 'GET', 'url': '/clientes/?search={busqueda}',
+             'extraer': {'cliente': ('regex', r'href="/clientes/(\d+)/"')}, 'pensar': PENSAR_LECTURA},
+            {'nombre': 'form_orden', 'metodo': 'GET', 'url': '/ordenes/crear/',
+             'extraer': {'csrf': ('cookie', 'csrftoken')}, 'pensar': PENSAR_LECTURA},
+            {'nombre': 'vehiculos_ajax', 'metodo': 'GET', 'url': '/ordenes/ajax/vehiculos/?cliente_id={cliente}',
+             'cabeceras': {'X-Requested-With': 'XMLHttpRequest'},
+             'extraer': {'vehiculo': ('json', 'id'), 'kilometraje': ('json', 'kilometraje')},
+             'pensar': PENSAR_FORMULARIO},
+            {'nombre': 'crear_orden', 'metodo': 'POST', 'url': '/ordenes/crear/',
+             'datos': {'csrfmiddlewaretoken': '{csrf}', 'cliente': '{cliente}', 'vehiculo': '{vehiculo}',
+                       'kilometraje_ingreso': '{kilometraje}', 'prioridad': 'NORMAL',
+                       'fecha_estimada_entrega': '{entrega}',
+                       'descripcion_falla': 'Ruido en la suspensión delantera (escenario de carga)'},
+             'extraer': {'orden': ('url', r'/ordenes/(\d+)/$')}, 'pensar': PENSAR_LECTURA},
+            {'nombre': 'detalle_orden', 'metodo': 'GET', 'url': '/ordenes/{orden}/'},
+        ],
+    },
+    # Taller: el mecánico revisa el tablero de carga y abre una orden en trabajo
+    'mecanico_consulta': {
+        'peso': 5,
+        'credenciales': [('carlos_rodriguez', 'mecanico123'), ('maria_gonzalez', 'mecanico123'),
+                         ('jose_martinez', 'mecanico123'), ('ana_lopez', 'mecanico123')],
+        'variables': {'estado': ['EN_TRABAJO', 'DIAGNOSTICO', 'APROBADO']},
+        'pasos': PASOS_LOGIN + [
+            {'nombre': 'carga_mecanicos', 'metodo': 'GET', 'url': '/ordenes/carga-mecanicos/',
+             'pensar': PENSAR_LECTURA},
+            {'nombre': 'ordenes_por_estado', 'metodo': 'GET', 'url': '/ordenes/?estado={estado}',
+             'extraer': {'orden': ('regex', r'href="/ordenes/(\d+)/"')}, 'pensar': PENSAR_LECTURA},
+            {'nombre': 'detalle_orden', 'metodo': 'GET', 'url': '/ordenes/{orden}/'},
+        ],
+    },
+    # Gerencia: repaso de clientes y vehículos
+    'gerente_revision': {
+        'peso': 1,
+        'credenciales': [('gerente', 'gerente123')],
+        'variables': {},
+        'pasos': PASOS_LOGIN + [
+            {'nombre': 'clientes', 'metodo': 'GET', 'url': '/clientes/',
+             'extraer': {'cliente': ('regex', r'href="/clientes/(\d+)/"')}, 'pensar': PENSAR_LECTURA},
+            {'nombre': 'detalle_cliente', 'metodo': 'GET', 'url': '/clientes/{cliente}/',
+             'pensar': PENSAR_LECTURA},
+            {'nombre': 'vehiculos', 'metodo': 'GET', 'url': '/vehiculos/'},
+        ],
+    },
+}
+
+
+def validar_recorridos(especificacion):
+    """Tipo para argparse: nombres de RECORRIDOS separados por ','"""
+    nombres = [nombre.strip() for nombre in especificacion.split(',') if nombre.strip()]
+    desconocidos = [nombre for nombre in nombres if nombre not in RECORRIDOS]
+    if not nombres or desconocidos:
+        raise ValueError(f"Recorridos no válidos: {especificacion!r} (disponibles: {', '.join(RECORRIDOS)})")
+    return nombres
+
+
+class ExtraccionFallida(Exception):
+    """Un paso no devolvió el dato que necesitan los siguientes"""
+
+
+def extraer(especificacion, respuesta, sesion, rng):
+    fuente, argumento = especificacion
+    if fuente == 'cookie':
+        valor = sesion.cookies.get(argumento)
+    elif fuente == 'regex':
+        coincidencias = re.findall(argumento, respuesta.text)
+        valor = rng.choice(coincidencias) if coincidencias else None
+    elif fuente == 'json':
+        elementos = respuesta.json()
+        valor = rng.choice(elementos).get(argumento) if elementos else None
+    elif fuente == 'url':
+        coincidencia = re.search(argumento, respuesta.url)
+        valor = coincidencia.group(1) if coincidencia else None
+    else:
+        raise ValueError(f"Fuente de extracción desconocida: {fuente}")
+    if valor is None:
+        raise ExtraccionFallida(f"{fuente}:{argumento}")
+    return valor
+
+
+class MotorEscenarios:
+    """Usuarios virtuales (hilos) que recorren una mezcla ponderada de recorridos"""
+
+    def __init__(self, base_url, recorridos=None, factor_pensar=1.0, semilla=42):
+        self.base_url = base_url
+        self.recorridos = recorridos or RECORRIDOS
+        # 0 elimina los tiempos de pensar (máxima presión), 1 los respeta
+        self.factor_pensar = factor_pensar
+        self.semilla = semilla
+        self.lock = threading.Lock()
+        self.acumuladores_pasos = {}
+        self.acumuladores_recorridos = {}
+        self.fallos_extraccion = {}
+
+    def medir_paso(self, sesion, paso, variables, rng, worker):
+        """Ejecuta un paso; devuelve (resultado para AcumuladorCarga, respuesta)"""
+        url = urljoin(self.base_url, paso['url'].format_map(variables))
+        datos = {campo: valor.format_map(variables) for campo, valor in paso.get('datos', {}).items()}
+        cabeceras = dict(paso.get('cabeceras', {}))
+        if paso['metodo'] == 'POST':
+            cabeceras['Referer'] = url
+
+        enviado_ns = time.time_ns()
+        inicio = time.perf_counter()
+        try:
+            respuesta = sesion.request(paso['metodo'], url, data=datos or None, headers=cabeceras, timeout=30)
+        except requests.RequestException as e:
+            return {'url': paso['url'], 'tiempo_ms': (time.perf_counter() - inicio) * 1000, 'status_code': 0,
+                    'success': False, 'error': str(e), 'enviado_ns': enviado_ns, 'worker': worker}, None
+        tiempo_ms = (time.perf_counter() - inicio) * 1000
+
+        server_timing = parsear_server_timing(respuesta.headers.get('Server-Timing'))
+        exito = respuesta.status_code == 200 and (
+            'esperar' not in paso or re.search(paso['esperar'], respuesta.url) is not None)
+        return {
+            'url': paso['url'],
+            'tiempo_ms': tiempo_ms,
+            'tiempo_redirect_ms': sum(r.elapsed.total_seconds() * 1000 for r in respuesta.history),
+            'redirecciones': len(respuesta.history),
+            'servidor_ms': server_timing.get('total'),
+            'sql_ms': server_timing.get('sql'),
+            'template_ms': server_timing.get('tpl'),
+            'bytes_transferidos': len(respuesta.content),
+            'status_code': respuesta.status_code,
+            'success': exito,
+            'enviado_ns': enviado_ns,
+            'worker': worker,
+        }, respuesta
+
+    def crear_sesion(self):
+        """Sesión de cada recorrido (benchmark_wsgi.py la monta sobre la aplicación en proceso)"""
+        return requests.Session()
+
+    def registrar(self, acumuladores, clave, resultado):
+        with self.lock:
+            if clave not in acumuladores:
+                acumuladores[clave] = AcumuladorCarga()
+            acumuladores[clave].registrar(resultado)
+
+    def ejecutar_recorrido(self, nombre, rng, worker):
+        """Un recorrido completo en una sesión nueva; se interrumpe en el primer paso fallido"""
+        recorrido = self.recorridos[nombre]
+        usuario, password = rng.choice(recorrido['credenciales'])
+        variables = {
+            'usuario': usuario,
+            'password': password,
+            'entrega': (date.today() + timedelta(days=rng.randint(1, 14))).isoformat(),
+            **{variable: rng.choice(valores) for variable, valores in recorrido['variables'].items()},
+        }
+        total_ms = 0.0
+        enviado_ns = time.time_ns()
+        exito = True
+        with self.crear_sesion() as sesion:
+            for paso in recorrido['pasos']:
+                resultado, respuesta = self.medir_paso(sesion, paso, variables, rng, worker)
+                self.registrar(self.acumuladores_pasos, (nombre, paso['nombre']), resultado)
+                total_ms += resultado['tiempo_ms']
+                if not resultado['success']:
+                    exito = False
+                    break
+                try:
+                    for variable, especificacion in paso.get('extraer', {}).items():
+                        variables[variable] = extraer(especificacion, respuesta, sesion, rng)
+                except (ExtraccionFallida, ValueError):
+                    with self.lock:
+                        clave = (nombre, paso['nombre'])
+                        self.fallos_extraccion[clave] = self.fallos_extraccion.get(clave, 0) + 1
+                    exito = False
+                    break
+                if paso.get('pensar') and self.factor_pensar:
+                    time.sleep(rng.uniform(*paso['pensar']) * self.factor_pensar)
+
+        self.registrar(self.acumuladores_recorridos, nombre, {
+            'url': nombre, 'tiempo_ms': total_ms, 'tiempo_redirect_ms': 0.0, 'redirecciones': 0,
+            'status_code': 200 if exito else 0, 'success': exito, 'enviado_ns': enviado_ns, 'worker': worker,
+        })
+
+    def ejecutar(self, usuarios=10, duracion=60):
+        """Carga con `usuarios` hilos durante `duracion` segundos; devuelve las filas de resumen"""
+        nombres = list(self.recorridos)
+        pesos = [self.recorridos[nombre]['peso'] for nombre in nombres]
+        limite = time.perf_counter() + duracion
+
+        def usuario_virtual(indice):
+            rng = random.Random(f"{self.semilla}:{indice}")
+            while time.perf_counter() < limite:
+                self.ejecutar_recorrido(rng.choices(nombres, pesos)[0], rng, indice)
+
+        inicio = time.perf_counter()
+        hilos = [threading.Thread(target=usuario_virtual, args=(i,)) for i in range(usuarios)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion_real = time.perf_counter() - inicio
+
+        filas = []
+        for nombre in nombres:
+            acumulador = self.acumuladores_recorridos.get(nombre)
+            resultado = acumulador and acumulador.resumen(acumulador.enviados, duracion_real)
+            if resultado:
+                resultado.update({'url': nombre, 'tipo_prueba': 'recorrido', 'recorrido': nombre,
+                                  'peso': self.recorridos[nombre]['peso']})
+                filas.append(resultado)
+            for paso in self.recorridos[nombre]['pasos']:
+                acumulador = self.acumuladores_pasos.get((nombre, paso['nombre']))
+                resultado = acumulador and acumulador.resumen(acumulador.enviados, duracion_real)
+                if resultado:
+                    resultado.update({
+                        'url': paso['url'], 'tipo_prueba': 'recorrido_paso', 'recorrido': nombre,
+                        'paso': paso['nombre'],
+                        'fallos_extraccion': self.fallos_extraccion.get((nombre, paso['nombre']), 0),
+                    })
+                    filas.append(resultado)
+        for fila in filas:
+            fila.update({'motor': 'escenarios', 'modo_carga': 'cerrado', 'usuarios': usuarios,
+                         'factor_pensar': self.factor_pensar})
+        return filas
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Estado Estable
+Los primeros requests de una prueba pagan la compilación de templates, el
+establecimiento de conexiones y las caches frías de SQLite. Esta fase de
+calentamiento se detecta (o se fija) a partir de las muestras por request y se
+excluye de las estadísticas principales; las muestras se conservan completas.
+
+Detección automática: la serie de latencias (en orden de envío) se divide en
+ventanas de VENTANA requests. El estado estable empieza en la primera ventana
+tal que las medias de VENTANAS_ESTABLES ventanas consecutivas varían poco
+entre sí (coeficiente de variación <= UMBRAL_CV) y no se alejan de la media
+del resto de la prueba en más de UMBRAL_CV.
+"""
+
+import statistics
+
+from carga_async import AcumuladorCarga
+from histograma_latencias import HistogramaLatencias
+
+VENTANA = 20
+VENTANAS_ESTABLES = 3
+UMBRAL_CV = 0.15
+# Más allá de esta fracción de la prueba no se considera calentamiento
+FRACCION_MAXIMA = 0.5
+AUTO = 'auto'
+
+
+def parsear_calentamiento(texto):
+    """Tipo para argparse: 'auto' o número de requests iniciales a excluir (0 = ninguno)"""
+    if texto == AUTO:
+        return AUTO
+    try:
+        requests_excluidos = int(texto)
+    except ValueError:
+        requests_excluidos = -1
+    if requests_excluidos < 0:
+        raise ValueError(f"Calentamiento no válido: {texto!r} (use 'auto' o un número de requests >= 0)")
+    return requests_excluidos
+
+
+def detectar_estado_estable(latencias, ventana=VENTANA, ventanas=VENTANAS_ESTABLES, umbral=UMBRAL_CV):
+    """Índice del primer request en estado estable, o None si no se alcanza"""
+    medias = [statistics.fmean(latencias[i:i + ventana])
+              for i in range(0, len(latencias) - ventana + 1, ventana)]
+    for i in range(len(medias) - ventanas + 1):
+        grupo = medias[i:i + ventanas]
+        media_grupo = statistics.fmean(grupo)
+        media_resto = statistics.fmean(medias[i:])
+        if (statistics.pstdev(grupo) <= umbral * media_grupo
+                and abs(media_grupo - media_resto) <= umbral * media_resto):
+            return i * ventana
+    return None
+
+
+def aplicar_calentamiento(resultado, calentamiento=AUTO):
+    """Recalcula latencias y throughput de un resumen de AcumuladorCarga sin el calentamiento
+
+    Usa las muestras por request del resultado. Los promedios del desglose
+    (servidor, SQL, templates) siguen cubriendo la prueba completa.
+    """
+    muestras = resultado.get('muestras') if resultado else None
+    if not muestras or not len(muestras) or not calentamiento:
+        return resultado
+    enviados = muestras.columnas['enviado_ns']
+    latencias = muestras.columnas['latencia_ns']
+    status = muestras.columnas['status']
+    orden = sorted(range(len(muestras)), key=enviados.__getitem__)
+    exitosas = [i for i in orden if status[i] == 200]
+    if not exitosas:
+        return resultado
+
+    if calentamiento == AUTO:
+        indice = detectar_estado_estable([latencias[i] / 1e6 for i in exitosas])
+        estable = indice is not None and indice <= FRACCION_MAXIMA * len(exitosas)
+        corte_ns = enviados[exitosas[indice]] if estable else enviados[orden[0]]
+    else:
+        # Un calentamiento que cubre toda la prueba no deja nada que medir: se conserva todo
+        estable = calentamiento < len(orden)
+        corte_ns = enviados[orden[calentamiento]] if estable else enviados[orden[0]]
+
+    incluidas = [i for i in orden if enviados[i] >= corte_ns]
+    resultado.update({
+        'calentamiento': calentamiento,
+        'estado_estable': estable,
+        'calentamiento_requests': len(orden) - len(incluidas),
+        'calentamiento_s': (corte_ns - enviados[orden[0]]) / 1e9,
+        'estable_desde_ns': corte_ns,
+        'tiempo_promedio_total': resultado['tiempo_promedio'],
+        'percentil_99_total': resultado['percentil_99'],
+    })
+    if len(incluidas) == len(orden):
+        return resultado
+
+    histograma = HistogramaLatencias()
+    for i in incluidas:
+        if status[i] == 200:
+            histograma.registrar_ms(latencias[i] / 1e6)
+    if not histograma.total:
+        return resultado
+    fin_ns = max(enviados[i] + latencias[i] for i in incluidas)
+    espectro = AcumuladorCarga.espectro(histograma)
+    resultado.update({
+        **espectro,
+        'tiempo_promedio': histograma.promedio(),
+        'tiempo_mediana': espectro['percentil_50'],
+        'tiempo_min': histograma.minimo(),
+        'tiempo_max': histograma.maximo(),
+        'requests_exitosos': histograma.total,
+        'errores': len(incluidas) - histograma.total,
+        'throughput': histograma.total / ((fin_ns - corte_ns) / 1e9),
+        'histograma': histograma.a_texto(),
+    })
+    return resultado
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Generador de Flamegraphs
+Combina las muestras collapsed-stack del perfilador por muestreo
+(resultados/muestreo/<ejecucion>-<pid>.folded) y las dibuja como SVG
+sin dependencias externas.
+"""
+
+import os
+import glob
+import zlib
+import argparse
+from collections import Counter
+from html import escape
+
+DIRECTORIO_MUESTREO = "resultados/muestreo"
+
+ANCHO = 1200
+ALTO_FRAME = 16
+MARGEN = 10
+ALTO_TITULO = 40
+ANCHO_CARACTER = 6.5
+ANCHO_MINIMO = 0.1
+
+
+class NodoPila:
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.muestras = 0
+        self.hijos = {}
+
+    def hijo(self, nombre):
+        if nombre not in self.hijos:
+            self.hijos[nombre] = NodoPila(nombre)
+        return self.hijos[nombre]
+
+
+def cargar_muestras(ejecucion, directorio=DIRECTORIO_MUESTREO):
+    """Suma las muestras de todos los procesos de una ejecución"""
+    muestras = Counter()
+    for ruta in sorted(glob.glob(os.path.join(directorio, f"{ejecucion}-*.folded"))):
+        with open(ruta) as archivo:
+            for linea in archivo:
+                pila, _, cuenta = linea.rstrip('\n').rpartition(' ')
+                if pila and cuenta.isdigit():
+                    muestras[pila] += int(cuenta)
+    return muestras
+
+
+def listar_ejecuciones(directorio=DIRECTORIO_MUESTREO):
+    ejecuciones = set()
+    for ruta in glob.glob(os.path.join(directorio, "*.folded")):
+        nombre = os.path.basename(ruta)[:-len(".folded")]
+        ejecuciones.add(nombre.rpartition('-')[0])
+    return sorted(ejecuciones)
+
+
+def construir_arbol(muestras):
+    raiz = NodoPila('all')
+    for pila, cuenta in muestras.items():
+        raiz.muestras += cuenta
+        nodo = raiz
+        for frame in pila.split(';'):
+            nodo = nodo.hijo(frame)
+            nodo.muestras += cuenta
+    return raiz
+
+
+def color_frame(nombre):
+    """Paleta cálida estable por nombre de función"""
+    h = zlib.crc32(nombre.encode())
+    return f"rgb({205 + h % 50},{(h >> 8) % 180 + 50},{(h >> 16) % 55})"
+
+
+def renderizar_svg(muestras, titulo):
+    raiz = construir_arbol(muestras)
+    profundidad = max((pila.count(';') + 2 for pila in muestras), default=1)
+    alto = ALTO_TITULO + profundidad * ALTO_FRAME + MARGEN
+    escala = (ANCHO - 2 * MARGEN) / max(raiz.muestras, 1)
+
+    rects = []
+
+    def dibujar(nodo, x, nivel):
+        ancho = nodo.muestras * escala
+        if ancho < ANCHO_MINIMO:
+            return
+        y = alto - MARGEN - (nivel + 1) * ALTO_FRAME
+        porcentaje = 100 * nodo.muestras / max(raiz.muestras, 1)
+        texto = nodo.nombre
+        max_caracteres = int((ancho - 6) / ANCHO_CARACTER)
+        if len(texto) > max_caracteres:
+            texto = texto[:max_caracteres - 2] + '..' if max_caracteres > 3 else ''
+        rects.append(
+            f'<g><title>{escape(nodo.nombre)} ({nodo.muestras} muestras, {porcentaje:.2f}%)</title>'
+            f'<rect x="{x:.2f}" y="{y}" width="{ancho:.2f}" height="{ALTO_FRAME - 1}" '
+            f'fill="{color_frame(nodo.nombre)}" rx="2" ry="2"/>'
+            f'<text x="{x + 3:.2f}" y="{y + ALTO_FRAME - 4}">{escape(texto)}</text></g>'
+        )
+        for hijo in sorted(nodo.hijos.values(), key=lambda n: n.nombre):
+            dibujar(hijo, x, nivel + 1)
+            x += hijo.muestras * escala
+
+    dibujar(raiz, MARGEN, 0)
+
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{ANCHO}" height="{alto}" '
+        f'viewBox="0 0 {ANCHO} {alto}" font-family="monospace" font-size="11">\n'
+        f'<rect width="100%" height="100%" fill="#f8f8f8"/>\n'
+        f'<text x="{ANCHO / 2}" y="24" font-size="16" text-anchor="middle">'
+        f'{escape(titulo)} ({raiz.muestras} muestras)</text>\n'
+        + '\n'.join(rects)
+        + '\n</svg>\n'
+    )
+
+
+def generar_flamegraph(ejecucion, directorio=DIRECTORIO_MUESTREO, salida=None):
+    """Genera resultados/flamegraph_<ejecucion>.svg; devuelve la ruta o None sin muestras"""
+    muestras = cargar_muestras(ejecucion, directorio)
+    if not muestras:
+        print(f"⚠ Sin muestras para la ejecución '{ejecucion}'")
+        return None
+
+    salida = salida or os.path.join("resultados", f"flamegraph_{ejecucion}.svg")
+    os.makedirs(os.path.dirname(salida) or '.', exist_ok=True)
+    with open(salida, 'w') as archivo:
+        archivo.write(renderizar_svg(muestras, f"Flamegraph {ejecucion}"))
+
+    print(f"✓ Flamegraph generado: {salida} ({sum(muestras.values())} muestras)")
+    return salida
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera flamegraphs SVG a partir de las muestras del servidor")
+    parser.add_argument('ejecuciones', nargs='*',
+                        help="Ejecuciones a renderizar (por defecto, todas las de resultados/muestreo)")
+    parser.add_argument('--directorio', default=DIRECTORIO_MUESTREO)
+    args = parser.parse_args()
+
+    for ejecucion in args.ejecuciones or listar_ejecuciones(args.directorio):
+        generar_flamegraph(ejecucion, args.directorio)
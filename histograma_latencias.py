@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Histogramas de Latencia (estilo HDR)
+Registra latencias en microsegundos en cubetas logarítmicas de memoria fija
+con precisión relativa constante (3 dígitos significativos por defecto), en
+lugar de guardar y ordenar todas las muestras.
+
+- Memoria fija: ~24k contadores para 1 µs..1 h, independiente del número de requests.
+- Combinables: sumar contadores une histogramas de hilos, procesos o corridas.
+- Serialización compacta (zlib + base64) para JSON/JSONL.
+
+El cálculo de índices sigue el esquema de HdrHistogram: cada cubeta cubre
+una potencia de dos y se divide en sub-cubetas lineales.
+"""
+
+import math
+import zlib
+import base64
+import struct
+from array import array
+
+MAXIMO_US = 3_600_000_000
+DIGITOS_SIGNIFICATIVOS = 3
+
+# Percentiles que se informan en cada resumen
+ESPECTRO = (50, 90, 95, 99, 99.9, 99.99)
+
+FORMATO_CABECERA = '<BQQQQQ'
+
+
+class HistogramaLatencias:
+    def __init__(self, maximo_us=MAXIMO_US, digitos=DIGITOS_SIGNIFICATIVOS):
+        self.maximo_us = maximo_us
+        self.digitos = digitos
+
+        unidades = 2 * 10 ** digitos
+        magnitud_sub_cubetas = math.ceil(math.log2(unidades))
+        self.magnitud_media = magnitud_sub_cubetas - 1
+        self.sub_cubetas = 1 << magnitud_sub_cubetas
+        self.media_sub_cubetas = self.sub_cubetas // 2
+        self.mascara = self.sub_cubetas - 1
+
+        cubetas = 1
+        limite = self.sub_cubetas
+        while limite <= maximo_us:
+            limite <<= 1
+            cubetas += 1
+        self.contadores = array('Q', bytes(8 * (cubetas + 1) * self.media_sub_cubetas))
+
+        self.total = 0
+        self.suma_us = 0
+        self.minimo_us = None
+        self.maximo_registrado_us = 0
+
+    # Índices (valor en µs <-> posición del contador)
+
+    def indice(self, valor):
+        cubeta = (valor | self.mascara).bit_length() - self.magnitud_media - 1
+        sub_cubeta = valor >> cubeta
+        return ((cubeta + 1) << self.magnitud_media) + sub_cubeta - self.media_sub_cubetas
+
+    def valor_en(self, indice):
+        cubeta = (indice >> self.magnitud_media) - 1
+        sub_cubeta = (indice & (self.media_sub_cubetas - 1)) + self.media_sub_cubetas
+        if cubeta < 0:
+            sub_cubeta -= self.media_sub_cubetas
+            cubeta = 0
+        return sub_cubeta << cubeta
+
+    def mayor_equivalente(self, indice):
+        """Mayor valor que cae en el mismo contador (el que informa HdrHistogram)"""
+        cubeta = max((indice >> self.magnitud_media) - 1, 0)
+        return self.valor_en(indice) + (1 << cubeta) - 1
+
+    # Registro
+
+    def registrar_us(self, valor, veces=1):
+        valor = min(max(int(valor), 0), self.maximo_us)
+        self.contadores[self.indice(valor)] += veces
+        self.total += veces
+        self.suma_us += valor * veces
+        if self.minimo_us is None or valor < self.minimo_us:
+            self.minimo_us = valor
+        if valor > self.maximo_registrado_us:
+            self.maximo_registrado_us = valor
+
+    def registrar_ms(self, valor_ms):
+        self.registrar_us(round(valor_ms * 1000))
+
+    def combinar(self, otro):
+        """Suma los contadores de otro histograma con la misma configuración"""
+        if (otro.maximo_us, otro.digitos) != (self.maximo_us, self.digitos):
+            raise ValueError("Solo se combinan histogramas con el mismo rango y precisión")
+        for i, cuenta in enumerate(otro.contadores):
+            if cuenta:
+                self.contadores[i] += cuenta
+        self.total += otro.total
+        self.suma_us += otro.suma_us
+        if otro.minimo_us is not None and (self.minimo_us is None or otro.minimo_us < self.minimo_us):
+            self.minimo_us = otro.minimo_us
+        self.maximo_registrado_us = max(self.maximo_registrado_us, otro.maximo_registrado_us)
+        return self
+
+    # Consultas (en ms, como el resto de los laboratorios)
+
+    def percentil(self, percentil):
+        if not self.total:
+            return None
+        objetivo = max(1, math.ceil(self.total * percentil / 100))
+        acumulado = 0
+        for i, cuenta in enumerate(self.contadores):
+            acumulado += cuenta
+            if acumulado >= objetivo:
+                return min(self.mayor_equivalente(i), self.maximo_registrado_us) / 1000
+        return self.maximo_registrado_us / 1000
+
+    def promedio(self):
+        return self.suma_us / self.total / 1000 if self.total else None
+
+    def minimo(self):
+        return self.minimo_us / 1000 if self.minimo_us is not None else None
+
+    def maximo(self):
+        return self.maximo_registrado_us / 1000
+
+    def espectro(self):
+        """{'p50': ms, 'p90': ..., 'p99.99': ..., 'max': ...}"""
+        resumen = {f"p{percentil:g}": self.percentil(percentil) for percentil in ESPECTRO}
+        resumen['max'] = self.maximo() if self.total else None
+        return resumen
+
+    # Serialización
+
+    def a_texto(self):
+        cabecera = struct.pack(FORMATO_CABECERA, self.digitos, self.maximo_us, self.total,
+                               self.suma_us, self.minimo_us or 0, self.maximo_registrado_us)
+        return base64.b64encode(zlib.compress(cabecera + self.contadores.tobytes(), 9)).decode('ascii')
+
+    @classmethod
+    def desde_texto(cls, texto):
+        datos = zlib.decompress(base64.b64decode(texto))
+        tamano = struct.calcsize(FORMATO_CABECERA)
+        digitos, maximo_us, total, suma_us, minimo_us, maximo_registrado_us = struct.unpack(
+            FORMATO_CABECERA, datos[:tamano])
+        histograma = cls(maximo_us, digitos)
+        histograma.contadores = array('Q', datos[tamano:])
+        histograma.total = total
+        histograma.suma_us = suma_us
+        histograma.minimo_us = minimo_us if total else None
+        histograma.maximo_registrado_us = maximo_registrado_us
+        return histograma
+
+
+def combinar_histogramas(histogramas):
+    """Une una secuencia de histogramas (o sus textos serializados) en uno nuevo"""
+    resultado = None
+    for histograma in histogramas:
+        if isinstance(histograma, str):
+            histograma = HistogramaLatencias.desde_texto(histograma)
+        if resultado is None:
+            resultado = HistogramaLatencias(histograma.maximo_us, histograma.digitos)
+        resultado.combinar(histograma)
+    return resultado
@@ -11,37 +11,307 @@ import statistics
 import csv
 import json
 import threading
-import psutil
 import os
+import re
+import sys
+import uuid
+import random
+import platform
+import sqlite3
+import argparse
 from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from collections import Counter
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import matplotlib.pyplot as plt
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patron_mvc'))
+
+from patron_mvc.distribuciones import UNIFORME, crear_distribucion, validar_distribucion
+from carga_async import AcumuladorCarga, MotorCargaAsync, parsear_programa, parsear_server_timing
+from carga_distribuida import CoordinadorCarga
+from perfiles_carga import analizar_soak, detectar_saturacion, parsear_perfil
+from recursos_servidor import MuestreadorRecursos
+from estado_estable import aplicar_calentamiento, parsear_calentamiento
+from escenarios_carga import RECORRIDOS, MotorEscenarios, validar_recorridos
+
+# Usuarios creados por patron_mvc/poblar_db.py
+CREDENCIALES_LAB = [
+    ('admin', 'admin123'),
+    ('gerente', 'gerente123'),
+    ('patricia_silva', 'recep123'),
+    ('carmen_ruiz', 'recep123'),
+    ('carlos_rodriguez', 'mecanico123'),
+    ('maria_gonzalez', 'mecanico123'),
+    ('jose_martinez', 'mecanico123'),
+    ('ana_lopez', 'mecanico123'),
+    ('luis_fernandez', 'mecanico123'),
+]
+
+MAX_REDIRECCIONES = 5
+
+# Base que sirve el servidor medido (se lee solo para conocer los pks existentes)
+DB_LAB = os.environ.get('DJANGO_DB_NAME') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'patron_mvc', 'db.sqlite3')
+
+# Páginas de detalle y la tabla de la que salen sus pks
+PAGINAS_DETALLE = {
+    '/clientes/{pk}/': 'clientes_cliente',
+    '/vehiculos/{pk}/': 'vehiculos_vehiculo',
+    '/ordenes/{pk}/': 'ordenes_ordentrabajo',
+}
+
+# Escenarios de ejecutar_suite_completa (rutas sobre base_url), compartidos con benchmark_wsgi.py
+RUTAS_PRUEBA = ['/', '/clientes/', '/vehiculos/', '/ordenes/', '/accounts/']
+# (requests, concurrencia) de cada prueba; el estrés es sobre RUTAS_PRUEBA[0]
+CARGA_CONCURRENTE = (100, 10)
+ESTRES = (500, 50)
+CLAVES_CALIENTES = (200, 10)
+SEMILLA_CLAVES = 42
+
+# Accept-Encoding de cada modo de la prueba de compresión; requests añade zstd/br
+# a su valor por defecto cuando las dependencias opcionales están instaladas
+MODOS_COMPRESION = {
+    'sin_compresion': 'identity',
+    'con_compresion': requests.utils.DEFAULT_ACCEPT_ENCODING,
+}
+
+
+# Conexiones paralelas por host que abre un navegador al cargar los recursos de una página
+CONEXIONES_NAVEGADOR = 6
+
+RE_URL_CSS = re.compile(r"""url\(\s*['"]?([^'")]+?)['"]?\s*\)""")
+
+
+def secuencia_claves(patron, pks, distribucion, num_requests=CLAVES_CALIENTES[0], semilla=SEMILLA_CLAVES):
+    """Rutas de detalle con el pk de cada request elegido según `distribucion`, y su descripción
+
+    Secuencia fija: la misma semilla reproduce exactamente la carga.
+    """
+    elegir = crear_distribucion(distribucion, len(pks), semilla)
+    rng = random.Random(semilla)
+    return [patron.format(pk=pks[elegir.muestra(rng)]) for _ in range(num_requests)], elegir.descripcion
+
+
+def estadisticas_claves(rutas, num_pks):
+    """Claves distintas visitadas y proporción de requests que se llevó el 1% más visitado"""
+    visitas = Counter(rutas)
+    top = max(1, num_pks // 100)
+    return {
+        'claves_distintas': len(visitas),
+        'proporcion_top1': sum(n for _, n in visitas.most_common(top)) / len(rutas),
+    }
+
+
+class ExtractorRecursos(HTMLParser):
+    """Recursos que un navegador descarga al cargar la página: hojas de estilo, scripts e imágenes"""
+    
+    def __init__(self):
+        super().__init__()
+        self.recursos = []
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'link' and 'stylesheet' in (attrs.get('rel') or '') and attrs.get('href'):
+            self.recursos.append(attrs['href'])
+        elif tag in ('script', 'img') and attrs.get('src'):
+            self.recursos.append(attrs['src'])
+
+
+def recursos_css(url_css, contenido):
+    """URLs referenciadas por url(...) en una hoja de estilo (fuentes, imágenes)"""
+    return [
+        urljoin(url_css, ref) for ref in RE_URL_CSS.findall(contenido)
+        if not ref.startswith('data:')
+    ]
+
+
+class UsuarioVirtual:
+    """Sesión HTTP autenticada que se reutiliza entre requests"""
+    
+    def __init__(self, base_url, username, password):
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.session = requests.Session()
+        self.autenticado = False
+    
+    def login(self):
+        """Inicia sesión una sola vez obteniendo el token CSRF del formulario"""
+        login_url = f"{self.base_url}/accounts/login/"
+        self.session.get(login_url, timeout=30)
+        csrftoken = self.session.cookies.get('csrftoken', '')
+        
+        response = self.session.post(login_url, data={
+            'csrfmiddlewaretoken': csrftoken,
+            'username': self.username,
+            'password': self.password,
+        }, headers={'Referer': login_url}, timeout=30, allow_redirects=False)
+        
+        self.autenticado = response.status_code == 302 and 'sessionid' in self.session.cookies
+        return self.autenticado
+    
+    def csrftoken(self):
+        return self.session.cookies.get('csrftoken', '')
+
+
 class RendimientoAnalyzer:
     def __init__(self):
         self.base_url = "http://localhost:8002"
         self.resultados = []
         self.resultados_csv = "resultados/rendimiento_resultados.csv"
+        # Histogramas HDR serializados; se acumulan entre corridas para re-combinarlos
+        self.histogramas_jsonl = "resultados/histogramas_latencia.jsonl"
+        # Muestras por request (.npy por columna) en <directorio>/<corrida>/<prueba>/
+        self.muestras_dir = "resultados/muestras_carga"
+        self.usuarios_virtuales = []
+        # Configuración del servidor medido (la fija ejecutar_laboratorios.py)
+        self.servidor = {
+            'servidor': os.environ.get('LAB_SERVIDOR', 'runserver'),
+            'workers': int(os.environ.get('LAB_WORKERS', 1)),
+            'threads': int(os.environ.get('LAB_THREADS', 0)),
+            'snapshot': os.environ.get('LAB_SNAPSHOT', ''),
+        }
+        # Qué pks visitan las páginas de detalle en la prueba de claves calientes
+        self.distribucion_claves = validar_distribucion(os.environ.get('LAB_DISTRIBUCION', 'zipf:1.1'))
+        # Motor de prueba_carga_concurrente: 'asyncio' (carga_async.py), 'threads' o
+        # 'distribuido' (carga_distribuida.py: procesos locales y/o workers remotos)
+        self.motor = os.environ.get('LAB_MOTOR', 'asyncio')
+        self.max_conexiones = int(os.environ.get('LAB_MAX_CONEXIONES', 256))
+        self.procesos_carga = int(os.environ.get('LAB_PROCESOS_CARGA', os.cpu_count()))
+        self.workers_remotos = int(os.environ.get('LAB_WORKERS_REMOTOS', 0))
+        # Carga abierta: tramos (segundos, requests/s) y proceso de llegadas
+        self.tramos_abiertos = parsear_programa(os.environ.get('LAB_PROGRAMA', '10:20'))
+        self.llegadas = os.environ.get('LAB_LLEGADAS', 'constante')
+        # Perfiles de concurrencia por endpoint (perfiles_carga.py), separados por ';'
+        self.perfiles = [parsear_perfil(perfil) for perfil in
+                         os.environ.get('LAB_PERFILES', 'escalones:1,2,4,8,16,32:5').split(';')]
+        self.capacidad_csv = "resultados/capacidad_endpoints.csv"
+        # Mezcla ponderada de recorridos de usuario (escenarios_carga.py), separados por ','
+        self.recorridos = validar_recorridos(os.environ.get('LAB_RECORRIDOS', ','.join(RECORRIDOS)))
+        self.usuarios_recorridos = int(os.environ.get('LAB_USUARIOS_RECORRIDOS', 10))
+        self.duracion_recorridos = float(os.environ.get('LAB_DURACION_RECORRIDOS', 30))
+        self.factor_pensar = float(os.environ.get('LAB_FACTOR_PENSAR', 1.0))
+        # Requests iniciales excluidos de las estadísticas de prueba_carga_concurrente:
+        # 'auto' (detección de estado estable, estado_estable.py), un número fijo o 0
+        self.calentamiento = parsear_calentamiento(os.environ.get('LAB_CALENTAMIENTO', 'auto'))
+        # Muestreo en segundo plano de los procesos del servidor (recursos_servidor.py)
+        self.servidor_pid = int(os.environ.get('LAB_SERVIDOR_PID', 0)) or None
+        self.intervalo_recursos = float(os.environ.get('LAB_INTERVALO_RECURSOS', 0.1))
+        self.muestreador = None
+        self._asignacion_lock = threading.Lock()
+        self._siguiente_usuario = 0
+        self._local = threading.local()
+    
+    def iniciar_usuarios_virtuales(self, num_usuarios=10, credenciales=None):
+        """Autentica un pool de usuarios virtuales antes de las pruebas"""
+        credenciales = credenciales or CREDENCIALES_LAB
+        self.usuarios_virtuales = []
         
-    def medir_tiempo_respuesta(self, url, metodo="GET", data=None):
-        """Mide tiempo de respuesta para una URL específica"""
-        start_time = time.time()
+        for i in range(num_usuarios):
+            username, password = credenciales[i % len(credenciales)]
+            usuario = UsuarioVirtual(self.base_url, username, password)
+            try:
+                if usuario.login():
+                    self.usuarios_virtuales.append(usuario)
+                else:
+                    print(f"   ⚠ Login fallido para {username}")
+            except requests.RequestException as e:
+                print(f"   ⚠ Error autenticando {username}: {e}")
+        
+        print(f"✓ Usuarios virtuales autenticados: {len(self.usuarios_virtuales)}/{num_usuarios}")
+        return len(self.usuarios_virtuales) > 0
+    
+    def crear_motor(self):
+        """Motor asyncio de un proceso, o el coordinador si el motor es 'distribuido'"""
+        if self.motor == 'distribuido':
+            return CoordinadorCarga(self.base_url, self.cookies_usuarios(), self.max_conexiones,
+                                    self.procesos_carga, self.workers_remotos)
+        return MotorCargaAsync(self.base_url, self.cookies_usuarios(), self.max_conexiones)
+    
+    def cookies_usuarios(self):
+        """Cabecera Cookie de cada usuario autenticado, para el motor asyncio"""
+        return [
+            '; '.join(f"{nombre}={valor}" for nombre, valor in usuario.session.cookies.items())
+            for usuario in self.usuarios_virtuales
+        ] or None
+    
+    def obtener_sesion(self):
+        """Devuelve la sesión asignada al hilo actual (round-robin sobre el pool)"""
+        if not self.usuarios_virtuales:
+            return requests
+        
+        usuario = getattr(self._local, 'usuario', None)
+        if usuario is None:
+            with self._asignacion_lock:
+                usuario = self.usuarios_virtuales[self._siguiente_usuario % len(self.usuarios_virtuales)]
+                self._siguiente_usuario += 1
+            self._local.usuario = usuario
+        return usuario.session
+        
+    def medir_tiempo_respuesta(self, url, metodo="GET", data=None, sesion=None, cabeceras=None):
+        """Mide tiempo de respuesta para una URL específica.
+        
+        Las redirecciones se siguen manualmente para separar el tiempo de los
+        saltos (tiempo_redirect_ms) del de la respuesta final (tiempo_final_ms).
+        """
+        cliente = sesion or self.obtener_sesion()
+        start_time = time.perf_counter()
+        enviado_ns = time.time_ns()
         try:
-            if metodo == "GET":
-                response = requests.get(url, timeout=30)
-            elif metodo == "POST":
-                response = requests.post(url, data=data, timeout=30)
+            tiempo_redirect = 0.0
+            redirecciones = 0
+            url_actual = url
+            metodo_actual, data_actual = metodo, data
             
-            end_time = time.time()
-            tiempo_respuesta = (end_time - start_time) * 1000  # ms
+            # El servidor registra este id en su traza JSONL (InstrumentacionMiddleware)
+            request_id = uuid.uuid4().hex
+            cabeceras = {**(cabeceras or {}), 'X-Request-ID': request_id}
+            
+            while True:
+                inicio_salto = time.perf_counter()
+                if metodo_actual == "GET":
+                    response = cliente.get(url_actual, timeout=30, allow_redirects=False, headers=cabeceras)
+                elif metodo_actual == "POST":
+                    response = cliente.post(url_actual, data=data_actual, timeout=30, allow_redirects=False, headers=cabeceras)
+                tiempo_salto = (time.perf_counter() - inicio_salto) * 1000
+                
+                if not response.is_redirect or redirecciones >= MAX_REDIRECCIONES:
+                    break
+                
+                tiempo_redirect += tiempo_salto
+                redirecciones += 1
+                url_actual = urljoin(url_actual, response.headers['Location'])
+                metodo_actual, data_actual = "GET", None
+            
+            tiempo_respuesta = (time.perf_counter() - start_time) * 1000  # ms
+            
+            # Desglose del lado servidor de la respuesta final (cabecera Server-Timing)
+            server_timing = parsear_server_timing(response.headers.get('Server-Timing'))
+            servidor_ms = server_timing.get('total')
             
             return {
                 'url': url,
+                'request_id': request_id,
+                'url_final': url_actual,
                 'metodo': metodo,
                 'tiempo_ms': tiempo_respuesta,
+                'tiempo_final_ms': tiempo_salto,
+                'tiempo_redirect_ms': tiempo_redirect,
+                'redirecciones': redirecciones,
+                'servidor_ms': servidor_ms,
+                'sql_ms': server_timing.get('sql'),
+                'template_ms': server_timing.get('tpl'),
+                'transporte_ms': tiempo_salto - servidor_ms if servidor_ms is not None else None,
+                # Bytes leídos del socket (comprimidos) frente a bytes del contenido decodificado
+                'bytes_transferidos': response.raw.tell(),
+                'bytes_contenido': len(response.content),
+                'codificacion': response.headers.get('Content-Encoding', 'identity'),
                 'status_code': response.status_code,
                 'success': response.status_code == 200,
+                'enviado_ns': enviado_ns,
                 'timestamp': datetime.now().isoformat()
             }
         except Exception as e:
@@ -52,53 +322,342 @@ class RendimientoAnalyzer:
                 'status_code': 0,
                 'success': False,
                 'error': str(e),
+                'enviado_ns': enviado_ns,
                 'timestamp': datetime.now().isoformat()
             }
     
     def prueba_carga_concurrente(self, url, num_requests=50, num_threads=10):
-        """Ejecuta prueba de carga concurrente"""
-        print(f"Iniciando prueba de carga: {num_requests} requests, {num_threads} threads")
+        """Ejecuta prueba de carga concurrente (`url` puede ser una función que devuelve la URL)
+        
+        Con el motor 'asyncio' num_threads es el número de usuarios virtuales
+        (corrutinas) y las conexiones keep-alive se comparten en un pool; con
+        'distribuido' usuarios y requests se reparten entre los procesos worker.
+        Las estadísticas excluyen el calentamiento (ver estado_estable.py).
+        """
+        print(f"Iniciando prueba de carga ({self.motor}): {num_requests} requests, {num_threads} "
+              f"{'threads' if self.motor == 'threads' else 'usuarios'}")
         
-        tiempos_respuesta = []
-        errores = 0
+        if self.motor != 'threads':
+            resultado = self.crear_motor().prueba_carga(url, num_requests, num_threads)
+            return aplicar_calentamiento(resultado, self.calentamiento)
+        
+        acumulador = AcumuladorCarga(num_requests)
+        hilos = {}
         
         def hacer_request():
-            resultado = self.medir_tiempo_respuesta(url)
-            if resultado['success']:
-                return resultado['tiempo_ms']
-            else:
-                return None
+            resultado = self.medir_tiempo_respuesta(url() if callable(url) else url)
+            with self._asignacion_lock:
+                resultado['worker'] = hilos.setdefault(threading.get_ident(), len(hilos))
+            return resultado
         
         start_time = time.time()
+        cpu_inicio = time.process_time()
         
         with ThreadPoolExecutor(max_workers=num_threads) as executor:
             futures = [executor.submit(hacer_request) for _ in range(num_requests)]
             
             for future in as_completed(futures):
-                resultado = future.result()
-                if resultado is not None:
-                    tiempos_respuesta.append(resultado)
-                else:
-                    errores += 1
+                acumulador.registrar(future.result())
         
         end_time = time.time()
         duracion_total = end_time - start_time
         
-        if tiempos_respuesta:
-            return {
-                'tiempo_promedio': statistics.mean(tiempos_respuesta),
-                'tiempo_mediana': statistics.median(tiempos_respuesta),
-                'tiempo_min': min(tiempos_respuesta),
-                'tiempo_max': max(tiempos_respuesta),
-                'percentil_95': self.calcular_percentil(tiempos_respuesta, 95),
-                'throughput': len(tiempos_respuesta) / duracion_total,
-                'total_requests': num_requests,
-                'requests_exitosos': len(tiempos_respuesta),
-                'errores': errores,
-                'duracion_total': duracion_total
-            }
+        resultado = acumulador.resumen(num_requests, duracion_total)
+        if resultado:
+            resultado.update({
+                'motor': 'threads',
+                'usuarios': num_threads,
+                'cpu_cliente': 100 * (time.process_time() - cpu_inicio) / duracion_total,
+            })
+        return aplicar_calentamiento(resultado, self.calentamiento)
+    
+    def imprimir_calentamiento(self, resultado):
+        if 'estado_estable' not in resultado:
+            return
+        if not resultado['estado_estable']:
+            print("   ⚠ Sin estado estable: las estadísticas incluyen todos los requests")
+        elif resultado['calentamiento_requests']:
+            print(f"   ✓ Estado estable desde el request {resultado['calentamiento_requests'] + 1} "
+                  f"({resultado['calentamiento_s']:.2f}s); promedio con calentamiento "
+                  f"{resultado['tiempo_promedio_total']:.2f}ms")
+    
+    def prueba_carga_abierta(self, url, tramos=None, llegadas=None):
+        """Requests a tasa programada, independientes de las respuestas (motor asyncio o distribuido)"""
+        tramos = tramos or self.tramos_abiertos
+        llegadas = llegadas or self.llegadas
+        descripcion = ', '.join(f"{tasa:g} req/s x {segundos:g}s" for segundos, tasa in tramos)
+        print(f"Iniciando carga abierta ({llegadas}): {descripcion}")
+        
+        resultado = self.crear_motor().prueba_tasa(url, tramos, llegadas)
+        if resultado:
+            resultado.update({
+                'url': url,
+                'tipo_prueba': 'tasa_programada' if len(tramos) > 1 else 'tasa_constante',
+                **self.servidor,
+            })
+        return resultado
+    
+    def prueba_perfil(self, url, perfil):
+        """Recorre los pasos de un perfil (una carga cerrada por duración cada uno)
+        
+        Devuelve las filas por paso y el análisis del perfil: capacidad y codo
+        de saturación para rampa/escalones, deriva entre ventanas para soak.
+        """
+        filas = []
+        for paso, (usuarios, segundos) in enumerate(perfil['pasos']):
+            cache_antes = self.obtener_estadisticas_cache()
+            inicio_ns = time.time_ns()
+            resultado = self.crear_motor().prueba_carga(url, None, usuarios, segundos)
+            if not resultado:
+                print(f"   ⚠ {url} paso {paso} ({usuarios} usuarios): sin respuestas exitosas")
+                continue
+            resultado.update({
+                'url': url,
+                'tipo_prueba': f"perfil_{perfil['tipo']}",
+                'perfil': perfil['perfil'],
+                'paso': paso,
+                **self.servidor,
+                **self.delta_cache(cache_antes, self.obtener_estadisticas_cache()),
+                **self.medir_recursos_sistema(inicio_ns),
+            })
+            filas.append(resultado)
+            print(f"     paso {paso}: {usuarios} usuarios x {segundos:g}s -> "
+                  f"{resultado['throughput']:.1f} req/s, P99 {resultado['percentil_99']:.2f}ms, "
+                  f"{resultado['errores']} errores")
+        
+        if perfil['tipo'] == 'soak':
+            analisis = analizar_soak(filas)
         else:
+            analisis = detectar_saturacion(filas)
+        return filas, analisis
+    
+    def prueba_recorridos(self):
+        """Mezcla de recorridos de usuario: filas por recorrido y por paso"""
+        recorridos = {nombre: RECORRIDOS[nombre] for nombre in self.recorridos}
+        cache_antes = self.obtener_estadisticas_cache()
+        inicio_ns = time.time_ns()
+        motor = MotorEscenarios(self.base_url, recorridos, self.factor_pensar)
+        filas = motor.ejecutar(self.usuarios_recorridos, self.duracion_recorridos)
+        delta_cache = self.delta_cache(cache_antes, self.obtener_estadisticas_cache())
+        recursos = self.medir_recursos_sistema(inicio_ns)
+        for fila in filas:
+            fila.update(self.servidor)
+            # Cache y recursos se miden para toda la mezcla: solo se anotan en las filas por recorrido
+            if fila['tipo_prueba'] == 'recorrido':
+                fila.update(delta_cache)
+                fila.update(recursos)
+        return filas
+    
+    def guardar_capacidades(self, capacidades):
+        """Capacidad (codo de saturación) de cada endpoint y perfil"""
+        os.makedirs("resultados", exist_ok=True)
+        with open(self.capacidad_csv, 'w', newline='') as archivo:
+            fieldnames = ['url', 'perfil', 'saturado', 'usuarios_saturacion', 'capacidad_rps',
+                          'percentil_99_saturacion', 'percentil_99_despues',
+                          'ventanas', 'deriva_throughput', 'deriva_percentil_99', 'errores',
+                          'servidor', 'workers', 'threads', 'snapshot', 'motor']
+            writer = csv.DictWriter(archivo, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            for capacidad in capacidades:
+                writer.writerow({**capacidad, **self.servidor, 'motor': self.motor})
+    
+    def cargar_pks(self, tabla):
+        """pks activos de una tabla, en orden, leídos directamente de la base del servidor"""
+        with sqlite3.connect(f"file:{DB_LAB}?mode=ro", uri=True) as conn:
+            return [fila[0] for fila in conn.execute(f"SELECT id FROM {tabla} WHERE is_active = 1 ORDER BY id")]
+    
+    def prueba_claves_calientes(self, patron, pks, distribucion, num_requests=CLAVES_CALIENTES[0],
+                                num_threads=CLAVES_CALIENTES[1], semilla=SEMILLA_CLAVES):
+        """Carga sobre una página de detalle eligiendo el pk de cada request según `distribucion`"""
+        rutas, descripcion = secuencia_claves(patron, pks, distribucion, num_requests, semilla)
+        siguiente_url = iter([f"{self.base_url}{ruta}" for ruta in rutas]).__next__
+        
+        cache_antes = self.obtener_estadisticas_cache()
+        resultado = self.prueba_carga_concurrente(siguiente_url, num_requests, num_threads)
+        if not resultado:
+            return None
+        
+        resultado.update({
+            'url': f"{self.base_url}{patron}",
+            'tipo_prueba': 'claves_calientes',
+            'distribucion': descripcion,
+            **estadisticas_claves(rutas, len(pks)),
+            **self.servidor,
+        })
+        resultado.update(self.delta_cache(cache_antes, self.obtener_estadisticas_cache()))
+        return resultado
+    
+    def prueba_compresion(self, url, num_requests=30):
+        """Bytes en la red y latencia de un endpoint con y sin compresión (requests secuenciales)"""
+        resultados = []
+        for modo, accept_encoding in MODOS_COMPRESION.items():
+            muestras = [
+                self.medir_tiempo_respuesta(url, cabeceras={'Accept-Encoding': accept_encoding})
+                for _ in range(num_requests)
+            ]
+            exitosas = [m for m in muestras if m['success']]
+            if not exitosas:
+                continue
+            
+            tiempos = [m['tiempo_ms'] for m in exitosas]
+            resultados.append({
+                'url': url,
+                'tipo_prueba': modo,
+                'codificacion': exitosas[-1]['codificacion'],
+                'bytes_transferidos': statistics.mean(m['bytes_transferidos'] for m in exitosas),
+                'bytes_contenido': statistics.mean(m['bytes_contenido'] for m in exitosas),
+                'tiempo_promedio': statistics.mean(tiempos),
+                'tiempo_mediana': statistics.median(tiempos),
+                'tiempo_min': min(tiempos),
+                'tiempo_max': max(tiempos),
+                'percentil_95': self.calcular_percentil(tiempos, 95),
+                'total_requests': num_requests,
+                'requests_exitosos': len(exitosas),
+                'errores': num_requests - len(exitosas),
+                **self.servidor,
+            })
+        return resultados
+    
+    def descargar_recurso(self, sesion, url, cache_navegador):
+        """Descarga un recurso respetando la cache del navegador simulado.
+        
+        Los recursos con Cache-Control immutable no se vuelven a pedir; el resto
+        se revalida con If-None-Match / If-Modified-Since (304 sin cuerpo).
+        """
+        entrada = cache_navegador.get(url)
+        if entrada and entrada['inmutable']:
+            return {'url': url, 'estado': 'cache', 'bytes': 0, 'contenido': entrada['contenido']}
+        
+        cabeceras = {}
+        if entrada and entrada.get('etag'):
+            cabeceras['If-None-Match'] = entrada['etag']
+        if entrada and entrada.get('last_modified'):
+            cabeceras['If-Modified-Since'] = entrada['last_modified']
+        
+        response = sesion.get(url, headers=cabeceras, timeout=30)
+        if response.status_code == 304 and entrada:
+            return {'url': url, 'estado': 'revalidado', 'bytes': response.raw.tell(), 'contenido': entrada['contenido']}
+        if response.status_code != 200:
+            return {'url': url, 'estado': 'error', 'bytes': response.raw.tell(), 'contenido': ''}
+        
+        es_css = 'text/css' in response.headers.get('Content-Type', '')
+        contenido = response.text if es_css else ''
+        cache_navegador[url] = {
+            'inmutable': 'immutable' in response.headers.get('Cache-Control', ''),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'contenido': contenido,
+        }
+        return {'url': url, 'estado': 'descargado', 'bytes': response.raw.tell(), 'contenido': contenido}
+    
+    def cargar_pagina_completa(self, url, cache_navegador):
+        """Carga una página como un navegador: HTML, luego CSS/JS en paralelo y las fuentes de los CSS"""
+        sesion = self.obtener_sesion()
+        inicio = time.perf_counter()
+        
+        response = sesion.get(url, timeout=30)
+        tiempo_html = (time.perf_counter() - inicio) * 1000
+        if response.status_code != 200:
             return None
+        
+        extractor = ExtractorRecursos()
+        extractor.feed(response.text)
+        recursos = list(dict.fromkeys(urljoin(response.url, r) for r in extractor.recursos))
+        # Solo se miden los recursos del servidor bajo prueba; los de un CDN (assets
+        # sin vendorizar) dependerían de la red externa
+        pendientes = [r for r in recursos if r.startswith(self.base_url)]
+        externos = len(recursos) - len(pendientes)
+        descargas = []
+        vistos = set(pendientes)
+        
+        with ThreadPoolExecutor(max_workers=CONEXIONES_NAVEGADOR) as executor:
+            while pendientes:
+                oleada = list(executor.map(
+                    lambda recurso: self.descargar_recurso(sesion, recurso, cache_navegador), pendientes
+                ))
+                descargas.extend(oleada)
+                pendientes = []
+                for descarga in oleada:
+                    for referencia in recursos_css(descarga['url'], descarga['contenido']):
+                        referencia = referencia.split('#')[0]
+                        if referencia not in vistos and referencia.startswith(self.base_url):
+                            vistos.add(referencia)
+                            pendientes.append(referencia)
+        
+        estados = [d['estado'] for d in descargas]
+        return {
+            'tiempo_ms': (time.perf_counter() - inicio) * 1000,
+            'tiempo_html_ms': tiempo_html,
+            'recursos': len(descargas),
+            'recursos_descargados': estados.count('descargado'),
+            'recursos_cache': estados.count('cache'),
+            'recursos_revalidados': estados.count('revalidado'),
+            'recursos_error': estados.count('error'),
+            'recursos_externos': externos,
+            'bytes_transferidos': response.raw.tell() + sum(d['bytes'] for d in descargas),
+        }
+    
+    def prueba_pagina_completa(self, url, num_visitas=20):
+        """Carga completa con cache del navegador vacía (primera visita) y caliente (visita repetida)"""
+        resultados = []
+        cache_caliente = {}
+        self.cargar_pagina_completa(url, cache_caliente)
+        
+        for modo in ('pagina_fria', 'pagina_caliente'):
+            cargas = []
+            for _ in range(num_visitas):
+                cache = {} if modo == 'pagina_fria' else dict(cache_caliente)
+                carga = self.cargar_pagina_completa(url, cache)
+                if carga:
+                    cargas.append(carga)
+            if not cargas:
+                continue
+            
+            tiempos = [c['tiempo_ms'] for c in cargas]
+            resultados.append({
+                'url': url,
+                'tipo_prueba': modo,
+                'tiempo_promedio': statistics.mean(tiempos),
+                'tiempo_mediana': statistics.median(tiempos),
+                'tiempo_min': min(tiempos),
+                'tiempo_max': max(tiempos),
+                'percentil_95': self.calcular_percentil(tiempos, 95),
+                'tiempo_html_promedio': statistics.mean(c['tiempo_html_ms'] for c in cargas),
+                'recursos': cargas[-1]['recursos'],
+                'recursos_cache': statistics.mean(c['recursos_cache'] for c in cargas),
+                'recursos_revalidados': statistics.mean(c['recursos_revalidados'] for c in cargas),
+                'recursos_error': statistics.mean(c['recursos_error'] for c in cargas),
+                'recursos_externos': cargas[-1]['recursos_externos'],
+                'bytes_transferidos': statistics.mean(c['bytes_transferidos'] for c in cargas),
+                'total_requests': num_visitas,
+                'requests_exitosos': len(cargas),
+                'errores': num_visitas - len(cargas),
+                **self.servidor,
+            })
+        return resultados
+    
+    def obtener_estadisticas_cache(self):
+        """Lee las estadísticas de la cache L1/L2 expuestas por el servidor"""
+        try:
+            response = requests.get(f"{self.base_url}/lab/cache/", timeout=5)
+            if response.status_code == 200:
+                return response.json()
+        except (requests.RequestException, ValueError):
+            pass
+        return None
+    
+    def delta_cache(self, antes, despues):
+        """Hits/misses de cache producidos entre dos lecturas de estadísticas"""
+        if not antes or not despues:
+            return {}
+        hits = (despues['l1']['hits'] - antes['l1']['hits']) + (despues['l2']['hits'] - antes['l2']['hits'])
+        misses = despues['l2']['misses'] - antes['l2']['misses']
+        return {
+            'cache_hits': hits,
+            'cache_misses': misses,
+            'cache_evictions': despues['l1']['evictions'] - antes['l1']['evictions'],
+            'cache_hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+        }
     
     def calcular_percentil(self, datos, percentil):
         """Calcula percentil específico"""
@@ -110,108 +669,303 @@ class RendimientoAnalyzer:
             return datos_ordenados[f]
         return datos_ordenados[f] * (1 - c) + datos_ordenados[f + 1] * c
     
-    def medir_recursos_sistema(self):
-        """Mide utilización de recursos del sistema"""
-        return {
-            'cpu_percent': psutil.cpu_percent(interval=1),
-            'memoria_percent': psutil.virtual_memory().percent,
-            'memoria_disponible': psutil.virtual_memory().available,
-            'disco_uso': psutil.disk_usage('/').percent
-        }
+    def iniciar_muestreo_recursos(self):
+        """Arranca el muestreador de los procesos del servidor para toda la suite"""
+        puerto = int(self.base_url.rsplit(':', 1)[1])
+        self.muestreador = MuestreadorRecursos(puerto, self.servidor_pid, self.intervalo_recursos)
+        if self.muestreador.iniciar():
+            print(f"✓ Muestreando {len(self.muestreador._procesos)} procesos del servidor "
+                  f"cada {self.intervalo_recursos * 1000:.0f}ms")
+        else:
+            print(f"⚠ No se encontró el proceso del servidor en el puerto {puerto}: sin métricas de recursos")
+    
+    def medir_recursos_sistema(self, desde_ns):
+        """Recursos del servidor durante una prueba (desde desde_ns hasta ahora)"""
+        if not self.muestreador:
+            return {}
+        return self.muestreador.resumen(desde_ns)
     
     def ejecutar_suite_completa(self):
         """Ejecuta la suite completa de pruebas"""
         print("=== LABORATORIO 1: ANÁLISIS DE RENDIMIENTO ===")
         print(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Servidor: {self.servidor['servidor']} ({self.servidor['workers']} workers)")
+        print(f"Generador de carga: {self.motor}")
         print()
         
         # URLs a probar
-        urls_prueba = [
-            f"{self.base_url}/",
-            f"{self.base_url}/clientes/",
-            f"{self.base_url}/vehiculos/",
-            f"{self.base_url}/ordenes/",
-            f"{self.base_url}/accounts/",
-        ]
+        urls_prueba = [f"{self.base_url}{ruta}" for ruta in RUTAS_PRUEBA]
         
         resultados_completos = []
+        self.iniciar_muestreo_recursos()
+        
+        # Las vistas protegidas con @login_required solo se miden de verdad
+        # con sesiones autenticadas; sin ellas se mide la redirección al login
+        print("0. Autenticando usuarios virtuales...")
+        if not self.iniciar_usuarios_virtuales(num_usuarios=10):
+            print("   ⚠ Sin usuarios autenticados: se medirán requests anónimos")
+        print()
         
         print("1. Midiendo rendimiento individual...")
         for url in urls_prueba:
             print(f"   Probando: {url}")
-            resultado = self.prueba_carga_concurrente(url, num_requests=100, num_threads=10)
+            cache_antes = self.obtener_estadisticas_cache()
+            inicio_ns = time.time_ns()
+            resultado = self.prueba_carga_concurrente(url, *CARGA_CONCURRENTE)
             
             if resultado:
                 resultado['url'] = url
                 resultado['tipo_prueba'] = 'carga_concurrente'
-                resultado['recursos'] = self.medir_recursos_sistema()
+                resultado.update(self.servidor)
+                resultado.update(self.delta_cache(cache_antes, self.obtener_estadisticas_cache()))
+                resultado.update(self.medir_recursos_sistema(inicio_ns))
                 resultados_completos.append(resultado)
                 
+                self.imprimir_calentamiento(resultado)
                 print(f"   ✓ Tiempo promedio: {resultado['tiempo_promedio']:.2f}ms")
                 print(f"   ✓ Throughput: {resultado['throughput']:.2f} req/s")
+                if resultado.get('recursos_muestras'):
+                    print(f"   ✓ Servidor: CPU {resultado['cpu_servidor_promedio']:.0f}% "
+                          f"(máx. {resultado['cpu_servidor_max']:.0f}%), RSS {resultado['rss_max_mb']:.0f}MB, "
+                          f"{resultado['hilos_max']} hilos, {resultado['descriptores_max']} descriptores")
                 print(f"   ✓ P95: {resultado['percentil_95']:.2f}ms")
+                print(f"   ✓ P50/P90/P99/P99.9/P99.99/max: {resultado['percentil_50']:.2f} / "
+                      f"{resultado['percentil_90']:.2f} / {resultado['percentil_99']:.2f} / "
+                      f"{resultado['percentil_999']:.2f} / {resultado['percentil_9999']:.2f} / "
+                      f"{resultado['tiempo_max']:.2f}ms")
+                if resultado['servidor_promedio'] is not None:
+                    print(f"   ✓ Servidor: {resultado['servidor_promedio']:.2f}ms "
+                          f"(SQL {resultado['sql_promedio']:.2f}ms, templates {resultado['template_promedio']:.2f}ms), "
+                          f"transporte {resultado['transporte_promedio']:.2f}ms")
+                if 'cache_hit_ratio' in resultado:
+                    print(f"   ✓ Cache hit ratio: {resultado['cache_hit_ratio']:.1%}")
+                if resultado['redirecciones']:
+                    print(f"   ✓ Redirecciones: {resultado['redirecciones']} ({resultado['tiempo_redirect_promedio']:.2f}ms promedio)")
                 print()
         
         print("2. Prueba de estrés...")
-        resultado_estres = self.prueba_carga_concurrente(
-            f"{self.base_url}/", 
-            num_requests=500, 
-            num_threads=50
-        )
+        inicio_ns = time.time_ns()
+        resultado_estres = self.prueba_carga_concurrente(urls_prueba[0], *ESTRES)
         
         if resultado_estres:
-            resultado_estres['url'] = f"{self.base_url}/"
+            resultado_estres['url'] = urls_prueba[0]
             resultado_estres['tipo_prueba'] = 'estres'
-            resultado_estres['recursos'] = self.medir_recursos_sistema()
+            resultado_estres.update(self.servidor)
+            resultado_estres.update(self.medir_recursos_sistema(inicio_ns))
             resultados_completos.append(resultado_estres)
             
+            self.imprimir_calentamiento(resultado_estres)
             print(f"   ✓ Tiempo promedio bajo estrés: {resultado_estres['tiempo_promedio']:.2f}ms")
             print(f"   ✓ Throughput bajo estrés: {resultado_estres['throughput']:.2f} req/s")
             print()
         
+        print("3. Compresión de respuestas...")
+        for url in urls_prueba[1:]:
+            filas = self.prueba_compresion(url)
+            resultados_completos.extend(filas)
+            if len(filas) == 2:
+                sin, con = filas
+                ahorro = 1 - con['bytes_transferidos'] / sin['bytes_transferidos'] if sin['bytes_transferidos'] else 0
+                print(f"   ✓ {url}: {sin['bytes_transferidos']:.0f} → {con['bytes_transferidos']:.0f} bytes "
+                      f"({con['codificacion']}, -{ahorro:.0%}), "
+                      f"{sin['tiempo_promedio']:.2f} → {con['tiempo_promedio']:.2f}ms")
+        print()
+        
+        print("4. Carga completa de página (HTML + CSS/JS/fuentes)...")
+        for url in urls_prueba[1:]:
+            for fila in self.prueba_pagina_completa(url):
+                resultados_completos.append(fila)
+                print(f"   ✓ {url} [{fila['tipo_prueba']}]: {fila['tiempo_promedio']:.2f}ms "
+                      f"(HTML {fila['tiempo_html_promedio']:.2f}ms), {fila['recursos']} recursos, "
+                      f"{fila['recursos_cache']:.0f} desde cache, {fila['recursos_revalidados']:.0f} revalidados, "
+                      f"{fila['bytes_transferidos'] / 1024:.1f} KB")
+                if fila['recursos_externos']:
+                    print(f"   ⚠ {fila['recursos_externos']} recursos servidos desde CDN, no medidos "
+                          f"(ejecute python vendorizar_assets.py)")
+        print()
+        
+        print("5. Claves calientes en páginas de detalle...")
+        for patron, tabla in PAGINAS_DETALLE.items():
+            pks = self.cargar_pks(tabla)
+            if not pks:
+                print(f"   ⚠ Sin filas en {tabla} (ejecute poblar_db.py)")
+                continue
+            for distribucion in (UNIFORME, self.distribucion_claves):
+                resultado = self.prueba_claves_calientes(patron, pks, distribucion)
+                if not resultado:
+                    continue
+                resultados_completos.append(resultado)
+                print(f"   ✓ {patron} [{resultado['distribucion']}]: {resultado['tiempo_promedio']:.2f}ms, "
+                      f"P95 {resultado['percentil_95']:.2f}ms, {resultado['claves_distintas']} claves distintas, "
+                      f"top 1% = {resultado['proporcion_top1']:.0%} de los requests, "
+                      f"cache hit ratio {resultado.get('cache_hit_ratio', 0):.1%}")
+        print()
+        
+        print("6. Carga abierta (latencia corregida por omisión coordinada)...")
+        url_abierta = f"{self.base_url}/ordenes/"
+        resultado = self.prueba_carga_abierta(url_abierta)
+        if resultado:
+            resultados_completos.append(resultado)
+            print(f"   ✓ {url_abierta}: {resultado['throughput']:.2f} req/s de {resultado['tasa_objetivo']:.2f} objetivo")
+            print(f"   ✓ P99 sin corregir {resultado['percentil_99']:.2f}ms, "
+                  f"corregido {resultado['percentil_99_corregido']:.2f}ms "
+                  f"(máx. corregido {resultado['tiempo_corregido_max']:.2f}ms)")
+            if resultado['requests_descartados']:
+                print(f"   ⚠ {resultado['requests_descartados']} requests descartados: el cliente no sostuvo la tasa")
+        print()
+        
+        print("7. Perfiles de carga y capacidad por endpoint...")
+        capacidades = []
+        for perfil in self.perfiles:
+            for url in urls_prueba:
+                print(f"   {url} [{perfil['perfil']}]")
+                filas, analisis = self.prueba_perfil(url, perfil)
+                resultados_completos.extend(filas)
+                if not analisis:
+                    continue
+                capacidades.append({'url': url, 'perfil': perfil['perfil'], **analisis})
+                if perfil['tipo'] == 'soak':
+                    print(f"   ✓ Deriva en {analisis['ventanas']} ventanas: throughput "
+                          f"{analisis['deriva_throughput']:+.1%}, P99 {analisis['deriva_percentil_99']:+.1%}")
+                elif analisis['saturado']:
+                    print(f"   ✓ Capacidad: {analisis['capacidad_rps']:.1f} req/s con "
+                          f"{analisis['usuarios_saturacion']} usuarios (P99 {analisis['percentil_99_saturacion']:.2f}ms "
+                          f"→ {analisis['percentil_99_despues']:.2f}ms al pasar el codo)")
+                else:
+                    print(f"   ⚠ Sin saturar: capacidad ≥ {analisis['capacidad_rps']:.1f} req/s "
+                          f"(amplíe el perfil por encima de {analisis['usuarios_saturacion']} usuarios)")
+        if capacidades:
+            self.guardar_capacidades(capacidades)
+        print()
+        
+        print("8. Recorridos de usuario (mezcla ponderada)...")
+        print(f"   {self.usuarios_recorridos} usuarios x {self.duracion_recorridos:g}s, "
+              f"factor de pensar {self.factor_pensar:g}: {', '.join(self.recorridos)}")
+        for fila in self.prueba_recorridos():
+            resultados_completos.append(fila)
+            if fila['tipo_prueba'] == 'recorrido':
+                print(f"   ✓ {fila['recorrido']}: {fila['requests_exitosos']}/{fila['total_requests']} completos, "
+                      f"P50 {fila['percentil_50']:.2f}ms, P99 {fila['percentil_99']:.2f}ms")
+            else:
+                aviso = f", ⚠ {fila['fallos_extraccion']} extracciones fallidas" if fila['fallos_extraccion'] else ""
+                print(f"     {fila['paso']}: P50 {fila['percentil_50']:.2f}ms, P99 {fila['percentil_99']:.2f}ms, "
+                      f"{fila['errores']} errores{aviso}")
+        print()
+        
         # Guardar resultados
         self.guardar_resultados(resultados_completos)
         self.generar_reporte(resultados_completos)
         
-        print("3. Análisis completado!")
+        print("9. Análisis completado!")
         print(f"   Resultados guardados en: {self.resultados_csv}")
         print("   Gráficos generados en: resultados/")
         
         return resultados_completos
     
     def guardar_resultados(self, resultados):
-        """Guarda resultados en CSV"""
+        """Guarda resultados en CSV, con sus muestras por request e histogramas"""
         os.makedirs("resultados", exist_ok=True)
+        corrida = {'corrida': uuid.uuid4().hex[:12], 'fecha': datetime.now().isoformat(timespec='seconds'),
+                   'host': platform.node()}
+        self.guardar_muestras(resultados, corrida)
+        self.guardar_recursos(corrida)
         
         with open(self.resultados_csv, 'w', newline='') as csvfile:
             if resultados:
-                fieldnames = ['url', 'tipo_prueba', 'tiempo_promedio', 'tiempo_mediana', 
+                fieldnames = ['corrida', 'fecha', 'host', 'url', 'tipo_prueba', 'tiempo_promedio', 'tiempo_mediana', 
                             'tiempo_min', 'tiempo_max', 'percentil_95', 'throughput',
-                            'total_requests', 'requests_exitosos', 'errores', 'duracion_total']
+                            'total_requests', 'requests_exitosos', 'errores', 'duracion_total',
+                            'tiempo_redirect_promedio', 'redirecciones',
+                            'cache_hits', 'cache_misses', 'cache_evictions', 'cache_hit_ratio',
+                            'servidor', 'workers', 'threads', 'snapshot',
+                            'servidor_promedio', 'sql_promedio', 'template_promedio', 'transporte_promedio',
+                            'codificacion', 'bytes_transferidos', 'bytes_contenido',
+                            'tiempo_html_promedio', 'recursos', 'recursos_cache',
+                            'recursos_revalidados', 'recursos_error', 'recursos_externos',
+                            'distribucion', 'claves_distintas', 'proporcion_top1',
+                            'motor', 'usuarios', 'conexiones', 'cpu_cliente',
+                            'modo_carga', 'llegadas', 'tasa_objetivo', 'requests_descartados',
+                            'retraso_envio_max_ms', 'percentil_99', 'tiempo_corregido_promedio',
+                            'percentil_95_corregido', 'percentil_99_corregido', 'tiempo_corregido_max',
+                            'percentil_50', 'percentil_90', 'percentil_999', 'percentil_9999',
+                            'percentil_50_corregido', 'percentil_90_corregido',
+                            'percentil_999_corregido', 'percentil_9999_corregido', 'muestras_dir',
+                            'procesos_carga', 'hosts_carga', 'perfil', 'paso',
+                            'recorrido', 'factor_pensar', 'fallos_extraccion',
+                            'recursos_muestras', 'cpu_servidor_promedio', 'cpu_servidor_max', 'cpu_nucleo_max',
+                            'rss_max_mb', 'hilos_max', 'descriptores_max', 'cambios_contexto',
+                            'io_lectura_bytes', 'io_escritura_bytes',
+                            'calentamiento', 'estado_estable', 'calentamiento_requests', 'calentamiento_s',
+                            'tiempo_promedio_total', 'percentil_99_total']
                 
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                 writer.writeheader()
                 
                 for resultado in resultados:
                     # Filtrar solo los campos necesarios
-                    row = {k: v for k, v in resultado.items() if k in fieldnames}
+                    row = {k: v for k, v in {**resultado, **corrida}.items() if k in fieldnames}
                     writer.writerow(row)
+        
+        self.guardar_histogramas(resultados, corrida)
+    
+    def guardar_muestras(self, resultados, corrida):
+        """Escribe las muestras por request de cada prueba y anota su directorio en el resultado"""
+        for i, resultado in enumerate(resultados):
+            muestras = resultado.get('muestras')
+            if not muestras:
+                continue
+            directorio = os.path.join(self.muestras_dir, corrida['corrida'], f"{i:02d}_{resultado['tipo_prueba']}")
+            muestras.guardar(directorio, {
+                **corrida,
+                **{campo: resultado.get(campo) for campo in ('url', 'tipo_prueba', 'motor', 'modo_carga',
+                                                             'usuarios', 'tasa_objetivo', 'distribucion',
+                                                             'calentamiento_requests', 'estable_desde_ns')},
+                **self.servidor,
+            })
+            resultado['muestras_dir'] = directorio
+    
+    def guardar_recursos(self, corrida):
+        """Detiene el muestreador y escribe la serie completa junto a las muestras de la corrida"""
+        if not self.muestreador:
+            return
+        self.muestreador.detener()
+        if len(self.muestreador):
+            directorio = os.path.join(self.muestras_dir, corrida['corrida'], 'recursos_servidor')
+            self.muestreador.guardar(directorio, {**corrida, **self.servidor})
+            print(f"✓ Recursos del servidor: {len(self.muestreador)} muestras en {directorio}")
+    
+    def guardar_histogramas(self, resultados, corrida):
+        """Agrega los histogramas de esta corrida a histogramas_latencia.jsonl"""
+        campos = ('url', 'tipo_prueba', 'motor', 'modo_carga', 'usuarios', 'tasa_objetivo',
+                  'distribucion', 'perfil', 'paso', 'recorrido',
+                  *self.servidor, 'muestras_dir', 'histograma', 'histograma_corregido')
+        
+        with open(self.histogramas_jsonl, 'a') as archivo:
+            for resultado in resultados:
+                if resultado.get('histograma'):
+                    linea = {**corrida, **{campo: resultado.get(campo) for campo in campos}}
+                    archivo.write(json.dumps(linea) + '\n')
     
     def generar_reporte(self, resultados):
         """Genera gráficos y reportes visuales"""
         if not resultados:
             return
         
-        # Crear DataFrame para análisis
+        # Crear DataFrame para análisis: solo las pruebas de carga tienen throughput
+        # (compresión y página completa son secuenciales y tienen su propia sección)
         df_data = []
         for r in resultados:
+            if r.get('throughput') is None:
+                continue
             df_data.append({
                 'URL': r['url'].split('/')[-2] if r['url'].endswith('/') else r['url'].split('/')[-1],
                 'Tiempo_Promedio': r['tiempo_promedio'],
                 'Throughput': r['throughput'],
-                'P95': r['percentil_95'],
+                'P95': r.get('percentil_95'),
                 'Tipo': r['tipo_prueba']
             })
+        if not df_data:
+            return
         
         df = pd.DataFrame(df_data)
         
@@ -249,6 +1003,35 @@ class RendimientoAnalyzer:
             for _, row in df_normal.iterrows():
                 f.write(f"- {row['URL']}: {row['Tiempo_Promedio']:.2f}ms, {row['Throughput']:.2f} req/s\n")
             
+            compresion = [r for r in resultados if r['tipo_prueba'] in MODOS_COMPRESION]
+            if compresion:
+                f.write("\nCompresión de Respuestas:\n")
+                for r in compresion:
+                    f.write(f"- {r['tipo_prueba']} {r['url']} ({r.get('codificacion', 'identity')}): "
+                            f"{r.get('bytes_transferidos', 0):.0f} bytes, {r['tiempo_promedio']:.2f}ms\n")
+            
+            paginas = [r for r in resultados if r['tipo_prueba'] in ('pagina_fria', 'pagina_caliente')]
+            if paginas:
+                f.write("\nCarga Completa de Página:\n")
+                for r in paginas:
+                    f.write(f"- {r['tipo_prueba']} {r['url']}: {r['tiempo_promedio']:.2f}ms "
+                            f"(HTML {r['tiempo_html_promedio']:.2f}ms), {r['recursos']} recursos, "
+                            f"{r['recursos_cache']:.1f} desde cache, {r['recursos_error']:.1f} con error\n")
+                    if r.get('recursos_externos'):
+                        f.write(f"  ⚠ {r['recursos_externos']} recursos de CDN no medidos "
+                                f"(ejecute vendorizar_assets.py)\n")
+            
+            f.write("\nEstado Estable (calentamiento excluido de las métricas):\n")
+            for r in resultados:
+                if 'estado_estable' not in r:
+                    continue
+                if r['estado_estable']:
+                    f.write(f"- {r['tipo_prueba']} {r['url']}: desde el request {r['calentamiento_requests'] + 1} "
+                            f"({r['calentamiento_s']:.2f}s), promedio {r['tiempo_promedio_total']:.2f}ms -> "
+                            f"{r['tiempo_promedio']:.2f}ms\n")
+                else:
+                    f.write(f"- {r['tipo_prueba']} {r['url']}: no alcanzado, sin exclusión\n")
+            
             # Evaluación de hipótesis H1
             f.write("\n=== EVALUACIÓN HIPÓTESIS H1 ===\n")
             f.write("Hipótesis: MVC monolítico tiene 25-45% mejor rendimiento que microservicios\n")
@@ -263,7 +1046,80 @@ class RendimientoAnalyzer:
                 f.write("✗ HIPÓTESIS NO CONFIRMADA: Rendimiento similar o inferior\n")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Laboratorio de rendimiento contra el servidor en el puerto 8002")
+    parser.add_argument('--snapshot', metavar='NOMBRE',
+                        help="Snapshot de dataset con el que se inició el servidor (se verifica y se registra)")
+    parser.add_argument('--motor', choices=['asyncio', 'threads', 'distribuido'],
+                        help="Generador de carga concurrente (por defecto asyncio, o LAB_MOTOR)")
+    parser.add_argument('--max-conexiones', type=int,
+                        help="Conexiones keep-alive del pool del motor asyncio (por defecto 256)")
+    parser.add_argument('--procesos-carga', type=int,
+                        help="Motor distribuido: procesos worker locales (por defecto uno por CPU)")
+    parser.add_argument('--workers-remotos', type=int,
+                        help="Motor distribuido: workers a esperar en el puerto 9100 "
+                             "(python carga_distribuida.py worker <host>:9100)")
+    parser.add_argument('--tasa', type=float, help="Carga abierta: requests/s constantes")
+    parser.add_argument('--duracion-tasa', type=float, default=10, help="Segundos de carga abierta con --tasa")
+    parser.add_argument('--programa', type=parsear_programa,
+                        help="Carga abierta por tramos 'segundos:tasa,...' (p. ej. 10:20,10:80,10:20)")
+    parser.add_argument('--llegadas', choices=['constante', 'poisson'],
+                        help="Intervalos entre requests de la carga abierta (por defecto constante)")
+    parser.add_argument('--perfil', action='append', type=parsear_perfil, metavar='PERFIL',
+                        help="Perfil de concurrencia por endpoint (repetible): 'rampa:1-64:8:10', "
+                             "'escalones:1,2,4,8:10' o 'soak:16:600:60' (por defecto escalones:1,2,4,8,16,32:5)")
+    parser.add_argument('--recorridos', type=validar_recorridos,
+                        help=f"Recorridos de usuario de la mezcla, separados por ',' (por defecto {','.join(RECORRIDOS)})")
+    parser.add_argument('--usuarios-recorridos', type=int, help="Usuarios virtuales de la mezcla de recorridos (por defecto 10)")
+    parser.add_argument('--duracion-recorridos', type=float, help="Segundos de la mezcla de recorridos (por defecto 30)")
+    parser.add_argument('--factor-pensar', type=float,
+                        help="Escala de los tiempos de pensar entre pasos (0 = sin pausas, por defecto 1)")
+    parser.add_argument('--calentamiento', type=parsear_calentamiento,
+                        help="Requests iniciales excluidos de las estadísticas de carga: 'auto' "
+                             "(detección de estado estable, por defecto), un número o 0")
+    parser.add_argument('--distribucion', type=validar_distribucion,
+                        help="pks visitados en las páginas de detalle: 'uniforme' o 'zipf:<s>' (por defecto zipf:1.1)")
+    args = parser.parse_args()
+    
     analyzer = RendimientoAnalyzer()
+    if args.distribucion:
+        analyzer.distribucion_claves = args.distribucion
+    if args.motor:
+        analyzer.motor = args.motor
+    if args.max_conexiones:
+        analyzer.max_conexiones = args.max_conexiones
+    if args.procesos_carga is not None:
+        analyzer.procesos_carga = args.procesos_carga
+    if args.workers_remotos is not None:
+        analyzer.workers_remotos = args.workers_remotos
+    if args.programa:
+        analyzer.tramos_abiertos = args.programa
+    elif args.tasa:
+        analyzer.tramos_abiertos = [(args.duracion_tasa, args.tasa)]
+    if args.llegadas:
+        analyzer.llegadas = args.llegadas
+    if args.perfil:
+        analyzer.perfiles = args.perfil
+    if args.calentamiento is not None:
+        analyzer.calentamiento = args.calentamiento
+    if args.recorridos:
+        analyzer.recorridos = args.recorridos
+    if args.usuarios_recorridos:
+        analyzer.usuarios_recorridos = args.usuarios_recorridos
+    if args.duracion_recorridos:
+        analyzer.duracion_recorridos = args.duracion_recorridos
+    if args.factor_pensar is not None:
+        analyzer.factor_pensar = args.factor_pensar
+    
+    if args.snapshot:
+        # El servidor en marcha no puede cambiar de base: solo se comprueba que coincida
+        from snapshots_dataset import verificar_snapshot
+        analyzer.servidor['snapshot'] = args.snapshot
+        if not verificar_snapshot(args.snapshot):
+            print(f"✗ La base activa no coincide con el snapshot '{args.snapshot}'")
+            print(f"   Detenga el servidor, ejecute: python snapshots_dataset.py restaurar {args.snapshot}")
+            print("   e inícielo con DJANGO_DB_NAME=patron_mvc/snapshots/activa.sqlite3")
+            sys.exit(1)
+        print(f"✓ Base activa coincide con el snapshot '{args.snapshot}'")
     
     print("Verificando disponibilidad del servidor...")
     try:
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Laboratorio SQLite: Concurrencia lectura/escritura por configuración de PRAGMAs
+Objetivo: Medir errores de bloqueo y latencia de cola (P95/P99) con
+distintos conjuntos de PRAGMAs sobre una copia de patron_mvc/db.sqlite3
+"""
+
+import os
+import sys
+import csv
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import threading
+import statistics
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patron_mvc'))
+
+from patron_mvc.sqlite_backend.pragmas import PRAGMAS_POR_DEFECTO, aplicar_pragmas, leer_pragmas
+from snapshots_dataset import ruta_snapshot
+
+# Conjuntos de PRAGMAs comparados. 'django_por_defecto' reproduce la
+# configuración anterior: rollback journal y el timeout implícito de sqlite3.
+CONJUNTOS_PRAGMAS = {
+    'django_por_defecto': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+    'wal': {'journal_mode': 'WAL', 'busy_timeout': 5000},
+    'wal_normal': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000},
+    'wal_ajustado': PRAGMAS_POR_DEFECTO,
+}
+
+CONSULTA_LECTURA = """
+    SELECT o.id, o.numero_orden, o.estado, c.nombre, c.razon_social, v.placa
+    FROM ordenes_ordentrabajo o
+    JOIN clientes_cliente c ON c.id = o.cliente_id
+    JOIN vehiculos_vehiculo v ON v.id = o.vehiculo_id
+    WHERE o.is_active = 1
+    ORDER BY o.fecha_ingreso DESC
+    LIMIT 50
+"""
+
+CONSULTA_ESCRITURA = """
+    UPDATE ordenes_ordentrabajo SET observaciones = ?, updated_at = ? WHERE id = ?
+"""
+
+
+class LaboratorioSQLite:
+    def __init__(self, db_origen="patron_mvc/db.sqlite3", duracion=10,
+                 lectores=8, escritores=2, reconectar=False, snapshot=None):
+        # Con un snapshot, cada conjunto parte de una copia del mismo dataset
+        self.snapshot = snapshot
+        self.db_origen = ruta_snapshot(snapshot) if snapshot else db_origen
+        self.duracion = duracion
+        self.lectores = lectores
+        self.escritores = escritores
+        self.reconectar = reconectar
+        self.resultados_csv = "resultados/sqlite_pragmas_resultados.csv"
+
+    def preparar_copia(self, directorio):
+        """Copia la base de datos para no alterar el archivo original"""
+        destino = os.path.join(directorio, 'db.sqlite3')
+        origen = sqlite3.connect(self.db_origen)
+        copia = sqlite3.connect(destino)
+        with copia:
+            origen.backup(copia)
+        origen.close()
+        copia.close()
+        return destino
+
+    def abrir_conexion(self, ruta, pragmas):
+        conn = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        return aplicar_pragmas(conn, pragmas)
+
+    def ejecutar_conjunto(self, nombre, pragmas):
+        """Ejecuta la carga mixta con un conjunto de PRAGMAs"""
+        print(f"   Probando: {nombre} {pragmas}")
+
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = self.preparar_copia(directorio)
+
+            # journal_mode es persistente: se fija una vez antes de la carga
+            conn = self.abrir_conexion(ruta, pragmas)
+            efectivos = leer_pragmas(conn)
+            ids = [fila[0] for fila in conn.execute("SELECT id FROM ordenes_ordentrabajo")]
+            conn.close()
+
+            if not ids:
+                print("   ⚠ No hay órdenes en la base de datos (ejecute poblar_db.py)")
+                return None
+
+            muestras = {'lectura': [], 'escritura': []}
+            errores_bloqueo = {'lectura': 0, 'escritura': 0}
+            lock = threading.Lock()
+            fin = time.perf_counter() + self.duracion
+
+            def trabajador(tipo):
+                conn = None if self.reconectar else self.abrir_conexion(ruta, pragmas)
+                locales, bloqueos = [], 0
+
+                try:
+                    while time.perf_counter() < fin:
+                        inicio = time.perf_counter()
+                        c = None
+                        completada = False
+                        try:
+                            c = conn or self.abrir_conexion(ruta, pragmas)
+                            if tipo == 'lectura':
+                                c.execute(CONSULTA_LECTURA).fetchall()
+                            else:
+                                c.execute("BEGIN IMMEDIATE")
+                                c.execute(CONSULTA_ESCRITURA, (
+                                    f"benchmark {random.random()}",
+                                    datetime.now().isoformat(),
+                                    random.choice(ids),
+                                ))
+                                c.execute("COMMIT")
+                            completada = True
+                        except sqlite3.OperationalError as e:
+                            if 'locked' not in str(e) and 'busy' not in str(e):
+                                raise
+                            bloqueos += 1
+                            if tipo == 'escritura' and c is not None and c.in_transaction:
+                                c.execute("ROLLBACK")
+                        finally:
+                            # Con reconexión, cerrar también forma parte del costo medido
+                            if conn is None and c is not None:
+                                c.close()
+                        if completada:
+                            locales.append((time.perf_counter() - inicio) * 1000)
+                finally:
+                    if conn is not None:
+                        conn.close()
+                with lock:
+                    muestras[tipo].extend(locales)
+                    errores_bloqueo[tipo] += bloqueos
+
+            hilos = [threading.Thread(target=trabajador, args=('lectura',)) for _ in range(self.lectores)]
+            hilos += [threading.Thread(target=trabajador, args=('escritura',)) for _ in range(self.escritores)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+
+        resultados = []
+        for tipo, tiempos in muestras.items():
+            resultado = {
+                'conjunto': nombre,
+                'operacion': tipo,
+                'journal_mode': efectivos['journal_mode'],
+                'synchronous': efectivos['synchronous'],
+                'busy_timeout': efectivos['busy_timeout'],
+                'reconectar': self.reconectar,
+                'snapshot': self.snapshot or '',
+                'operaciones': len(tiempos),
+                'errores_bloqueo': errores_bloqueo[tipo],
+                'throughput': len(tiempos) / self.duracion,
+            }
+            if tiempos:
+                resultado.update({
+                    'tiempo_promedio': statistics.mean(tiempos),
+                    'tiempo_mediana': statistics.median(tiempos),
+                    'percentil_95': self.calcular_percentil(tiempos, 95),
+                    'percentil_99': self.calcular_percentil(tiempos, 99),
+                    'tiempo_max': max(tiempos),
+                })
+            resultados.append(resultado)
+
+            print(f"   ✓ {tipo}: {resultado['throughput']:.1f} ops/s, "
+                  f"P99 {resultado.get('percentil_99', 0):.2f}ms, "
+                  f"bloqueos {errores_bloqueo[tipo]}")
+        print()
+
+        return resultados
+
+    def calcular_percentil(self, datos, percentil):
+        """Calcula percentil específico"""
+        datos_ordenados = sorted(datos)
+        k = (len(datos_ordenados) - 1) * percentil / 100
+        f = int(k)
+        c = k - f
+        if f == len(datos_ordenados) - 1:
+            return datos_ordenados[f]
+        return datos_ordenados[f] * (1 - c) + datos_ordenados[f + 1] * c
+
+    def ejecutar_suite_completa(self, conjuntos=None):
+        """Ejecuta la carga mixta para cada conjunto de PRAGMAs"""
+        print("=== LABORATORIO SQLITE: PRAGMAS Y CONCURRENCIA ===")
+        print(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Lectores: {self.lectores}, escritores: {self.escritores}, "
+              f"duración: {self.duracion}s, reconectar: {self.reconectar}")
+        print(f"Dataset: {self.snapshot or self.db_origen}")
+        print()
+
+        resultados_completos = []
+        for nombre in conjuntos or CONJUNTOS_PRAGMAS:
+            resultado = self.ejecutar_conjunto(nombre, CONJUNTOS_PRAGMAS[nombre])
+            if resultado:
+                resultados_completos.extend(resultado)
+
+        self.guardar_resultados(resultados_completos)
+        print(f"✓ Resultados guardados en: {self.resultados_csv}")
+        return resultados_completos
+
+    def guardar_resultados(self, resultados):
+        """Guarda resultados en CSV"""
+        os.makedirs("resultados", exist_ok=True)
+
+        fieldnames = ['conjunto', 'operacion', 'journal_mode', 'synchronous', 'busy_timeout',
+                      'reconectar', 'snapshot', 'operaciones', 'errores_bloqueo', 'throughput',
+                      'tiempo_promedio', 'tiempo_mediana', 'percentil_95', 'percentil_99', 'tiempo_max']
+
+        with open(self.resultados_csv, 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer.writeheader()
+            for resultado in resultados:
+                writer.writerow(resultado)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de PRAGMAs SQLite con carga mixta")
+    parser.add_argument('--duracion', type=float, default=10, help="Segundos por conjunto")
+    parser.add_argument('--lectores', type=int, default=8)
+    parser.add_argument('--escritores', type=int, default=2)
+    parser.add_argument('--reconectar', action='store_true',
+                        help="Abrir una conexión por operación (sin CONN_MAX_AGE)")
+    parser.add_argument('--conjuntos', nargs='+', choices=list(CONJUNTOS_PRAGMAS))
+    parser.add_argument('--snapshot', metavar='NOMBRE',
+                        help="Usar un snapshot de dataset (snapshots_dataset.py) en lugar de db.sqlite3")
+    args = parser.parse_args()
+
+    laboratorio = LaboratorioSQLite(
+        duracion=args.duracion,
+        lectores=args.lectores,
+        escritores=args.escritores,
+        reconectar=args.reconectar,
+        snapshot=args.snapshot,
+    )
+    laboratorio.ejecutar_suite_completa(args.conjuntos)
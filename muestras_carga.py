@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Muestras de Carga
+Guarda cada request de una prueba de carga (no solo el resumen) en columnas
+tipadas preasignadas y las escribe como archivos .npy, uno por columna, en
+resultados/muestras_carga/<corrida>/<prueba>/. Solo usa la biblioteca
+estándar; script_analisis.py las abre con numpy en modo memmap, sin copiarlas.
+
+La cabecera .npy (formato 1.0) se escribe a mano: magia, versión, longitud y
+un dict de Python con dtype, orden y forma, rellenado hasta múltiplo de 64.
+"""
+
+import os
+import sys
+import json
+import base64
+import struct
+from array import array
+
+# columna -> código de array.array, dtype de numpy equivalente
+COLUMNAS = {
+    'enviado_ns': ('q', 'i8'),     # time.time_ns() al iniciar el request
+    'latencia_ns': ('q', 'i8'),    # tiempo_ms del resultado, en nanosegundos
+    'status': ('H', 'u2'),         # 0 = error de conexión o timeout
+    'bytes': ('q', 'i8'),          # bytes_transferidos (leídos del socket)
+    'endpoint': ('H', 'u2'),       # índice en metadatos['endpoints']
+    'worker': ('I', 'u4'),         # usuario virtual, hilo o worker que lo envió
+}
+
+ORDEN_BYTES = '<' if sys.byteorder == 'little' else '>'
+MAGIA_NPY = b'\x93NUMPY\x01\x00'
+ARCHIVO_METADATOS = 'muestras.json'
+
+
+class MuestrasCarga:
+    """Columnas de longitud fija; crecen al doble solo si se supera la capacidad prevista"""
+
+    def __init__(self, capacidad=1024):
+        self.capacidad = max(int(capacidad), 1)
+        self.columnas = {
+            nombre: array(codigo, bytes(array(codigo).itemsize * self.capacidad))
+            for nombre, (codigo, _) in COLUMNAS.items()
+        }
+        self.n = 0
+        self.endpoints = {}
+
+    def __len__(self):
+        return self.n
+
+    def id_endpoint(self, url):
+        if url not in self.endpoints:
+            self.endpoints[url] = len(self.endpoints)
+        return self.endpoints[url]
+
+    def ampliar(self, capacidad):
+        for columna in self.columnas.values():
+            columna.frombytes(bytes(columna.itemsize * (capacidad - self.capacidad)))
+        self.capacidad = capacidad
+
+    def registrar(self, enviado_ns, latencia_ns, status, bytes_leidos, url, worker):
+        if self.n == self.capacidad:
+            self.ampliar(2 * self.capacidad)
+        i = self.n
+        self.columnas['enviado_ns'][i] = enviado_ns
+        self.columnas['latencia_ns'][i] = latencia_ns
+        self.columnas['status'][i] = status
+        self.columnas['bytes'][i] = bytes_leidos
+        self.columnas['endpoint'][i] = self.id_endpoint(url)
+        self.columnas['worker'][i] = worker
+        self.n += 1
+
+    def registrar_resultado(self, resultado, worker=0):
+        """Muestra a partir de un resultado de medir / medir_tiempo_respuesta"""
+        self.registrar(
+            resultado.get('enviado_ns', 0),
+            round(resultado['tiempo_ms'] * 1_000_000),
+            resultado['status_code'],
+            resultado.get('bytes_transferidos') or 0,
+            resultado['url'],
+            resultado.get('worker', worker),
+        )
+
+    def combinar(self, otro, desplazamiento_worker=0):
+        """Agrega las muestras de otro registro (otro hilo, proceso o worker)
+
+        `desplazamiento_worker` se suma a sus ids de worker para que no se
+        confundan con los propios (cada proceso numera sus usuarios desde 0).
+        """
+        if self.n + otro.n > self.capacidad:
+            self.ampliar(max(2 * self.capacidad, self.n + otro.n))
+        traduccion = [self.id_endpoint(url) for url in otro.endpoints]
+        for nombre, columna in self.columnas.items():
+            valores = otro.columnas[nombre][:otro.n]
+            if nombre == 'endpoint':
+                valores = array(columna.typecode, (traduccion[v] for v in valores))
+            elif nombre == 'worker' and desplazamiento_worker:
+                valores = array(columna.typecode, (v + desplazamiento_worker for v in valores))
+            columna[self.n:self.n + otro.n] = valores
+        self.n += otro.n
+        return self
+
+    def a_dict(self):
+        """Columnas en base64 para enviarlas en JSON (carga_distribuida.py)"""
+        return {
+            'n': self.n,
+            'endpoints': list(self.endpoints),
+            'columnas': {nombre: base64.b64encode(memoryview(columna)[:self.n]).decode('ascii')
+                         for nombre, columna in self.columnas.items()},
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        muestras = cls(0)
+        for nombre, texto in datos['columnas'].items():
+            columna = array(COLUMNAS[nombre][0])
+            columna.frombytes(base64.b64decode(texto))
+            muestras.columnas[nombre] = columna
+        muestras.n = datos['n']
+        muestras.capacidad = max(datos['n'], 1)
+        muestras.endpoints = {url: i for i, url in enumerate(datos['endpoints'])}
+        return muestras
+
+    def guardar(self, directorio, metadatos=None):
+        """Escribe <columna>.npy por columna y muestras.json; devuelve el directorio"""
+        os.makedirs(directorio, exist_ok=True)
+        for nombre, (_, dtype) in COLUMNAS.items():
+            escribir_npy(os.path.join(directorio, f"{nombre}.npy"),
+                         self.columnas[nombre], ORDEN_BYTES + dtype, self.n)
+        with open(os.path.join(directorio, ARCHIVO_METADATOS), 'w') as archivo:
+            json.dump({
+                **(metadatos or {}),
+                'muestras': self.n,
+                'endpoints': list(self.endpoints),
+                'columnas': {nombre: dtype for nombre, (_, dtype) in COLUMNAS.items()},
+            }, archivo, indent=2)
+        return directorio
+
+
+def escribir_npy(ruta, columna, dtype, n):
+    """Archivo .npy 1.0 con los primeros n valores de un array.array"""
+    cabecera = f"{{'descr': '{dtype}', 'fortran_order': False, 'shape': ({n},), }}"
+    # magia (8) + longitud (2) + cabecera + '\n' debe quedar alineado a 64 bytes
+    relleno = -(len(MAGIA_NPY) + 2 + len(cabecera) + 1) % 64
+    cabecera = (cabecera + ' ' * relleno + '\n').encode('latin1')
+    with open(ruta, 'wb') as archivo:
+        archivo.write(MAGIA_NPY + struct.pack('<H', len(cabecera)) + cabecera)
+        archivo.write(memoryview(columna)[:n])
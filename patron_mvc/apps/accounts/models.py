@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from patron_mvc.cache import obtener_o_calcular
 
 class CustomUser(AbstractUser):
     
@@ -38,3 +39,12 @@ class CustomUser(AbstractUser):
     
     def get_nombre_completo(self):
         return f"{self.first_name} {self.last_name}".strip() or self.username
+    
+    @classmethod
+    def mecanicos_en_cache(cls):
+        """Mecánicos activos para asignar órdenes (cache L1/L2)"""
+        return obtener_o_calcular(
+            'accounts:mecanicos_activos',
+            lambda: list(cls.objects.filter(role='MECANICO', activo=True)),
+            modelos=(cls,)
+        )
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from patron_mvc.cache import invalidar_modelo
+from .models import CustomUser
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidar_cache_customuser(sender, **kwargs):
+    """Observer: invalida las entradas de cache que dependen de CustomUser"""
+    # update_last_login guarda el usuario en cada login sin cambiar nada de lo cacheado
+    if kwargs.get('update_fields') == {'last_login'}:
+        return
+    invalidar_modelo(sender, **kwargs)
@@ -2,8 +2,9 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.db.models import Q, Count
 from django.contrib.auth.hashers import make_password
+from patron_mvc.cache import obtener_o_calcular
 from .models import CustomUser
 
 def user_login(request):
@@ -111,25 +112,31 @@ def usuario_detail(request, pk):
     usuario = get_object_or_404(CustomUser, pk=pk)
     
     # Estadísticas del usuario
-    vehiculos_registrados = 0
-    ordenes_creadas = 0
-    ordenes_asignadas = 0
+    from apps.vehiculos.models import Vehiculo
+    from apps.ordenes.models import OrdenTrabajo
+    
+    def calcular_estadisticas():
+        # Creadas, asignadas y abiertas en una sola consulta con agregados condicionales
+        estadisticas = OrdenTrabajo.objects.filter(
+            Q(created_by=usuario) | Q(mecanico_asignado=usuario),
+            is_active=True
+        ).aggregate(
+            ordenes_creadas=Count('id', filter=Q(created_by=usuario)),
+            ordenes_asignadas=Count('id', filter=Q(mecanico_asignado=usuario)),
+            ordenes_abiertas=Count('id', filter=Q(mecanico_asignado=usuario) & ~Q(estado__in=OrdenTrabajo.ESTADOS_CERRADOS)),
+        )
+        estadisticas['vehiculos_registrados'] = Vehiculo.objects.filter(created_by=usuario, is_active=True).count()
+        return estadisticas
     
-    try:
-        from apps.vehiculos.models import Vehiculo
-        from apps.ordenes.models import OrdenTrabajo
-        
-        vehiculos_registrados = Vehiculo.objects.filter(created_by=usuario, is_active=True).count()
-        ordenes_creadas = OrdenTrabajo.objects.filter(created_by=usuario, is_active=True).count()
-        ordenes_asignadas = OrdenTrabajo.objects.filter(mecanico_asignado=usuario, is_active=True).count()
-    except:
-        pass
+    estadisticas = obtener_o_calcular(
+        f'accounts:estadisticas:{pk}',
+        calcular_estadisticas,
+        modelos=(Vehiculo, OrdenTrabajo)
+    )
     
     return render(request, 'accounts/detail.html', {
         'usuario': usuario,
-        'vehiculos_registrados': vehiculos_registrados,
-        'ordenes_creadas': ordenes_creadas,
-        'ordenes_asignadas': ordenes_asignadas
+        **estadisticas
     })
 
 @login_required
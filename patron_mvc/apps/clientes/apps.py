@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ClientesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.clientes'
+
+    def ready(self):
+        from . import signals
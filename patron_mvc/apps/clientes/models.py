@@ -1,6 +1,7 @@
 from django.db import models
 from apps.accounts.models import CustomUser
 from django.utils import timezone
+from patron_mvc.cache import obtener_o_calcular
 
 class Cliente(models.Model):
     """Modelo base para clientes - CU-R03 y CU-R04"""
@@ -44,6 +45,21 @@ class Cliente(models.Model):
             return f"{self.nombre} {self.apellido}".strip()
         return self.razon_social
     
+    @classmethod
+    def activos_en_cache(cls):
+        """Opciones {'pk', 'nombre'} de los clientes activos para los selectores (cache L1/L2)
+
+        Se cachean solo pk y nombre: con datasets grandes la lista de objetos
+        completos ocuparía cientos de MB por entrada.
+        """
+        def calcular():
+            return [
+                {'pk': pk, 'nombre': f"{nombre} {apellido}".strip() if tipo == 'PARTICULAR' else razon_social}
+                for pk, tipo, nombre, apellido, razon_social in cls.objects.filter(is_active=True).values_list(
+                    'pk', 'tipo', 'nombre', 'apellido', 'razon_social')
+            ]
+        return obtener_o_calcular('clientes:opciones_activos', calcular, modelos=(cls,))
+    
     def save(self, *args, **kwargs):
         # Validaciones automáticas según tipo
         if self.tipo == 'PARTICULAR' and not self.nombre:
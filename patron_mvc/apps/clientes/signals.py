@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from patron_mvc.cache import invalidar_modelo
+from .models import Cliente
+
+@receiver([post_save, post_delete], sender=Cliente)
+def invalidar_cache_cliente(sender, **kwargs):
+    """Observer: invalida las entradas de cache que dependen de Cliente"""
+    invalidar_modelo(sender, **kwargs)
@@ -1,6 +1,9 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.db.models import Q
+from patron_mvc.cache import obtener_o_calcular
+from apps.vehiculos.models import Vehiculo
+from apps.ordenes.models import OrdenTrabajo
 from .models import Cliente
 
 def cliente_list(request):
@@ -50,8 +53,14 @@ def cliente_create(request):
 def cliente_detail(request, pk):
     """Detalle de cliente"""
     cliente = get_object_or_404(Cliente, pk=pk, is_active=True)
-    vehiculos = cliente.vehiculos.filter(is_active=True)
-    ordenes = cliente.ordenes.filter(is_active=True)[:5]
+    vehiculos, ordenes = obtener_o_calcular(
+        f'clientes:detalle:{pk}',
+        lambda: (
+            list(cliente.vehiculos.filter(is_active=True)),
+            list(cliente.ordenes.filter(is_active=True)[:5])
+        ),
+        modelos=(Vehiculo, OrdenTrabajo)
+    )
     
     return render(request, 'clientes/detail.html', {
         'cliente': cliente,
@@ -3,7 +3,7 @@ from .models import OrdenTrabajo
 
 @admin.register(OrdenTrabajo)
 class OrdenTrabajoAdmin(admin.ModelAdmin):
-    list_display = ('numero_orden', 'get_cliente_nombre', 'get_vehiculo_info', 'estado', 'prioridad', 'fecha_ingreso', 'fecha_estimada_entrega')
+    list_display = ('numero_orden', 'get_cliente_nombre', 'get_vehiculo_info', 'estado', 'prioridad', 'mecanico_asignado', 'fecha_ingreso', 'fecha_estimada_entrega')
     list_filter = ('estado', 'prioridad', 'fecha_ingreso', 'created_at')
     search_fields = ('numero_orden', 'cliente__nombre', 'cliente__apellido', 'cliente__razon_social', 'vehiculo__placa', 'descripcion_falla')
     readonly_fields = ('numero_orden', 'created_at', 'updated_at')
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0001_initial'),
+        ('ordenes', '0001_initial'),
+        ('vehiculos', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordentrabajo',
+            name='mecanico_asignado',
+            field=models.ForeignKey(blank=True, limit_choices_to={'role': 'MECANICO'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ordenes_asignadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='ordentrabajo',
+            index=models.Index(fields=['mecanico_asignado', 'is_active', 'estado'], name='orden_mecanico_carga_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordentrabajo',
+            index=models.Index(fields=['created_by', 'is_active'], name='orden_creador_idx'),
+        ),
+    ]
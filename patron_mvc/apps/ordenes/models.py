@@ -26,10 +26,17 @@ class OrdenTrabajo(models.Model):
         ('URGENTE', 'Urgente'),
     ]
     
+    # Estados que ya no cuentan como carga de trabajo pendiente
+    ESTADOS_CERRADOS = ['FINALIZADO', 'ENTREGADO', 'CANCELADO']
+    
     numero_orden = models.CharField(max_length=20, unique=True, blank=True)
     
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='ordenes')
     vehiculo = models.ForeignKey(Vehiculo, on_delete=models.CASCADE, related_name='ordenes')
+    mecanico_asignado = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='ordenes_asignadas', limit_choices_to={'role': 'MECANICO'}
+    )
     
     fecha_ingreso = models.DateTimeField(default=timezone.now)
     fecha_estimada_entrega = models.DateField(null=True, blank=True)
@@ -55,6 +62,13 @@ class OrdenTrabajo(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Agregados de carga por mecánico (detalle de usuario y tablero)
+            models.Index(fields=['mecanico_asignado', 'is_active', 'estado'], name='orden_mecanico_carga_idx'),
+            models.Index(fields=['created_by', 'is_active'], name='orden_creador_idx'),
+        ]
+    
     def __str__(self):
         return f"Orden {self.numero_orden} - {self.vehiculo} - {self.get_estado_display()}"
     
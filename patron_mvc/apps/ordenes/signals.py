@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from patron_mvc.cache import invalidar_modelo
+from .models import OrdenTrabajo
+
+@receiver([post_save, post_delete], sender=OrdenTrabajo)
+def invalidar_cache_ordentrabajo(sender, **kwargs):
+    """Observer: invalida las entradas de cache que dependen de OrdenTrabajo"""
+    invalidar_modelo(sender, **kwargs)
@@ -9,5 +9,6 @@ urlpatterns = [
     path('<int:pk>/', views.orden_detail, name='detail'), # Para detail.html
     path('<int:pk>/editar/', views.orden_edit, name='edit'), # Para form.html (editar)
     path('<int:pk>/eliminar/', views.orden_delete, name='delete'), # Para eliminar
+    path('carga-mecanicos/', views.carga_mecanicos, name='carga_mecanicos'), # Tablero de carga
     path('ajax/vehiculos/', views.load_vehiculos, name='load_vehiculos'), # AJAX para cargar vehículos
 ]
\ No newline at end of file
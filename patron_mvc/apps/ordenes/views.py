@@ -1,14 +1,16 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.http import JsonResponse
-from django.db.models import Q
+from django.db.models import Q, Count
 from .models import OrdenTrabajo
 from apps.clientes.models import Cliente
 from apps.vehiculos.models import Vehiculo
+from apps.accounts.models import CustomUser
+from patron_mvc.cache import obtener_o_calcular
 
 def orden_list(request):
     """Lista de órdenes - CU-R06"""
-    ordenes = OrdenTrabajo.objects.filter(is_active=True).select_related('cliente', 'vehiculo')
+    ordenes = OrdenTrabajo.objects.filter(is_active=True).select_related('cliente', 'vehiculo', 'mecanico_asignado')
     
     # Filtros
     estado = request.GET.get('estado')
@@ -32,7 +34,8 @@ def orden_list(request):
 
 def orden_create(request):
     """Crear orden - CU-R06"""
-    clientes = Cliente.objects.filter(is_active=True)
+    clientes = Cliente.activos_en_cache()
+    mecanicos = CustomUser.mecanicos_en_cache()
     
     if request.method == 'POST':
         try:
@@ -48,6 +51,7 @@ def orden_create(request):
                 descripcion_falla=request.POST['descripcion_falla'],
                 fecha_estimada_entrega=request.POST.get('fecha_estimada_entrega') or None,
                 prioridad=request.POST.get('prioridad', 'NORMAL'),
+                mecanico_asignado_id=request.POST.get('mecanico_asignado') or None,
                 observaciones=request.POST.get('observaciones', ''),
                 # created_by=request.user if request.user.is_authenticated else None
             )
@@ -58,6 +62,7 @@ def orden_create(request):
     
     return render(request, 'ordenes/form.html', {
         'clientes': clientes,
+        'mecanicos': mecanicos,
         'action': 'Crear'
     })
 
@@ -71,20 +76,45 @@ def orden_detail(request, pk):
         'is_atrasado': orden.is_atrasado()
     })
 
+def carga_mecanicos(request):
+    """Tablero de carga de trabajo por mecánico"""
+    activas = Q(ordenes_asignadas__is_active=True)
+    abiertas = activas & ~Q(ordenes_asignadas__estado__in=OrdenTrabajo.ESTADOS_CERRADOS)
+    
+    # Una única consulta agrupada (LEFT JOIN + GROUP BY) para todos los mecánicos
+    mecanicos = obtener_o_calcular(
+        'ordenes:carga_mecanicos',
+        lambda: list(CustomUser.objects.filter(role='MECANICO', activo=True).annotate(
+            ordenes_total=Count('ordenes_asignadas', filter=activas),
+            ordenes_abiertas=Count('ordenes_asignadas', filter=abiertas),
+            ordenes_urgentes=Count('ordenes_asignadas', filter=abiertas & Q(ordenes_asignadas__prioridad='URGENTE')),
+        ).order_by('-ordenes_abiertas', 'username')),
+        modelos=(CustomUser, OrdenTrabajo)
+    )
+    
+    return render(request, 'ordenes/carga_mecanicos.html', {
+        'mecanicos': mecanicos
+    })
+
 def load_vehiculos(request):
     """AJAX para cargar vehículos por cliente"""
     cliente_id = request.GET.get('cliente_id')
-    vehiculos = Vehiculo.objects.filter(
-        cliente_id=cliente_id,
-        is_active=True
-    ).values('id', 'marca', 'modelo', 'anio', 'placa', 'kilometraje')
+    vehiculos = obtener_o_calcular(
+        f'ordenes:vehiculos_cliente:{cliente_id}',
+        lambda: list(Vehiculo.objects.filter(
+            cliente_id=cliente_id,
+            is_active=True
+        ).values('id', 'marca', 'modelo', 'anio', 'placa', 'kilometraje')),
+        modelos=(Vehiculo,)
+    )
     
-    return JsonResponse(list(vehiculos), safe=False)
+    return JsonResponse(vehiculos, safe=False)
 
 def orden_edit(request, pk):
     """Editar orden"""
     orden = get_object_or_404(OrdenTrabajo, pk=pk, is_active=True)
-    clientes = Cliente.objects.filter(is_active=True)
+    clientes = Cliente.activos_en_cache()
+    mecanicos = CustomUser.mecanicos_en_cache()
     
     if request.method == 'POST':
         try:
@@ -99,6 +129,7 @@ def orden_edit(request, pk):
             orden.descripcion_falla = request.POST['descripcion_falla']
             orden.fecha_estimada_entrega = request.POST.get('fecha_estimada_entrega') or None
             orden.prioridad = request.POST.get('prioridad', 'NORMAL')
+            orden.mecanico_asignado_id = request.POST.get('mecanico_asignado') or None
             orden.observaciones = request.POST.get('observaciones', '')
             orden.estado = request.POST.get('estado', orden.estado)
             orden.save()
@@ -111,6 +142,7 @@ def orden_edit(request, pk):
     return render(request, 'ordenes/form.html', {
         'orden': orden,
         'clientes': clientes,
+        'mecanicos': mecanicos,
         'action': 'Editar'
     })
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class VehiculosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.vehiculos'
+
+    def ready(self):
+        from . import signals
@@ -3,6 +3,7 @@ from django.contrib import messages
 from django.db.models import Q, Min, Max, Count
 from .models import Vehiculo
 from apps.clientes.models import Cliente
+from patron_mvc.cache import obtener_o_calcular
 
 def vehiculo_list(request):
     """Lista de vehículos - CU-R05"""
@@ -18,12 +19,18 @@ def vehiculo_list(request):
             Q(cliente__razon_social__icontains=search)
         )
     
-    # Estadísticas para el dashboard
-    stats = vehiculos.aggregate(
-        total_vehiculos=Count('id'),
-        anio_mas_antiguo=Min('anio'),
-        anio_mas_reciente=Max('anio')
-    )
+    # Estadísticas para el dashboard (en cache solo sin búsqueda)
+    def calcular_stats():
+        return vehiculos.aggregate(
+            total_vehiculos=Count('id'),
+            anio_mas_antiguo=Min('anio'),
+            anio_mas_reciente=Max('anio')
+        )
+    
+    if search:
+        stats = calcular_stats()
+    else:
+        stats = obtener_o_calcular('vehiculos:stats', calcular_stats, modelos=(Vehiculo,))
     
     return render(request, 'vehiculos/list.htm', {
         'vehiculos': vehiculos,
@@ -33,7 +40,7 @@ def vehiculo_list(request):
 
 def vehiculo_create(request):
     """Crear vehículo - CU-R05"""
-    clientes = Cliente.objects.filter(is_active=True)
+    clientes = Cliente.activos_en_cache()
     
     if request.method == 'POST':
         try:
@@ -84,7 +91,7 @@ def vehiculo_detail(request, pk):
 def vehiculo_edit(request, pk):
     """Editar vehículo"""
     vehiculo = get_object_or_404(Vehiculo, pk=pk, is_active=True)
-    clientes = Cliente.objects.filter(is_active=True)
+    clientes = Cliente.activos_en_cache()
     
     if request.method == 'POST':
         try:
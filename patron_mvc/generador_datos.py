@@ -0,0 +1,387 @@
+"""
+Generador de datasets escalables para los laboratorios.
+
+escala=1 produce 1.000 clientes, 2.000 vehículos y 10.000 órdenes
+(escala=100 ≈ 1M órdenes). Las filas se construyen con un RNG con semilla y
+claves únicas precalculadas (id, email, placa, numero_orden) y se insertan con
+bulk_create por lotes dentro de transacciones, sin pasar por save() ni por las
+señales de los modelos.
+
+generar_dataset_paralelo() reparte el espacio de claves en shards: cada proceso
+worker construye las filas de un shard a partir de (semilla, tabla, shard) y
+un único escritor las inserta, por lo que el resultado no depende del número
+de procesos.
+
+La asignación vehículo→cliente y orden→vehículo sigue una distribución
+configurable (patron_mvc.distribuciones): con 'zipf:<s>' unos pocos clientes
+de flota concentran la mayoría de los vehículos y de las órdenes.
+"""
+
+import multiprocessing
+import random
+import string
+import time
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.accounts.models import CustomUser
+from apps.clientes.models import Cliente
+from apps.vehiculos.models import Vehiculo
+from apps.ordenes.models import OrdenTrabajo
+from patron_mvc.cache import cache_dos_niveles
+from patron_mvc.distribuciones import UNIFORME, crear_distribucion
+
+FILAS_POR_ESCALA = {'clientes': 1000, 'vehiculos': 2000, 'ordenes': 10000}
+TAMANO_LOTE = 5000
+FILAS_POR_SHARD = 10000
+
+# Tablas del dataset en orden de dependencias: hijas antes que padres
+MODELOS_DATASET = (OrdenTrabajo, Vehiculo, Cliente)
+
+MARCAS_MODELOS = [
+    ('Toyota', ['Corolla', 'Camry', 'Hilux', 'Prado', 'Yaris', 'Rav4']),
+    ('Chevrolet', ['Spark', 'Cruze', 'Captiva', 'Aveo', 'Tracker', 'Tahoe']),
+    ('Renault', ['Logan', 'Sandero', 'Duster', 'Megane', 'Fluence', 'Koleos']),
+    ('Nissan', ['Sentra', 'Versa', 'Qashqai', 'X-Trail', 'Frontier', 'Pathfinder']),
+    ('Hyundai', ['Accent', 'Elantra', 'Tucson', 'Santa Fe', 'i10', 'i20']),
+    ('Kia', ['Picanto', 'Rio', 'Cerato', 'Sportage', 'Sorento', 'Soul']),
+    ('Mazda', ['2', '3', 'CX-5', 'CX-3', '6', 'CX-9']),
+    ('Ford', ['Fiesta', 'Focus', 'EcoSport', 'Escape', 'Explorer', 'F-150']),
+    ('Volkswagen', ['Gol', 'Polo', 'Jetta', 'Tiguan', 'Passat', 'Amarok']),
+    ('Honda', ['City', 'Civic', 'Accord', 'CR-V', 'HR-V', 'Pilot']),
+]
+NOMBRES = ['Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Carmen', 'Roberto', 'Patricia',
+           'Miguel', 'Elena', 'Diego', 'Sofía', 'Andrés', 'Lucía', 'Javier', 'Valentina']
+APELLIDOS = ['Pérez', 'García', 'López', 'Martínez', 'Rodríguez', 'Fernández', 'Sánchez',
+             'Gómez', 'Torres', 'Vargas', 'Castillo', 'Herrera', 'Jiménez', 'Morales']
+CIUDADES = ['Bogotá', 'Medellín', 'Cali', 'Barranquilla', 'Bucaramanga', 'Cartagena',
+            'Pereira', 'Manizales', 'Ibagué', 'Santa Marta']
+COLORES = ['Blanco', 'Negro', 'Gris', 'Rojo', 'Azul', 'Plata', 'Dorado', 'Verde']
+FALLAS = ["Ruido extraño en el motor al acelerar", "Frenos hacen ruido al frenar",
+          "Aire acondicionado no enfría", "Cambio de aceite y filtros", "Revisión de suspensión",
+          "Problema con la batería", "Alineación y balanceo", "Fuga de aceite",
+          "Sobrecalentamiento del motor", "Mantenimiento preventivo"]
+ESTADOS = [estado for estado, _ in OrdenTrabajo.ESTADO_CHOICES]
+PRIORIDADES = [prioridad for prioridad, _ in OrdenTrabajo.PRIORIDAD_CHOICES]
+
+# Placas "ABC-1234": 26^3 * 10^4 combinaciones. El índice se dispersa con un
+# multiplicador coprimo para que las placas no queden ordenadas por id.
+COMBINACIONES_PLACA = 26 ** 3 * 10 ** 4
+MULTIPLICADOR_PLACA = 7919
+
+
+def tamanos_dataset(escala):
+    return {tabla: max(1, int(filas * escala)) for tabla, filas in FILAS_POR_ESCALA.items()}
+
+
+def placa_unica(indice):
+    codigo = indice * MULTIPLICADOR_PLACA % COMBINACIONES_PLACA
+    letras, numero = divmod(codigo, 10 ** 4)
+    l1, resto = divmod(letras, 26 * 26)
+    l2, l3 = divmod(resto, 26)
+    return f"{string.ascii_uppercase[l1]}{string.ascii_uppercase[l2]}{string.ascii_uppercase[l3]}-{numero:04d}"
+
+
+def siguiente_id(modelo):
+    return (modelo.objects.aggregate(maximo=Max('pk'))['maximo'] or 0) + 1
+
+
+def construir_cliente(rng, pk, created_by_id):
+    comun = {
+        'pk': pk,
+        'email': f"cliente{pk}@lab.taller.com",
+        'telefono': f"555-{pk % 10000:04d}",
+        'direccion': f"Calle {rng.randint(1, 200)} #{rng.randint(1, 99)}-{rng.randint(1, 99)}",
+        'ciudad': rng.choice(CIUDADES),
+        'created_by_id': created_by_id,
+        'is_active': True,
+    }
+    if rng.random() < 0.3:
+        return Cliente(tipo='EMPRESARIAL', razon_social=f"Flota {rng.choice(APELLIDOS)} {pk} S.A.S.",
+                       ruc=f"9{pk:09d}-{pk % 10}", contacto_principal=rng.choice(NOMBRES), **comun)
+    return Cliente(tipo='PARTICULAR', nombre=rng.choice(NOMBRES), apellido=rng.choice(APELLIDOS), **comun)
+
+
+def construir_vehiculo(rng, pk, cliente_id, kilometraje, created_by_id):
+    marca, modelos = rng.choice(MARCAS_MODELOS)
+    return Vehiculo(
+        pk=pk,
+        cliente_id=cliente_id,
+        tipo_vehiculo=rng.choice(['AUTO', 'CAMIONETA', 'CAMION', 'MOTO']),
+        marca=marca,
+        modelo=rng.choice(modelos),
+        anio=rng.randint(2010, 2024),
+        placa=placa_unica(pk),
+        color=rng.choice(COLORES),
+        tipo_combustible=rng.choice(['GASOLINA', 'DIESEL', 'GAS']),
+        tipo_transmision=rng.choice(['MANUAL', 'AUTOMATICA']),
+        kilometraje=kilometraje,
+        created_by_id=created_by_id,
+        is_active=True,
+    )
+
+
+def construir_orden(rng, pk, vehiculo_id, cliente_id, kilometraje, mecanico_ids, created_by_id, ahora):
+    fecha_ingreso = ahora - timedelta(seconds=rng.randrange(365 * 86400))
+    fecha_estimada = fecha_ingreso + timedelta(days=rng.randint(1, 7))
+    estado = rng.choice(ESTADOS)
+    falla = rng.choice(FALLAS)
+    mano_obra = Decimal(rng.randrange(50000, 500000))
+    repuestos = Decimal(rng.randrange(20000, 800000))
+    return OrdenTrabajo(
+        pk=pk,
+        numero_orden=f"OT-{fecha_ingreso.year}-{pk:07d}",
+        cliente_id=cliente_id,
+        vehiculo_id=vehiculo_id,
+        mecanico_asignado_id=rng.choice(mecanico_ids) if mecanico_ids else None,
+        fecha_ingreso=fecha_ingreso,
+        fecha_estimada_entrega=fecha_estimada.date(),
+        fecha_entrega_real=fecha_estimada if estado == 'ENTREGADO' else None,
+        estado=estado,
+        prioridad=rng.choice(PRIORIDADES),
+        kilometraje_ingreso=kilometraje + rng.randint(100, 5000),
+        descripcion_falla=falla,
+        diagnostico=f"Diagnóstico realizado para: {falla}" if estado != 'RECIBIDO' else "",
+        costo_mano_obra=mano_obra,
+        costo_repuestos=repuestos,
+        # save() no se ejecuta: el total se calcula aquí
+        costo_total=mano_obra + repuestos,
+        created_by_id=created_by_id,
+        is_active=True,
+    )
+
+
+def vaciar_tablas(modelos=MODELOS_DATASET):
+    """Vacía las tablas con DELETE sin WHERE (sin cargar objetos ni señales); devuelve segundos
+
+    No aplica on_delete: las tablas que referencian a `modelos` deben estar incluidas.
+    """
+    inicio = time.perf_counter()
+    tablas = [modelo._meta.db_table for modelo in modelos]
+    # Mismo SQL que `manage.py flush`: DELETE por tabla y reinicio de sqlite_sequence
+    connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tablas, reset_sequences=True))
+    # Sin esto el planificador seguiría usando las estadísticas del dataset anterior
+    analizar_tablas(modelos)
+
+    for modelo in modelos:
+        cache_dos_niveles.invalidar_modelo(modelo)
+    return time.perf_counter() - inicio
+
+
+def analizar_tablas(modelos=MODELOS_DATASET):
+    with connection.cursor() as cursor:
+        for modelo in modelos:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(modelo._meta.db_table)}")
+
+
+def insertar_por_lotes(modelo, objetos, total, tamano_lote=TAMANO_LOTE):
+    """bulk_create por lotes, una transacción por lote; devuelve filas/s"""
+    inicio = time.perf_counter()
+    insertadas = 0
+    while True:
+        lote = list(islice(objetos, tamano_lote))
+        if not lote:
+            break
+        with transaction.atomic():
+            modelo.objects.bulk_create(lote, batch_size=tamano_lote)
+        insertadas += len(lote)
+        print(f"\r   {modelo.__name__}: {insertadas}/{total}", end="", flush=True)
+
+    duracion = time.perf_counter() - inicio
+    velocidad = insertadas / duracion if duracion else 0.0
+    print(f"\r✓ {modelo.__name__}: {insertadas} filas en {duracion:.1f}s ({velocidad:,.0f} filas/s)")
+    return velocidad
+
+
+def generar_dataset(escala=1, semilla=42, tamano_lote=TAMANO_LOTE,
+                    distribucion_vehiculos=UNIFORME, distribucion_ordenes=UNIFORME):
+    """Genera clientes, vehículos y órdenes a la escala indicada; devuelve métricas de carga"""
+    tamanos = tamanos_dataset(escala)
+    print(f"Generando dataset escala {escala}: {tamanos['clientes']} clientes, "
+          f"{tamanos['vehiculos']} vehículos, {tamanos['ordenes']} órdenes (semilla {semilla})")
+    print(f"   Vehículos por cliente: {distribucion_vehiculos}, órdenes por vehículo: {distribucion_ordenes}")
+    dueno = crear_distribucion(distribucion_vehiculos, tamanos['clientes'], semilla)
+    vehiculo_orden = crear_distribucion(distribucion_ordenes, tamanos['vehiculos'], semilla)
+
+    rng = random.Random(semilla)
+    created_by_id = CustomUser.objects.filter(role='RECEPCIONISTA').values_list('pk', flat=True).first()
+    mecanico_ids = list(CustomUser.objects.filter(role='MECANICO').values_list('pk', flat=True))
+    ahora = timezone.now()
+    inicio = time.perf_counter()
+
+    # Ids precalculados: los vehículos y las órdenes referencian a sus padres sin releerlos
+    primer_cliente = siguiente_id(Cliente)
+    primer_vehiculo = siguiente_id(Vehiculo)
+    primera_orden = siguiente_id(OrdenTrabajo)
+
+    vehiculo_cliente = [primer_cliente + dueno.muestra(rng) for _ in range(tamanos['vehiculos'])]
+    vehiculo_km = [rng.randint(5000, 150000) for _ in range(tamanos['vehiculos'])]
+
+    velocidades = {}
+    velocidades['clientes'] = insertar_por_lotes(Cliente, (
+        construir_cliente(rng, primer_cliente + i, created_by_id)
+        for i in range(tamanos['clientes'])
+    ), tamanos['clientes'], tamano_lote)
+
+    velocidades['vehiculos'] = insertar_por_lotes(Vehiculo, (
+        construir_vehiculo(rng, primer_vehiculo + i, vehiculo_cliente[i], vehiculo_km[i], created_by_id)
+        for i in range(tamanos['vehiculos'])
+    ), tamanos['vehiculos'], tamano_lote)
+
+    def ordenes():
+        for i in range(tamanos['ordenes']):
+            v = vehiculo_orden.muestra(rng)
+            yield construir_orden(rng, primera_orden + i, primer_vehiculo + v, vehiculo_cliente[v],
+                                  vehiculo_km[v], mecanico_ids, created_by_id, ahora)
+
+    velocidades['ordenes'] = insertar_por_lotes(OrdenTrabajo, ordenes(), tamanos['ordenes'], tamano_lote)
+
+    # bulk_create no emite post_save: se invalidan a mano las entradas de cache
+    for modelo in (Cliente, Vehiculo, OrdenTrabajo):
+        cache_dos_niveles.invalidar_modelo(modelo)
+    analizar_tablas()
+
+    duracion = time.perf_counter() - inicio
+    total = sum(tamanos.values())
+    print(f"✓ {total} filas en {duracion:.1f}s ({total / duracion:,.0f} filas/s)")
+    return {'tamanos': tamanos, 'velocidades': velocidades, 'duracion': duracion}
+
+
+MASCARA_64 = (1 << 64) - 1
+
+
+def mezclar(*valores):
+    """Hash splitmix64 determinista (igual en todos los procesos, a diferencia de hash())"""
+    x = 0
+    for valor in valores:
+        x = (x ^ valor) + 0x9E3779B97F4A7C15 & MASCARA_64
+        x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9 & MASCARA_64
+        x = (x ^ (x >> 27)) * 0x94D049BB133111EB & MASCARA_64
+        x ^= x >> 31
+    return x
+
+
+def uniforme_hash(*valores):
+    return mezclar(*valores) / (MASCARA_64 + 1)
+
+
+def atributos_vehiculo(semilla, indice, contexto):
+    """Cliente y kilometraje de un vehículo, calculables desde cualquier shard"""
+    dueno = crear_distribucion(contexto['distribucion_vehiculos'], contexto['tamanos']['clientes'], semilla)
+    cliente = contexto['primer_cliente'] + dueno.indice(uniforme_hash(semilla, indice, 0))
+    kilometraje = 5000 + mezclar(semilla, indice, 1) % 145000
+    return cliente, kilometraje
+
+
+def filas_insercion(modelo, objetos):
+    """Valores ya adaptados a la base de datos, en el orden de las columnas del modelo"""
+    campos = modelo._meta.concrete_fields
+    return [
+        tuple(campo.get_db_prep_save(campo.pre_save(objeto, True), connection) for campo in campos)
+        for objeto in objetos
+    ]
+
+
+def sql_insercion(modelo):
+    campos = modelo._meta.concrete_fields
+    columnas = ", ".join(connection.ops.quote_name(campo.column) for campo in campos)
+    return (f"INSERT INTO {connection.ops.quote_name(modelo._meta.db_table)} "
+            f"({columnas}) VALUES ({', '.join(['%s'] * len(campos))})")
+
+
+def construir_shard(tarea):
+    """Worker: filas de un shard, deterministas para (semilla, tabla, shard)"""
+    tabla, shard, inicio, fin, contexto = tarea
+    semilla = contexto['semilla']
+    rng = random.Random(f"{semilla}:{tabla}:{shard}")
+
+    if tabla == 'clientes':
+        modelo = Cliente
+        objetos = (construir_cliente(rng, contexto['primer_cliente'] + i, contexto['created_by_id'])
+                   for i in range(inicio, fin))
+    elif tabla == 'vehiculos':
+        modelo = Vehiculo
+        objetos = (construir_vehiculo(rng, contexto['primer_vehiculo'] + i,
+                                      *atributos_vehiculo(semilla, i, contexto), contexto['created_by_id'])
+                   for i in range(inicio, fin))
+    else:
+        modelo = OrdenTrabajo
+        vehiculo_orden = crear_distribucion(contexto['distribucion_ordenes'],
+                                            contexto['tamanos']['vehiculos'], semilla)
+
+        def ordenes():
+            for i in range(inicio, fin):
+                v = vehiculo_orden.muestra(rng)
+                cliente, kilometraje = atributos_vehiculo(semilla, v, contexto)
+                yield construir_orden(rng, contexto['primera_orden'] + i, contexto['primer_vehiculo'] + v,
+                                      cliente, kilometraje, contexto['mecanico_ids'],
+                                      contexto['created_by_id'], contexto['ahora'])
+        objetos = ordenes()
+
+    return filas_insercion(modelo, objetos)
+
+
+def generar_dataset_paralelo(escala=1, semilla=42, procesos=None, filas_por_shard=FILAS_POR_SHARD,
+                             distribucion_vehiculos=UNIFORME, distribucion_ordenes=UNIFORME):
+    """Construye las filas en `procesos` workers y las inserta desde un único escritor"""
+    procesos = procesos or multiprocessing.cpu_count()
+    tamanos = tamanos_dataset(escala)
+    print(f"Generando dataset escala {escala} con {procesos} procesos: {tamanos['clientes']} clientes, "
+          f"{tamanos['vehiculos']} vehículos, {tamanos['ordenes']} órdenes (semilla {semilla})")
+    print(f"   Vehículos por cliente: {distribucion_vehiculos}, órdenes por vehículo: {distribucion_ordenes}")
+
+    contexto = {
+        'semilla': semilla,
+        'tamanos': tamanos,
+        'primer_cliente': siguiente_id(Cliente),
+        'primer_vehiculo': siguiente_id(Vehiculo),
+        'primera_orden': siguiente_id(OrdenTrabajo),
+        'created_by_id': CustomUser.objects.filter(role='RECEPCIONISTA').values_list('pk', flat=True).first(),
+        'mecanico_ids': list(CustomUser.objects.filter(role='MECANICO').values_list('pk', flat=True)),
+        'ahora': timezone.now(),
+        'distribucion_vehiculos': distribucion_vehiculos,
+        'distribucion_ordenes': distribucion_ordenes,
+    }
+
+    # Los workers heredan Django ya configurado (fork) y no abren conexiones propias
+    connections.close_all()
+    inicio = time.perf_counter()
+    velocidades = {}
+
+    with multiprocessing.get_context('fork').Pool(procesos) as pool:
+        # Tablas en orden de dependencias: las claves foráneas se validan al confirmar
+        for tabla, modelo in (('clientes', Cliente), ('vehiculos', Vehiculo), ('ordenes', OrdenTrabajo)):
+            total = tamanos[tabla]
+            tareas = [
+                (tabla, shard, desde, min(desde + filas_por_shard, total), contexto)
+                for shard, desde in enumerate(range(0, total, filas_por_shard))
+            ]
+            sql = sql_insercion(modelo)
+            inicio_tabla = time.perf_counter()
+            insertadas = 0
+
+            for filas in pool.imap_unordered(construir_shard, tareas):
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.executemany(sql, filas)
+                insertadas += len(filas)
+                print(f"\r   {modelo.__name__}: {insertadas}/{total}", end="", flush=True)
+
+            duracion = time.perf_counter() - inicio_tabla
+            velocidades[tabla] = insertadas / duracion if duracion else 0.0
+            print(f"\r✓ {modelo.__name__}: {insertadas} filas en {duracion:.1f}s "
+                  f"({velocidades[tabla]:,.0f} filas/s)")
+
+    for modelo in (Cliente, Vehiculo, OrdenTrabajo):
+        cache_dos_niveles.invalidar_modelo(modelo)
+    analizar_tablas()
+
+    duracion = time.perf_counter() - inicio
+    total = sum(tamanos.values())
+    print(f"✓ {total} filas en {duracion:.1f}s ({total / duracion:,.0f} filas/s)")
+    return {'tamanos': tamanos, 'velocidades': velocidades, 'duracion': duracion, 'procesos': procesos}
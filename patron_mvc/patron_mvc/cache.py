@@ -0,0 +1,294 @@
+"""
+Cache de dos niveles para vistas y servicios.
+
+- L1: LRU acotada en memoria del proceso (sin serialización ni red).
+- L2: backend compartido configurado en CACHES['default'] (locmem, archivo o SQLite).
+
+Cada clave incluye los contadores de versión de los modelos de los que
+depende; las señales post_save/post_delete incrementan esos contadores, de
+modo que las entradas antiguas dejan de ser alcanzables sin borrarlas una a una.
+Los contadores viven en un archivo SQLite propio (CACHE_VERSIONES) y no en L2:
+no se desalojan con MAX_ENTRIES y los comparten todos los procesos (workers de
+gunicorn, poblar_db.py), aunque L2 sea locmem. En el mismo archivo cada proceso
+publica periódicamente sus hits/misses para que /lab/cache/ los sume.
+"""
+
+import os
+import json
+import uuid
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .instrumentacion import registrar_cache
+from .sqlite_backend.pragmas import aplicar_pragmas
+
+_AUSENTE = object()
+
+# Cada cuántos segundos un proceso publica sus estadísticas en el almacén compartido
+INTERVALO_PUBLICACION = 0.2
+# Procesos sin publicar en este tiempo se consideran terminados
+PROCESO_VIGENTE_S = 2.0
+
+
+class CacheLRU:
+    """Cache L1 en memoria del proceso con desalojo LRU"""
+
+    def __init__(self, max_entradas=1024):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.misses += 1
+                return _AUSENTE
+
+            valor, expira = entrada
+            if expira is not None and expira < time.monotonic():
+                del self._datos[clave]
+                self.misses += 1
+                return _AUSENTE
+
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return valor
+
+    def set(self, clave, valor, timeout=None):
+        expira = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+        return {
+            'entradas': len(self._datos),
+            'max_entradas': self.max_entradas,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class AlmacenCompartido:
+    """Contadores de versión por modelo y estadísticas por proceso en SQLite, sin desalojo"""
+
+    PRAGMAS = {'busy_timeout': 5000, 'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+
+    def __init__(self, ruta):
+        self.ruta = str(ruta)
+        self._local = threading.local()
+
+    def conexion(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = aplicar_pragmas(sqlite3.connect(self.ruta, isolation_level=None), self.PRAGMAS)
+            conn.execute("CREATE TABLE IF NOT EXISTS versiones "
+                         "(modelo TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS estadisticas "
+                         "(proceso TEXT PRIMARY KEY, datos TEXT NOT NULL, actualizado REAL NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, claves):
+        marcadores = ",".join("?" * len(claves))
+        return dict(self.conexion().execute(
+            f"SELECT modelo, version FROM versiones WHERE modelo IN ({marcadores})", claves))
+
+    def incr(self, clave):
+        """Incremento atómico; una clave sin registrar está en la versión 1"""
+        self.conexion().execute(
+            "INSERT INTO versiones (modelo, version) VALUES (?, 2) "
+            "ON CONFLICT(modelo) DO UPDATE SET version = version + 1", (clave,))
+
+    def publicar(self, proceso, datos):
+        self.conexion().execute(
+            "INSERT OR REPLACE INTO estadisticas (proceso, datos, actualizado) VALUES (?, ?, ?)",
+            (proceso, json.dumps(datos), time.time()))
+
+    def publicadas(self, vigencia=PROCESO_VIGENTE_S):
+        """Estadísticas de los procesos que publicaron en los últimos `vigencia` segundos"""
+        filas = self.conexion().execute(
+            "SELECT proceso, datos FROM estadisticas WHERE actualizado >= ?", (time.time() - vigencia,))
+        return {proceso: json.loads(datos) for proceso, datos in filas}
+
+
+class CacheDosNiveles:
+    """Fachada L1 (LRU local) + L2 (cache compartida de Django) con versionado por modelo"""
+
+    def __init__(self, alias='default', max_entradas_l1=None, timeout=None):
+        self.alias = alias
+        self.timeout = timeout or getattr(settings, 'CACHE_TIMEOUT', 300)
+        self.l1 = CacheLRU(max_entradas_l1 or getattr(settings, 'CACHE_L1_MAX_ENTRADAS', 1024))
+        self.compartido = AlmacenCompartido(settings.CACHE_VERSIONES)
+        self._proceso = None
+        self._pid_publicador = None
+        self.hits_l2 = 0
+        self.misses_l2 = 0
+        self.invalidaciones = 0
+        self._lock = threading.Lock()
+
+    @property
+    def l2(self):
+        return caches[self.alias]
+
+    def clave_version(self, modelo):
+        return f"version:{modelo._meta.label_lower}"
+
+    def versiones(self, modelos):
+        """Contadores de versión actuales de los modelos (una sola consulta)"""
+        claves = [self.clave_version(modelo) for modelo in modelos]
+        actuales = self.compartido.get_many(claves) if claves else {}
+        return [actuales.get(clave, 1) for clave in claves]
+
+    def construir_clave(self, clave, modelos=()):
+        versiones = self.versiones(modelos)
+        sufijo = ",".join(
+            f"{modelo._meta.label_lower}={version}"
+            for modelo, version in zip(modelos, versiones)
+        )
+        return f"{clave}|{sufijo}" if sufijo else clave
+
+    def get(self, clave, modelos=(), default=None):
+        valor = self._get_versionado(self.construir_clave(clave, modelos))
+        return default if valor is _AUSENTE else valor
+
+    def set(self, clave, valor, modelos=(), timeout=None):
+        self._set_versionado(self.construir_clave(clave, modelos), valor, timeout)
+
+    def obtener_o_calcular(self, clave, calcular, modelos=(), timeout=None):
+        """Devuelve el valor en cache o lo calcula y lo guarda en ambos niveles"""
+        clave_versionada = self.construir_clave(clave, modelos)
+        valor = self._get_versionado(clave_versionada)
+        if valor is _AUSENTE:
+            valor = calcular()
+            self._set_versionado(clave_versionada, valor, timeout)
+        return valor
+
+    def invalidar_modelo(self, modelo):
+        """Incrementa la versión del modelo; las claves que dependen de él quedan obsoletas"""
+        self.compartido.incr(self.clave_version(modelo))
+        with self._lock:
+            self.invalidaciones += 1
+
+    def limpiar(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def estadisticas(self):
+        l1 = self.l1.estadisticas()
+        total = l1['hits'] + self.hits_l2 + self.misses_l2
+        return {
+            'l1': l1,
+            'l2': {
+                'backend': self.l2.__class__.__name__,
+                'hits': self.hits_l2,
+                'misses': self.misses_l2,
+            },
+            'invalidaciones': self.invalidaciones,
+            'hit_ratio': (l1['hits'] + self.hits_l2) / total if total else 0.0,
+        }
+
+    def estadisticas_agregadas(self):
+        """Suma de las estadísticas de todos los procesos vigentes (workers de gunicorn)
+
+        Si hay otros procesos se espera un intervalo de publicación para que
+        sus contadores incluyan los requests recién terminados.
+        """
+        self._iniciar_publicador()
+        self.publicar()
+        publicadas = self.compartido.publicadas()
+        if set(publicadas) - {self._proceso}:
+            time.sleep(INTERVALO_PUBLICACION * 1.5)
+            publicadas = self.compartido.publicadas()
+        procesos = list(publicadas.values())
+        l1 = {campo: sum(p['l1'][campo] for p in procesos)
+              for campo in ('entradas', 'max_entradas', 'hits', 'misses', 'evictions')}
+        l2 = {campo: sum(p['l2'][campo] for p in procesos) for campo in ('hits', 'misses')}
+        total = l1['hits'] + l2['hits'] + l2['misses']
+        return {
+            'procesos': len(procesos),
+            'l1': l1,
+            'l2': {'backend': self.l2.__class__.__name__, **l2},
+            'invalidaciones': sum(p['invalidaciones'] for p in procesos),
+            'hit_ratio': (l1['hits'] + l2['hits']) / total if total else 0.0,
+        }
+
+    def publicar(self):
+        self.compartido.publicar(self._proceso, self.estadisticas())
+
+    def _iniciar_publicador(self):
+        """Arranca (una vez por proceso, también tras un fork) el hilo que publica las estadísticas"""
+        if self._pid_publicador == os.getpid():
+            return
+        with self._lock:
+            if self._pid_publicador == os.getpid():
+                return
+            self._pid_publicador = os.getpid()
+            self._proceso = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        threading.Thread(target=self._publicar_periodicamente, name='cache-estadisticas', daemon=True).start()
+
+    def _publicar_periodicamente(self):
+        while True:
+            time.sleep(INTERVALO_PUBLICACION)
+            try:
+                self.publicar()
+            except sqlite3.Error:
+                pass
+
+    def _get_versionado(self, clave):
+        self._iniciar_publicador()
+        valor = self.l1.get(clave)
+        if valor is not _AUSENTE:
+            registrar_cache(True)
+            return valor
+
+        valor = self.l2.get(clave, _AUSENTE)
+        with self._lock:
+            if valor is _AUSENTE:
+                self.misses_l2 += 1
+            else:
+                self.hits_l2 += 1
+        registrar_cache(valor is not _AUSENTE)
+        if valor is not _AUSENTE:
+            self.l1.set(clave, valor, self.timeout)
+        return valor
+
+    def _set_versionado(self, clave, valor, timeout=None):
+        timeout = timeout or self.timeout
+        self.l2.set(clave, valor, timeout)
+        self.l1.set(clave, valor, timeout)
+
+
+cache_dos_niveles = CacheDosNiveles()
+
+
+def obtener_o_calcular(clave, calcular, modelos=(), timeout=None):
+    return cache_dos_niveles.obtener_o_calcular(clave, calcular, modelos, timeout)
+
+
+def invalidar_modelo(sender, using=None, **kwargs):
+    """Receptor para post_save/post_delete de los modelos cacheados
+
+    El incremento se difiere al commit: dentro de la transacción, un lector
+    concurrente leería aún las filas anteriores y las guardaría bajo la versión
+    nueva. Fuera de una transacción on_commit ejecuta de inmediato.
+    """
+    transaction.on_commit(lambda: cache_dos_niveles.invalidar_modelo(sender), using=using)
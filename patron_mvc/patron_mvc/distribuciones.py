@@ -0,0 +1,76 @@
+"""
+Distribuciones de claves para datos y carga sintéticos.
+
+Un taller real no es uniforme: unos pocos clientes de flota concentran la
+mayoría de los vehículos, y unas pocas órdenes reciben la mayoría de las
+visitas. Las distribuciones se expresan como texto ('uniforme', 'zipf:1.1')
+para poder pasarlas por línea de comandos y variables de entorno.
+
+indice(u) transforma un uniforme u en [0, 1) en una posición 0..n-1; así la
+misma distribución sirve con random.Random o con un hash determinista.
+"""
+
+import random
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+
+UNIFORME = 'uniforme'
+
+
+class DistribucionUniforme:
+    def __init__(self, n):
+        self.n = n
+        self.descripcion = UNIFORME
+
+    def indice(self, u):
+        return min(int(u * self.n), self.n - 1)
+
+    def muestra(self, rng=random):
+        return self.indice(rng.random())
+
+
+class DistribucionZipf(DistribucionUniforme):
+    """P(rango k) ∝ 1 / k^s; los rangos se reparten al azar entre las posiciones"""
+
+    def __init__(self, n, s, semilla=0):
+        super().__init__(n)
+        self.s = s
+        self.descripcion = f"zipf:{s:g}"
+        self.acumulado = list(accumulate(1.0 / k ** s for k in range(1, n + 1)))
+        # Las claves calientes no deben ser siempre los ids más bajos
+        self.posiciones = list(range(n))
+        random.Random(f"{semilla}:zipf:{n}:{s}").shuffle(self.posiciones)
+
+    def indice(self, u):
+        rango = min(bisect_right(self.acumulado, u * self.acumulado[-1]), self.n - 1)
+        return self.posiciones[rango]
+
+    def proporcion_top(self, fraccion=0.01):
+        """Fracción de la masa total que se llevan las claves más calientes"""
+        k = max(1, int(self.n * fraccion))
+        return self.acumulado[k - 1] / self.acumulado[-1]
+
+
+def validar_distribucion(especificacion):
+    """Tipo para argparse: 'uniforme' o 'zipf:<s>' con s >= 0"""
+    nombre, _, parametro = especificacion.partition(':')
+    if nombre == UNIFORME and not parametro:
+        return especificacion
+    if nombre == 'zipf':
+        try:
+            if float(parametro) >= 0:
+                return especificacion
+        except ValueError:
+            pass
+    raise ValueError(f"Distribución no válida: {especificacion!r} (use 'uniforme' o 'zipf:<s>')")
+
+
+@lru_cache(maxsize=16)
+def crear_distribucion(especificacion, n, semilla=0):
+    """Distribución sobre n posiciones; cacheada porque zipf precalcula O(n)"""
+    validar_distribucion(especificacion)
+    nombre, _, parametro = especificacion.partition(':')
+    if nombre == 'zipf' and float(parametro) > 0:
+        return DistribucionZipf(n, float(parametro), semilla)
+    return DistribucionUniforme(n)
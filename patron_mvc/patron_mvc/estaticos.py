@@ -0,0 +1,116 @@
+"""
+Pipeline de archivos estáticos.
+
+- collectstatic copia los assets con nombres con hash de contenido
+  (ManifestStaticFilesStorage) y genera variantes precomprimidas .gz/.zst.
+- indexar_estaticos() recorre STATIC_ROOT una sola vez para que el middleware
+  sirva cada archivo sin consultar el sistema de archivos por request.
+"""
+
+import gzip
+import json
+import mimetypes
+import os
+from functools import cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.utils.http import http_date
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+EXTENSIONES_COMPRIMIBLES = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.html')
+
+# Variantes por codificación, en orden de preferencia
+VARIANTES = (('zstd', '.zst'), ('gzip', '.gz'))
+
+# Solo se guarda la variante si ahorra al menos un 5%
+RATIO_MINIMO = 0.95
+
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDAR = 'public, max-age=0, must-revalidate'
+
+
+class EstaticosComprimidosStorage(ManifestStaticFilesStorage):
+    """Nombres con hash de contenido más variantes .gz/.zst de los archivos de texto"""
+
+    # Un asset sin entrada en el manifiesto se sirve con su nombre original en vez de fallar
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for nombre in set(self.hashed_files.values()):
+            if nombre.endswith(EXTENSIONES_COMPRIMIBLES):
+                self.precomprimir(nombre)
+
+    def precomprimir(self, nombre):
+        ruta = self.path(nombre)
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+
+        variantes = {'.gz': gzip.compress(contenido, compresslevel=9, mtime=0)}
+        if zstandard is not None:
+            variantes['.zst'] = zstandard.ZstdCompressor(level=19).compress(contenido)
+
+        for extension, comprimido in variantes.items():
+            if len(comprimido) < len(contenido) * RATIO_MINIMO:
+                with open(ruta + extension, 'wb') as archivo:
+                    archivo.write(comprimido)
+
+
+def indexar_estaticos(raiz, manifiesto='staticfiles.json'):
+    """{nombre relativo: metadatos} de todos los archivos servibles de STATIC_ROOT"""
+    if not raiz or not os.path.isdir(raiz):
+        return {}
+
+    inmutables = set()
+    ruta_manifiesto = os.path.join(raiz, manifiesto)
+    if os.path.exists(ruta_manifiesto):
+        with open(ruta_manifiesto) as archivo:
+            inmutables = set(json.load(archivo).get('paths', {}).values())
+
+    extensiones_variantes = tuple(extension for _, extension in VARIANTES)
+    indice = {}
+    for directorio, _, archivos in os.walk(raiz):
+        for archivo in archivos:
+            if archivo.endswith(extensiones_variantes) or archivo == manifiesto:
+                continue
+            ruta = os.path.join(directorio, archivo)
+            nombre = os.path.relpath(ruta, raiz).replace(os.sep, '/')
+            estado = os.stat(ruta)
+            tipo, _ = mimetypes.guess_type(archivo)
+
+            variantes = {'identity': (ruta, estado.st_size)}
+            for codec, extension in VARIANTES:
+                if os.path.exists(ruta + extension):
+                    variantes[codec] = (ruta + extension, os.path.getsize(ruta + extension))
+
+            indice[nombre] = {
+                'content_type': tipo or 'application/octet-stream',
+                'variantes': variantes,
+                'etag': f'"{estado.st_size:x}-{estado.st_mtime_ns:x}"',
+                'last_modified': http_date(estado.st_mtime),
+                'mtime': int(estado.st_mtime),
+                'cache_control': CACHE_INMUTABLE if nombre in inmutables else CACHE_REVALIDAR,
+            }
+    return indice
+
+
+@cache
+def urls_assets():
+    """URL de cada asset de ASSETS_VENDOR: el archivo local si ya se vendorizó, si no el CDN"""
+    return {
+        clave: staticfiles_storage.url(ruta) if finders.find(ruta) else cdn
+        for clave, (ruta, cdn) in settings.ASSETS_VENDOR.items()
+    }
+
+
+def assets_vendor(request):
+    """Context processor: {{ assets.bootstrap_css }} etc. en los templates"""
+    return {'assets': urls_assets()}
@@ -0,0 +1,97 @@
+"""
+Métricas por request compartidas entre el middleware de instrumentación,
+el wrapper de SQL, el render de templates y la cache de dos niveles.
+
+Se usa una ContextVar para que cada request (hilo o tarea) acumule sus
+propias métricas sin pasar objetos entre capas.
+"""
+
+import time
+from contextvars import ContextVar
+
+_metricas_actuales = ContextVar('metricas_request', default=None)
+
+
+class MetricasRequest:
+    """Acumulador de tiempos de un request"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.extra = {}
+
+    def total_ms(self):
+        return (time.perf_counter() - self.inicio) * 1000
+
+
+def iniciar_metricas():
+    metricas = MetricasRequest()
+    return metricas, _metricas_actuales.set(metricas)
+
+
+def finalizar_metricas(token):
+    _metricas_actuales.reset(token)
+
+
+def metricas_actuales():
+    return _metricas_actuales.get()
+
+
+def registrar_cache(hit):
+    metricas = _metricas_actuales.get()
+    if metricas is not None:
+        if hit:
+            metricas.cache_hits += 1
+        else:
+            metricas.cache_misses += 1
+
+
+def medir_sql(execute, sql, params, many, context):
+    """Wrapper para connection.execute_wrapper(): cuenta y cronometra consultas"""
+    metricas = _metricas_actuales.get()
+    if metricas is None:
+        return execute(sql, params, many, context)
+
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metricas.sql_count += 1
+        metricas.sql_ms += (time.perf_counter() - inicio) * 1000
+
+
+_render_original = None
+
+
+def instrumentar_templates():
+    """Envuelve el render de templates Django para medir su tiempo (una sola vez por proceso).
+
+    Las consultas SQL perezosas que se ejecutan durante el render se descuentan
+    del tiempo de template para no contarlas dos veces.
+    """
+    global _render_original
+    if _render_original is not None:
+        return
+
+    from django.template.backends.django import Template
+
+    _render_original = Template.render
+
+    def render(self, context=None, request=None):
+        metricas = _metricas_actuales.get()
+        if metricas is None:
+            return _render_original(self, context, request)
+
+        inicio = time.perf_counter()
+        sql_antes = metricas.sql_ms
+        try:
+            return _render_original(self, context, request)
+        finally:
+            transcurrido = (time.perf_counter() - inicio) * 1000
+            metricas.template_ms += transcurrido - (metricas.sql_ms - sql_antes)
+
+    Template.render = render
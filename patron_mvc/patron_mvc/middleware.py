@@ -0,0 +1,315 @@
+"""
+Middleware de instrumentación de requests.
+
+Registra por request: vista, tiempo total, número y tiempo de consultas SQL,
+tiempo de render de templates y hits/misses de cache. Los expone en la
+cabecera Server-Timing y los agrega a un archivo JSONL rotativo por proceso.
+
+PerfiladoMiddleware añade, bajo demanda, un perfil cProfile del request
+(.pstats) y un resumen de las funciones más costosas en la misma traza.
+
+CompresionMiddleware comprime las respuestas de texto (zstd si está instalado,
+si no gzip) por encima de un tamaño mínimo, también las respuestas en streaming.
+
+EstaticosMiddleware sirve STATIC_ROOT (assets con hash y precomprimidos) antes
+que el resto de middlewares, con cabeceras de cache inmutable.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import pstats
+import re
+import time
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, parse_http_date_safe
+from django.utils.text import compress_sequence, compress_string
+
+from .estaticos import VARIANTES, indexar_estaticos
+from .instrumentacion import (
+    finalizar_metricas, iniciar_metricas, instrumentar_templates, medir_sql,
+    metricas_actuales
+)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Bytes aleatorios en el nombre de archivo gzip (mitigación BREACH, como GZipMiddleware)
+GZIP_MAX_BYTES_ALEATORIOS = 100
+
+
+def crear_logger_trazas():
+    """Logger JSONL propio de este proceso (un archivo por PID evita rotaciones concurrentes)"""
+    directorio = settings.TRAZAS_DIR
+    os.makedirs(directorio, exist_ok=True)
+
+    logger = logging.getLogger(f'patron_mvc.trazas.{os.getpid()}')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = RotatingFileHandler(
+            os.path.join(directorio, f'trazas-{os.getpid()}.jsonl'),
+            maxBytes=settings.TRAZAS_MAX_BYTES,
+            backupCount=settings.TRAZAS_BACKUPS,
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    return logger
+
+
+class InstrumentacionMiddleware:
+    """Mide dónde se va el tiempo de cada request en el servidor"""
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTACION_HABILITADA:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.logger = crear_logger_trazas()
+        instrumentar_templates()
+
+    def __call__(self, request):
+        metricas, token = iniciar_metricas()
+        try:
+            with connections['default'].execute_wrapper(medir_sql):
+                response = self.get_response(request)
+        finally:
+            finalizar_metricas(token)
+
+        total_ms = metricas.total_ms()
+        match = request.resolver_match
+        vista = match.view_name if match and match.view_name else request.path
+
+        response['Server-Timing'] = ", ".join([
+            f"total;dur={total_ms:.3f}",
+            f'sql;dur={metricas.sql_ms:.3f};desc="{metricas.sql_count} queries"',
+            f"tpl;dur={metricas.template_ms:.3f}",
+            f'cache;desc="hits={metricas.cache_hits} misses={metricas.cache_misses}"',
+        ])
+
+        self.logger.info(json.dumps({
+            'timestamp': time.time(),
+            'pid': os.getpid(),
+            'request_id': request.headers.get('X-Request-ID', ''),
+            'metodo': request.method,
+            'path': request.path,
+            'vista': vista,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 3),
+            'sql_count': metricas.sql_count,
+            'sql_ms': round(metricas.sql_ms, 3),
+            'template_ms': round(metricas.template_ms, 3),
+            'cache_hits': metricas.cache_hits,
+            'cache_misses': metricas.cache_misses,
+            **metricas.extra,
+        }))
+
+        return response
+
+
+def resumen_perfil(perfil, top):
+    """Funciones con mayor tiempo propio (sin contar las que llaman), las responsables reales"""
+    estadisticas = pstats.Stats(perfil).sort_stats(pstats.SortKey.TIME)
+    resumen = []
+    for funcion in estadisticas.fcn_list[:top]:
+        _, llamadas, propio, acumulado, _ = estadisticas.stats[funcion]
+        archivo, linea, nombre = funcion
+        resumen.append({
+            'funcion': f"{os.path.basename(archivo)}:{linea}({nombre})",
+            'llamadas': llamadas,
+            'propio_ms': round(propio * 1000, 3),
+            'acumulado_ms': round(acumulado * 1000, 3),
+        })
+    return resumen
+
+
+def nombre_perfil(vista):
+    """Archivo .pstats identificado por vista y marca de tiempo (con microsegundos)"""
+    prefijo = re.sub(r'[^A-Za-z0-9_-]+', '_', vista).strip('_') or 'raiz'
+    ahora = time.time()
+    marca = time.strftime('%Y%m%d-%H%M%S', time.localtime(ahora))
+    return f"{prefijo}-{marca}-{int(ahora % 1 * 1e6):06d}.pstats"
+
+
+class PerfiladoMiddleware:
+    """Ejecuta bajo cProfile los requests que lo piden (cabecera X-Perfilar o ?perfilar=1)"""
+
+    def __init__(self, get_response):
+        if not settings.PERFILADO_HABILITADO:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        os.makedirs(settings.PERFILES_DIR, exist_ok=True)
+
+    def __call__(self, request):
+        if not (request.headers.get('X-Perfilar') or request.GET.get('perfilar') == '1'):
+            return self.get_response(request)
+
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            perfil.disable()
+
+        match = request.resolver_match
+        vista = match.view_name if match and match.view_name else request.path
+        nombre = nombre_perfil(vista)
+        ruta = os.path.join(settings.PERFILES_DIR, nombre)
+        perfil.dump_stats(ruta)
+        response['X-Perfil'] = nombre
+
+        metricas = metricas_actuales()
+        if metricas is not None:
+            metricas.extra['perfil'] = nombre
+            metricas.extra['perfil_top'] = resumen_perfil(perfil, settings.PERFILADO_TOP_FUNCIONES)
+
+        return response
+
+
+def codificaciones_aceptadas(cabecera):
+    """Codificaciones de Accept-Encoding, sin las rechazadas explícitamente con q=0"""
+    aceptadas = set()
+    for entrada in cabecera.split(','):
+        nombre, _, parametros = entrada.partition(';')
+        parametros = parametros.replace(' ', '')
+        if parametros.startswith('q=') and not parametros[2:].strip('0.'):
+            continue
+        if nombre.strip():
+            aceptadas.add(nombre.strip().lower())
+    return aceptadas
+
+
+def comprimir_zstd_secuencia(secuencia, nivel):
+    compresor = zstandard.ZstdCompressor(level=nivel).compressobj()
+    for fragmento in secuencia:
+        datos = compresor.compress(fragmento)
+        if datos:
+            yield datos
+    yield compresor.flush()
+
+
+class CompresionMiddleware:
+    """Comprime respuestas según su tipo de contenido y tamaño"""
+
+    def __init__(self, get_response):
+        if not settings.COMPRESION_HABILITADA:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.tipos = set(settings.COMPRESION_TIPOS)
+        self.min_bytes = settings.COMPRESION_MIN_BYTES
+        self.nivel_zstd = settings.COMPRESION_NIVEL_ZSTD
+        # Orden de preferencia; zstd solo si la dependencia opcional está instalada
+        self.codecs = [
+            codec for codec in settings.COMPRESION_CODECS
+            if codec == 'gzip' or (codec == 'zstd' and zstandard is not None)
+        ]
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.has_header('Content-Encoding'):
+            return response
+        tipo = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if tipo not in self.tipos:
+            return response
+        # Por debajo del umbral la cabecera y el CPU cuestan más de lo que se ahorra
+        if not response.streaming and len(response.content) < self.min_bytes:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        aceptadas = codificaciones_aceptadas(request.headers.get('Accept-Encoding', ''))
+        codec = next((c for c in self.codecs if c in aceptadas), None)
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            if codec == 'zstd':
+                response.streaming_content = comprimir_zstd_secuencia(
+                    response.streaming_content, self.nivel_zstd)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, max_random_bytes=GZIP_MAX_BYTES_ALEATORIOS)
+            del response.headers['Content-Length']
+        else:
+            original = len(response.content)
+            if codec == 'zstd':
+                comprimido = zstandard.ZstdCompressor(level=self.nivel_zstd).compress(response.content)
+            else:
+                comprimido = compress_string(response.content, max_random_bytes=GZIP_MAX_BYTES_ALEATORIOS)
+            if len(comprimido) >= original:
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+
+            metricas = metricas_actuales()
+            if metricas is not None:
+                metricas.extra.update({'bytes_contenido': original, 'bytes_comprimidos': len(comprimido)})
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec
+        return response
+
+
+def no_modificado(request, etag, mtime):
+    """Precondiciones GET/HEAD (RFC 9110 13.2.2): If-None-Match con comparación débil
+    sobre la lista de ETags y, solo si no viene, If-Modified-Since"""
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        fuertes = {e[2:] if e.startswith('W/') else e for e in parse_etags(if_none_match)}
+        return '*' in fuertes or etag in fuertes
+    desde = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return desde is not None and mtime <= desde
+
+
+class EstaticosMiddleware:
+    """Sirve los archivos de collectstatic desde un índice en memoria"""
+
+    def __init__(self, get_response):
+        if not settings.ESTATICOS_SERVIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefijo = '/' + settings.STATIC_URL.strip('/') + '/'
+        self.archivos = indexar_estaticos(settings.STATIC_ROOT)
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefijo):
+            return self.get_response(request)
+        archivo = self.archivos.get(request.path[len(self.prefijo):])
+        if archivo is None:
+            return self.get_response(request)
+
+        aceptadas = codificaciones_aceptadas(request.headers.get('Accept-Encoding', ''))
+        codec = next(
+            (c for c, _ in VARIANTES if c in archivo['variantes'] and c in aceptadas), 'identity'
+        )
+        ruta, tamano = archivo['variantes'][codec]
+        etag = archivo['etag'] if codec == 'identity' else f'{archivo["etag"][:-1]}-{codec}"'
+
+        if no_modificado(request, etag, archivo['mtime']):
+            response = HttpResponseNotModified()
+        elif request.method == 'HEAD':
+            response = HttpResponse(content_type=archivo['content_type'])
+            response.headers['Content-Length'] = str(tamano)
+        else:
+            response = FileResponse(open(ruta, 'rb'), content_type=archivo['content_type'])
+
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = archivo['last_modified']
+        response.headers['Cache-Control'] = archivo['cache_control']
+        if len(archivo['variantes']) > 1:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        if codec != 'identity':
+            response.headers['Content-Encoding'] = codec
+        return response
@@ -0,0 +1,126 @@
+"""
+Perfilador por muestreo de bajo costo para las corridas de carga.
+
+Un hilo en segundo plano lee sys._current_frames() a una frecuencia fija y
+acumula las pilas de los hilos que están atendiendo un request en formato
+"collapsed stack" (func_a;func_b;func_c N), el que consumen los flamegraphs.
+A diferencia de cProfile no instrumenta cada llamada, por lo que puede quedar
+activo durante toda una prueba de estrés.
+
+Cada proceso vuelca periódicamente sus muestras en
+<MUESTREO_DIR>/<ejecucion>-<pid>.folded; generar_flamegraph.py las combina.
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Solo se cuentan pilas que atraviesan el manejador de requests de Django;
+# los hilos ociosos (accept, selectores, colas) no aportan al flamegraph.
+MARCADOR_REQUEST = os.path.join('django', 'core', 'handlers')
+
+
+def etiqueta_frame(frame):
+    codigo = frame.f_code
+    return f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+
+
+def colapsar_pila(frame, solo_requests=True):
+    """Pila de un hilo en formato collapsed (raíz primero) o None si se descarta"""
+    etiquetas = []
+    en_request = not solo_requests
+    while frame is not None:
+        etiquetas.append(etiqueta_frame(frame))
+        if not en_request and MARCADOR_REQUEST in frame.f_code.co_filename:
+            en_request = True
+        frame = frame.f_back
+    if not en_request:
+        return None
+    return ';'.join(reversed(etiquetas))
+
+
+class MuestreadorPerfil:
+    """Muestrea las pilas de todos los hilos del proceso desde un hilo daemon"""
+
+    def __init__(self, directorio, ejecucion='servidor', frecuencia_hz=100,
+                 intervalo_volcado=2.0, solo_requests=True):
+        self.directorio = directorio
+        self.ejecucion = ejecucion
+        self.intervalo = 1.0 / frecuencia_hz
+        self.intervalo_volcado = intervalo_volcado
+        self.solo_requests = solo_requests
+        self.muestras = Counter()
+        self.total_muestras = 0
+        self._detener = threading.Event()
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    @property
+    def ruta(self):
+        return os.path.join(self.directorio, f"{self.ejecucion}-{os.getpid()}.folded")
+
+    def iniciar(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        self._hilo = threading.Thread(target=self._bucle, name='muestreador-perfil', daemon=True)
+        self._hilo.start()
+        atexit.register(self.detener)
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join(timeout=1)
+        self.volcar()
+
+    def _bucle(self):
+        propio = threading.get_ident()
+        proximo_volcado = time.monotonic() + self.intervalo_volcado
+
+        while not self._detener.wait(self.intervalo):
+            pilas = [
+                colapsar_pila(frame, self.solo_requests)
+                for ident, frame in sys._current_frames().items()
+                if ident != propio
+            ]
+            with self._lock:
+                for pila in pilas:
+                    if pila:
+                        self.muestras[pila] += 1
+                        self.total_muestras += 1
+
+            if time.monotonic() >= proximo_volcado:
+                self.volcar()
+                proximo_volcado = time.monotonic() + self.intervalo_volcado
+
+    def volcar(self):
+        """Escribe las muestras acumuladas (reemplazo atómico del archivo del proceso)"""
+        with self._lock:
+            lineas = [f"{pila} {cuenta}\n" for pila, cuenta in self.muestras.items()]
+        if not lineas:
+            return
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, 'w') as archivo:
+            archivo.writelines(lineas)
+        os.replace(temporal, self.ruta)
+
+
+_muestreador = None
+
+
+def iniciar_muestreo():
+    """Arranca el muestreador del proceso actual según settings (una sola vez)"""
+    global _muestreador
+    from django.conf import settings
+
+    if _muestreador is not None:
+        return _muestreador
+
+    _muestreador = MuestreadorPerfil(
+        settings.MUESTREO_DIR,
+        ejecucion=settings.MUESTREO_EJECUCION,
+        frecuencia_hz=settings.MUESTREO_HZ,
+    )
+    _muestreador.iniciar()
+    return _muestreador
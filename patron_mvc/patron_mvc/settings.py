@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import json
+import os
 from pathlib import Path
 
+from patron_mvc.sqlite_backend.pragmas import PRAGMAS_POR_DEFECTO
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -23,7 +27,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-@w2#tg#1#(kwdb97xrf3cixli%tey=i=^**dhk4wr6a6mj9ock'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = ['*']
 
@@ -45,6 +49,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'patron_mvc.middleware.EstaticosMiddleware',
+    'patron_mvc.middleware.InstrumentacionMiddleware',
+    'patron_mvc.middleware.PerfiladoMiddleware',
+    'patron_mvc.middleware.CompresionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,6 +75,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'patron_mvc.estaticos.assets_vendor',
             ],
         },
     },
@@ -78,13 +87,99 @@ WSGI_APPLICATION = 'patron_mvc.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Los PRAGMAs se aplican en cada conexión nueva (patron_mvc.sqlite_backend).
+# SQLITE_PRAGMAS acepta un JSON para sobrescribirlos, p. ej.
+# SQLITE_PRAGMAS='{"journal_mode": "DELETE", "synchronous": "FULL"}'
+# journal_mode=WAL es persistente (queda en la cabecera del archivo): db.sqlite3 está
+# versionada y conserva el rollback journal; WAL solo se aplica a las bases generadas o
+# snapshots indicados con DJANGO_DB_NAME, salvo que SQLITE_PRAGMAS diga otra cosa.
+SQLITE_PRAGMAS = {
+    **PRAGMAS_POR_DEFECTO,
+    **({} if os.environ.get('DJANGO_DB_NAME') else {'journal_mode': 'DELETE'}),
+    **json.loads(os.environ.get('SQLITE_PRAGMAS', '{}')),
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': 'patron_mvc.sqlite_backend',
+        # DJANGO_DB_NAME permite generar un snapshot (snapshots_dataset.py) en un archivo aparte
+        'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+        # Conexiones persistentes por hilo, verificadas antes de reutilizarse
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pragmas': SQLITE_PRAGMAS,
+        },
+    }
+}
+
+
+# Cache de dos niveles (patron_mvc.cache): L1 LRU en proceso + L2 compartida.
+# CACHE_L2 selecciona el backend compartido: 'locmem', 'file' o 'sqlite'
+# ('sqlite' requiere ejecutar antes: python manage.py createcachetable)
+CACHE_L2 = os.environ.get('CACHE_L2', 'locmem')
+
+BACKENDS_CACHE_L2 = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'patron_mvc-l2',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache_l2',
+    },
+    'sqlite': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_l2',
+    },
+}
+
+CACHES = {
+    'default': {
+        **BACKENDS_CACHE_L2[CACHE_L2],
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
 
+# Contadores de versión de la cache (compartidos por todos los procesos, sin desalojo)
+CACHE_VERSIONES = os.environ.get('CACHE_VERSIONES', BASE_DIR / 'cache_versiones.sqlite3')
+
+CACHE_TIMEOUT = 300
+CACHE_L1_MAX_ENTRADAS = int(os.environ.get('CACHE_L1_MAX_ENTRADAS', 1024))
+
+# Endpoints auxiliares de los laboratorios (/lab/...)
+LAB_HABILITADO = os.environ.get('LAB_HABILITADO', '1') == '1'
+
+# Instrumentación por request (cabecera Server-Timing + trazas JSONL por proceso)
+INSTRUMENTACION_HABILITADA = os.environ.get('INSTRUMENTACION', '1') == '1'
+TRAZAS_DIR = BASE_DIR.parent / 'resultados' / 'trazas'
+TRAZAS_MAX_BYTES = 10 * 1024 * 1024
+TRAZAS_BACKUPS = 5
+
+# Perfilado cProfile bajo demanda: con PERFILADO=1, solo se perfilan los requests
+# que envían la cabecera X-Perfilar o el parámetro ?perfilar=1
+PERFILADO_HABILITADO = os.environ.get('PERFILADO', '0') == '1'
+PERFILES_DIR = BASE_DIR.parent / 'resultados' / 'perfiles'
+PERFILADO_TOP_FUNCIONES = 10
+
+# Perfilador por muestreo (collapsed stacks para flamegraphs) durante las corridas de carga
+MUESTREO_HABILITADO = os.environ.get('MUESTREO', '0') == '1'
+MUESTREO_HZ = int(os.environ.get('MUESTREO_HZ', '100'))
+MUESTREO_EJECUCION = os.environ.get('MUESTREO_EJECUCION', 'servidor')
+MUESTREO_DIR = BASE_DIR.parent / 'resultados' / 'muestreo'
+
+# Compresión de respuestas: codecs en orden de preferencia (zstd requiere el paquete
+# opcional zstandard) y solo para tipos de texto a partir de COMPRESION_MIN_BYTES
+COMPRESION_HABILITADA = os.environ.get('COMPRESION', '1') == '1'
+COMPRESION_CODECS = os.environ.get('COMPRESION_CODECS', 'zstd,gzip').split(',')
+COMPRESION_MIN_BYTES = int(os.environ.get('COMPRESION_MIN_BYTES', '1024'))
+COMPRESION_NIVEL_ZSTD = 3
+COMPRESION_TIPOS = (
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'image/svg+xml',
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,6 +216,29 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATICFILES_DIRS = [BASE_DIR.parent / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic genera nombres con hash de contenido y variantes .gz/.zst
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'patron_mvc.estaticos.EstaticosComprimidosStorage'},
+}
+
+# Assets de base.html: se sirven desde static/vendor/ una vez descargados con
+# vendorizar_assets.py y, mientras tanto, desde el CDN de la versión fijada
+CDN_ASSETS = "https://cdn.jsdelivr.net/npm"
+ASSETS_VENDOR = {
+    'bootstrap_css': ('vendor/bootstrap/css/bootstrap.min.css',
+                      f"{CDN_ASSETS}/bootstrap@5.3.0/dist/css/bootstrap.min.css"),
+    'bootstrap_icons_css': ('vendor/bootstrap-icons/bootstrap-icons.css',
+                            f"{CDN_ASSETS}/bootstrap-icons@1.10.0/font/bootstrap-icons.css"),
+    'bootstrap_js': ('vendor/bootstrap/js/bootstrap.bundle.min.js',
+                     f"{CDN_ASSETS}/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"),
+}
+
+# Con DEBUG runserver sirve los estáticos; sin DEBUG (gunicorn) los sirve EstaticosMiddleware
+ESTATICOS_SERVIR = os.environ.get('ESTATICOS_SERVIR', '0' if DEBUG else '1') == '1'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -0,0 +1,33 @@
+"""
+Backend SQLite con capa de inicialización de conexiones.
+
+Extiende el backend sqlite3 de Django para aplicar los PRAGMAs definidos en
+DATABASES[...]['OPTIONS']['pragmas'] cada vez que se abre una conexión, y
+para que CONN_HEALTH_CHECKS verifique realmente las conexiones persistentes.
+"""
+
+from django.db.backends.sqlite3 import base
+
+from .pragmas import PRAGMAS_POR_DEFECTO, aplicar_pragmas
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        # 'pragmas' no es un argumento de sqlite3.connect()
+        self.pragmas = kwargs.pop('pragmas', PRAGMAS_POR_DEFECTO)
+        return kwargs
+    
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        return aplicar_pragmas(conn, self.pragmas)
+    
+    def is_usable(self):
+        # El backend base siempre responde True; con conexiones persistentes
+        # se verifica que la conexión siga respondiendo antes de reutilizarla.
+        try:
+            self.connection.execute("SELECT 1")
+        except self.Database.Error:
+            return False
+        return True
@@ -0,0 +1,48 @@
+"""
+PRAGMAs de SQLite aplicados a cada conexión nueva.
+
+Módulo sin dependencias de Django para que los benchmarks puedan aplicar
+exactamente la misma configuración sobre conexiones sqlite3 directas.
+"""
+
+# Orden de aplicación: busy_timeout primero para que el cambio de
+# journal_mode espere a otros escritores en lugar de fallar.
+ORDEN_PRAGMAS = [
+    'busy_timeout',
+    'journal_mode',
+    'synchronous',
+    'cache_size',
+    'mmap_size',
+    'temp_store',
+]
+
+PRAGMAS_POR_DEFECTO = {
+    'busy_timeout': 5000,           # ms esperando un lock antes de "database is locked"
+    'journal_mode': 'WAL',          # lectores concurrentes con un escritor
+    'synchronous': 'NORMAL',        # seguro con WAL, sin fsync por commit
+    'cache_size': -64000,           # negativo = KiB (64 MB de page cache)
+    'mmap_size': 268435456,         # 256 MB de lecturas vía mmap
+    'temp_store': 'MEMORY',         # tablas temporales y ordenamientos en RAM
+}
+
+
+def aplicar_pragmas(conn, pragmas):
+    """Aplica los PRAGMAs indicados sobre una conexión sqlite3 abierta"""
+    pendientes = dict(pragmas)
+    for nombre in ORDEN_PRAGMAS:
+        if nombre in pendientes:
+            conn.execute(f"PRAGMA {nombre} = {pendientes.pop(nombre)}")
+    
+    # PRAGMAs adicionales no contemplados en el orden por defecto
+    for nombre, valor in pendientes.items():
+        conn.execute(f"PRAGMA {nombre} = {valor}")
+    
+    return conn
+
+
+def leer_pragmas(conn, nombres=None):
+    """Devuelve los valores efectivos de los PRAGMAs en la conexión"""
+    return {
+        nombre: conn.execute(f"PRAGMA {nombre}").fetchone()[0]
+        for nombre in (nombres or ORDEN_PRAGMAS)
+    }
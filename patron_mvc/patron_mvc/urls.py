@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import redirect
+from . import views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -8,5 +9,6 @@ urlpatterns = [
     path('clientes/', include('apps.clientes.urls')),
     path('vehiculos/', include('apps.vehiculos.urls')),
     path('ordenes/', include('apps.ordenes.urls')),
-    path('', lambda request: redirect('accounts:login')),
+    path('lab/cache/', views.estadisticas_cache, name='lab_cache'),
+    path('', lambda request: redirect('accounts:list' if request.user.is_authenticated else 'accounts:login')),
 ]
\ No newline at end of file
@@ -0,0 +1,9 @@
+from django.conf import settings
+from django.http import JsonResponse, Http404
+from patron_mvc.cache import cache_dos_niveles
+
+def estadisticas_cache(request):
+    """Estadísticas de la cache de dos niveles (hits/misses/evictions) sumadas entre procesos"""
+    if not settings.LAB_HABILITADO:
+        raise Http404
+    return JsonResponse(cache_dos_niveles.estadisticas_agregadas())
\ No newline at end of file
@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'patron_mvc.settings')
 
 application = get_wsgi_application()
+
+if settings.MUESTREO_HABILITADO:
+    from .muestreo import iniciar_muestreo
+    iniciar_muestreo()
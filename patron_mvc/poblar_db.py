@@ -4,6 +4,9 @@ Script para poblar la base de datos con datos de prueba realistas
 """
 import os
 import sys
+import argparse
+import csv
+import time
 import django
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -17,6 +20,7 @@ from apps.accounts.models import CustomUser
 from apps.clientes.models import Cliente
 from apps.vehiculos.models import Vehiculo
 from apps.ordenes.models import OrdenTrabajo
+from patron_mvc.distribuciones import UNIFORME, crear_distribucion, validar_distribucion
 
 def crear_usuarios():
     """Crear usuarios del sistema"""
@@ -202,7 +206,7 @@ def crear_clientes():
     
     print(f"✓ Clientes creados: {Cliente.objects.count()}")
 
-def crear_vehiculos():
+def crear_vehiculos(distribucion=UNIFORME):
     """Crear vehículos para los clientes"""
     print("Creando vehículos...")
     
@@ -225,54 +229,58 @@ def crear_vehiculos():
     combustibles = ['GASOLINA', 'DIESEL', 'GAS']
     transmisiones = ['MANUAL', 'AUTOMATICA']
     
-    clientes = list(Cliente.objects.all())
+    clientes = list(Cliente.objects.order_by('pk'))
     created_by = CustomUser.objects.filter(role='RECEPCIONISTA').first()
     
-    # Crear vehículos para cada cliente
-    for cliente in clientes:
+    if distribucion == UNIFORME:
         # Cada cliente puede tener 1-3 vehículos
-        num_vehiculos = random.randint(1, 3)
+        duenos = [cliente for cliente in clientes for _ in range(random.randint(1, 3))]
+    else:
+        # El mismo total esperado (2 por cliente), concentrado en unos pocos clientes de flota
+        elegir_cliente = crear_distribucion(distribucion, len(clientes))
+        duenos = [clientes[elegir_cliente.muestra(random)] for _ in range(2 * len(clientes))]
+    
+    # Crear vehículos para cada cliente
+    for cliente in duenos:
+        marca, modelos = random.choice(marcas_modelos)
+        modelo = random.choice(modelos)
+        anio = random.randint(2015, 2024)
+        color = random.choice(colores)
+        tipo_vehiculo = random.choice(tipos_vehiculo)
+        combustible = random.choice(combustibles)
+        transmision = random.choice(transmisiones)
+        kilometraje = random.randint(5000, 150000)
         
-        for i in range(num_vehiculos):
-            marca, modelos = random.choice(marcas_modelos)
-            modelo = random.choice(modelos)
-            anio = random.randint(2015, 2024)
-            color = random.choice(colores)
-            tipo_vehiculo = random.choice(tipos_vehiculo)
-            combustible = random.choice(combustibles)
-            transmision = random.choice(transmisiones)
-            kilometraje = random.randint(5000, 150000)
-            
-            # Generar placa única
+        # Generar placa única
+        placa = f"{random.choice(['ABC', 'DEF', 'GHI', 'JKL', 'MNO', 'PQR', 'STU', 'VWX', 'YZ1'])}-{random.randint(100, 999)}"
+        
+        # Verificar que la placa no exista
+        while Vehiculo.objects.filter(placa=placa).exists():
             placa = f"{random.choice(['ABC', 'DEF', 'GHI', 'JKL', 'MNO', 'PQR', 'STU', 'VWX', 'YZ1'])}-{random.randint(100, 999)}"
-            
-            # Verificar que la placa no exista
-            while Vehiculo.objects.filter(placa=placa).exists():
-                placa = f"{random.choice(['ABC', 'DEF', 'GHI', 'JKL', 'MNO', 'PQR', 'STU', 'VWX', 'YZ1'])}-{random.randint(100, 999)}"
-            
-            # Generar VIN opcional
-            vin = f"WBA{random.randint(100000, 999999)}{random.randint(10000, 99999)}" if random.random() > 0.5 else ""
-            
-            Vehiculo.objects.create(
-                cliente=cliente,
-                tipo_vehiculo=tipo_vehiculo,
-                marca=marca,
-                modelo=modelo,
-                anio=anio,
-                placa=placa,
-                color=color,
-                tipo_combustible=combustible,
-                tipo_transmision=transmision,
-                kilometraje=kilometraje,
-                vin=vin,
-                observaciones=f"Vehículo {marca} {modelo} {anio} del cliente {cliente.get_nombre_completo()}",
-                created_by=created_by,
-                is_active=True
-            )
+        
+        # Generar VIN opcional
+        vin = f"WBA{random.randint(100000, 999999)}{random.randint(10000, 99999)}" if random.random() > 0.5 else ""
+        
+        Vehiculo.objects.create(
+            cliente=cliente,
+            tipo_vehiculo=tipo_vehiculo,
+            marca=marca,
+            modelo=modelo,
+            anio=anio,
+            placa=placa,
+            color=color,
+            tipo_combustible=combustible,
+            tipo_transmision=transmision,
+            kilometraje=kilometraje,
+            vin=vin,
+            observaciones=f"Vehículo {marca} {modelo} {anio} del cliente {cliente.get_nombre_completo()}",
+            created_by=created_by,
+            is_active=True
+        )
     
     print(f"✓ Vehículos creados: {Vehiculo.objects.count()}")
 
-def crear_ordenes():
+def crear_ordenes(distribucion=UNIFORME):
     """Crear órdenes de trabajo"""
     print("Creando órdenes de trabajo...")
     
@@ -327,13 +335,14 @@ def crear_ordenes():
     estados = ['RECIBIDO', 'DIAGNOSTICO', 'PRESUPUESTO', 'APROBADO', 'EN_TRABAJO', 'FINALIZADO', 'ENTREGADO', 'CANCELADO']
     prioridades = ['BAJA', 'NORMAL', 'ALTA', 'URGENTE']
     
-    vehiculos = list(Vehiculo.objects.all())
+    vehiculos = list(Vehiculo.objects.order_by('pk'))
+    elegir_vehiculo = crear_distribucion(distribucion, len(vehiculos))
     mecanicos = list(CustomUser.objects.filter(role='MECANICO'))
     created_by = CustomUser.objects.filter(role='RECEPCIONISTA').first()
     
     # Crear órdenes
     for i in range(75):  # 75 órdenes para tener variedad
-        vehiculo = random.choice(vehiculos)
+        vehiculo = vehiculos[elegir_vehiculo.muestra(random)]
         mecanico = random.choice(mecanicos)
         
         # Fecha de ingreso entre 1 y 30 días atrás
@@ -377,6 +386,7 @@ def crear_ordenes():
             numero_orden=numero_orden,
             cliente=vehiculo.cliente,
             vehiculo=vehiculo,
+            mecanico_asignado=mecanico,
             fecha_ingreso=fecha_ingreso,
             fecha_estimada_entrega=fecha_estimada.date(),
             fecha_entrega_real=fecha_entrega_real,
@@ -396,32 +406,89 @@ def crear_ordenes():
     
     print(f"✓ Órdenes creadas: {OrdenTrabajo.objects.count()}")
 
-def limpiar_datos_existentes():
-    """Limpiar datos de prueba existentes"""
-    print("Limpiando datos existentes...")
+def limpiar_datos_existentes(modo='rapido'):
+    """Limpiar datos de prueba existentes
     
-    # Limpiar en orden inverso de dependencias
-    OrdenTrabajo.objects.all().delete()
-    Vehiculo.objects.all().delete()
-    Cliente.objects.all().delete()
+    'rapido': DELETE por tabla en SQL, reinicio de secuencias y ANALYZE.
+    'cascada': delete() del ORM, que respeta on_delete y señales (limpiezas parciales).
+    """
+    print(f"Limpiando datos existentes ({modo})...")
+    inicio = time.perf_counter()
+    
+    if modo == 'rapido':
+        from generador_datos import vaciar_tablas
+        vaciar_tablas()
+    else:
+        # Limpiar en orden inverso de dependencias
+        OrdenTrabajo.objects.all().delete()
+        Vehiculo.objects.all().delete()
+        Cliente.objects.all().delete()
     # Mantener algunos usuarios base
     CustomUser.objects.exclude(username__in=['admin', 'gerente']).delete()
     
-    print("✓ Datos existentes limpiados")
+    print(f"✓ Datos existentes limpiados en {time.perf_counter() - inicio:.2f}s")
+
+def benchmark_procesos(escala, semilla, lista_procesos):
+    """Regenera el mismo dataset con distinto número de workers y compara el throughput"""
+    from generador_datos import generar_dataset_paralelo
+
+    resultados = []
+    for procesos in lista_procesos:
+        print(f"\n--- {procesos} proceso(s) ---")
+        limpiar_datos_existentes()
+        crear_usuarios()
+        resumen = generar_dataset_paralelo(escala, semilla, procesos)
+        total = sum(resumen['tamanos'].values())
+        resultados.append({
+            'procesos': procesos,
+            'escala': escala,
+            'filas': total,
+            'duracion_s': round(resumen['duracion'], 2),
+            'filas_por_s': round(total / resumen['duracion']),
+            **{f"{tabla}_por_s": round(v) for tabla, v in resumen['velocidades'].items()},
+        })
 
-def main():
+    salida = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'resultados', 'generacion_paralela.csv')
+    os.makedirs(os.path.dirname(salida), exist_ok=True)
+    with open(salida, 'w', newline='') as archivo:
+        writer = csv.DictWriter(archivo, fieldnames=list(resultados[0]))
+        writer.writeheader()
+        writer.writerows(resultados)
+
+    print("\n📊 Throughput por número de procesos:")
+    base = resultados[0]['filas_por_s']
+    for fila in resultados:
+        print(f"   {fila['procesos']:>3} procesos: {fila['filas_por_s']:>8,} filas/s "
+              f"(x{fila['filas_por_s'] / base:.2f})")
+    print(f"✓ Resultados guardados en {os.path.normpath(salida)}")
+    return resultados
+
+def main(escala=None, semilla=42, tamano_lote=None, procesos=None,
+         distribucion_vehiculos=UNIFORME, distribucion_ordenes=UNIFORME, limpieza='rapido'):
     """Función principal"""
     print("🚀 Iniciando población de la base de datos...")
     print("=" * 50)
     
     try:
         # Limpiar datos existentes automáticamente
-        limpiar_datos_existentes()
+        limpiar_datos_existentes(limpieza)
         
         crear_usuarios()
-        crear_clientes()
-        crear_vehiculos()
-        crear_ordenes()
+        if escala and procesos:
+            # Workers construyen las filas por shards; un único escritor inserta
+            from generador_datos import generar_dataset_paralelo
+            generar_dataset_paralelo(escala, semilla, procesos,
+                                     distribucion_vehiculos=distribucion_vehiculos,
+                                     distribucion_ordenes=distribucion_ordenes)
+        elif escala:
+            # Dataset sintético grande (bulk_create por lotes, sin save() por fila)
+            from generador_datos import TAMANO_LOTE, generar_dataset
+            generar_dataset(escala, semilla, tamano_lote or TAMANO_LOTE,
+                            distribucion_vehiculos, distribucion_ordenes)
+        else:
+            crear_clientes()
+            crear_vehiculos(distribucion_vehiculos)
+            crear_ordenes(distribucion_ordenes)
         
         print("=" * 50)
         print("✅ Base de datos poblada exitosamente!")
@@ -438,4 +505,25 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Pobla la base de datos con datos de prueba")
+    parser.add_argument('--escala', type=float,
+                        help="Dataset sintético: escala 1 = 10.000 órdenes, 100 ≈ 1M órdenes")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla del generador aleatorio")
+    parser.add_argument('--lote', type=int, help="Filas por lote de bulk_create")
+    parser.add_argument('--procesos', type=int,
+                        help="Construir las filas en N procesos (requiere --escala)")
+    parser.add_argument('--benchmark-procesos', type=int, nargs='+', metavar='N',
+                        help="Comparar throughput de generación con cada número de procesos")
+    parser.add_argument('--dist-vehiculos', type=validar_distribucion, default=UNIFORME,
+                        help="Vehículos por cliente: 'uniforme' o 'zipf:<s>' (clientes de flota)")
+    parser.add_argument('--dist-ordenes', type=validar_distribucion, default=UNIFORME,
+                        help="Órdenes por vehículo: 'uniforme' o 'zipf:<s>'")
+    parser.add_argument('--limpieza', choices=['rapido', 'cascada'], default='rapido',
+                        help="rapido: DELETE en SQL + ANALYZE; cascada: delete() del ORM con on_delete y señales")
+    args = parser.parse_args()
+    
+    if args.benchmark_procesos:
+        benchmark_procesos(args.escala or 1, args.semilla, args.benchmark_procesos)
+    else:
+        main(args.escala, args.semilla, args.lote, args.procesos,
+             args.dist_vehiculos, args.dist_ordenes, args.limpieza)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Perfiles de Carga
+Perfiles declarativos de concurrencia para la carga cerrada, expresados como
+texto para pasarlos por línea de comandos (como los programas de carga abierta):
+
+    rampa:1-64:8:10          de 1 a 64 usuarios en 8 pasos lineales de 10 s
+    escalones:1,2,4,8,16:10  concurrencias explícitas, 10 s cada una
+    soak:16:600:60           16 usuarios durante 600 s, registrados en ventanas de 60 s
+
+Cada paso se mide por separado. detectar_saturacion busca el codo de la curva
+concurrencia -> throughput: el último paso antes de que el throughput deje de
+crecer mientras la latencia se dispara. Su throughput es la capacidad del
+endpoint. analizar_soak compara la primera y la última ventana.
+"""
+
+# Un paso satura si el throughput crece menos que esta fracción del aumento de usuarios...
+EFICIENCIA_MARGINAL_MIN = 0.2
+# ...y el P99 crece más que este factor respecto del paso anterior
+FACTOR_LATENCIA_MAX = 1.5
+
+
+def parsear_perfil(perfil):
+    """Texto del perfil -> {'perfil', 'tipo', 'pasos': [(usuarios, segundos), ...]}"""
+    tipo, _, parametros = perfil.partition(':')
+    partes = parametros.split(':')
+    try:
+        if tipo == 'rampa' and len(partes) == 3:
+            desde, _, hasta = partes[0].partition('-')
+            desde, hasta, num_pasos = int(desde), int(hasta), int(partes[1])
+            segundos = float(partes[2])
+            if num_pasos < 2:
+                raise ValueError
+            pasos = [(round(desde + (hasta - desde) * i / (num_pasos - 1)), segundos) for i in range(num_pasos)]
+        elif tipo == 'escalones' and len(partes) == 2:
+            pasos = [(int(usuarios), float(partes[1])) for usuarios in partes[0].split(',')]
+        elif tipo == 'soak' and len(partes) == 3:
+            usuarios, total, ventana = int(partes[0]), float(partes[1]), float(partes[2])
+            pasos = [(usuarios, min(ventana, total - inicio)) for inicio in frange(0, total, ventana)]
+        else:
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"Perfil no válido: {perfil!r} (use 'rampa:1-64:8:10', "
+                         f"'escalones:1,2,4,8:10' o 'soak:16:600:60')") from None
+    if not pasos or any(usuarios < 1 or segundos <= 0 for usuarios, segundos in pasos):
+        raise ValueError(f"Perfil no válido: {perfil!r} (usuarios >= 1 y segundos > 0)")
+    return {'perfil': perfil, 'tipo': tipo, 'pasos': pasos}
+
+
+def frange(inicio, fin, paso):
+    valor = inicio
+    while valor < fin - 1e-9:
+        yield valor
+        valor += paso
+
+
+def detectar_saturacion(pasos):
+    """Codo de saturación de una lista de resultados por paso (ordenados por usuarios)
+
+    Devuelve el paso de saturación (el último que aún escala), si se alcanzó
+    dentro del perfil, y la capacidad estimada del endpoint en req/s.
+    """
+    pasos = sorted((p for p in pasos if p), key=lambda p: p['usuarios'])
+    if not pasos:
+        return None
+    for anterior, actual in zip(pasos, pasos[1:]):
+        if actual['usuarios'] == anterior['usuarios']:
+            continue
+        aumento_usuarios = actual['usuarios'] / anterior['usuarios'] - 1
+        ganancia = actual['throughput'] / anterior['throughput'] - 1 if anterior['throughput'] else 0
+        factor_latencia = actual['percentil_99'] / anterior['percentil_99'] if anterior['percentil_99'] else 1
+        if ganancia / aumento_usuarios < EFICIENCIA_MARGINAL_MIN and (
+                factor_latencia > FACTOR_LATENCIA_MAX or ganancia < 0):
+            return resumen_saturacion(anterior, saturado=True, siguiente=actual)
+    # Sin codo: la capacidad es al menos el mejor throughput medido
+    return resumen_saturacion(max(pasos, key=lambda p: p['throughput']), saturado=False)
+
+
+def resumen_saturacion(paso, saturado, siguiente=None):
+    return {
+        'saturado': saturado,
+        'usuarios_saturacion': paso['usuarios'],
+        'capacidad_rps': paso['throughput'],
+        'percentil_99_saturacion': paso['percentil_99'],
+        # Lo que cuesta pasar el codo: latencia del paso siguiente
+        'percentil_99_despues': siguiente['percentil_99'] if siguiente else None,
+    }
+
+
+def analizar_soak(ventanas):
+    """Deriva entre la primera y la última ventana de un soak (fugas, caches que crecen, etc.)"""
+    ventanas = [v for v in ventanas if v]
+    if len(ventanas) < 2:
+        return None
+    primera, ultima = ventanas[0], ventanas[-1]
+    return {
+        'ventanas': len(ventanas),
+        'deriva_throughput': ultima['throughput'] / primera['throughput'] - 1 if primera['throughput'] else 0.0,
+        'deriva_percentil_99': ultima['percentil_99'] / primera['percentil_99'] - 1 if primera['percentil_99'] else 0.0,
+        'errores': sum(v['errores'] for v in ventanas),
+    }
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Recursos del Servidor
+Muestreo en segundo plano de los procesos del servidor Django (runserver o
+gunicorn y sus workers) cada ~100 ms: CPU del servidor total y por núcleo,
+RSS, hilos, descriptores abiertos, cambios de contexto y bytes de I/O.
+
+La CPU por núcleo es solo la de los procesos del servidor, no la de toda la
+máquina (que incluiría al generador de carga): el tiempo de CPU de cada hilo
+en el intervalo se atribuye al núcleo en que corrió por última vez
+(/proc/<pid>/task/<tid>/stat en Linux, Process.cpu_num() por proceso en otros
+sistemas). Un hilo que migra dentro del intervalo se cuenta entero en el último.
+
+Cada muestra lleva time.time_ns(), el mismo reloj que la columna enviado_ns
+de muestras_carga.py, para graficar latencia y recursos sobre el mismo eje.
+Las series se guardan como un .npy por columna (mismo formato que las
+muestras por request) en <directorio>/recursos.json + <columna>.npy.
+"""
+
+import os
+import json
+import time
+import threading
+from array import array
+
+import psutil
+
+from muestras_carga import ORDEN_BYTES, escribir_npy
+
+INTERVALO = 0.1
+# Cada cuántos segundos se vuelven a buscar los procesos (gunicorn recicla workers)
+INTERVALO_DESCUBRIMIENTO = 1.0
+ARCHIVO_METADATOS = 'recursos.json'
+TICKS_POR_SEGUNDO = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+# columna -> código de array.array, dtype de numpy equivalente
+COLUMNAS = {
+    'tiempo_ns': ('q', 'i8'),
+    'procesos': ('H', 'u2'),
+    'cpu_servidor': ('d', 'f8'),          # % de un núcleo (200 = dos núcleos completos)
+    'rss_bytes': ('q', 'i8'),
+    'hilos': ('I', 'u4'),
+    'descriptores': ('I', 'u4'),
+    'cambios_contexto': ('q', 'i8'),      # voluntarios + involuntarios en el intervalo
+    'io_lectura_bytes': ('q', 'i8'),      # en el intervalo
+    'io_escritura_bytes': ('q', 'i8'),
+}
+
+
+def procesos_servidor(puerto, pid=None):
+    """Proceso raíz del servidor (pid dado o runserver/gunicorn en el puerto) y sus hijos"""
+    raices = []
+    if pid:
+        try:
+            raices.append(psutil.Process(pid))
+        except psutil.NoSuchProcess:
+            pass
+    else:
+        for proc in psutil.process_iter(['cmdline']):
+            # Se comparan argumentos completos: un `sh -c "... runserver 8002"` no es el servidor
+            argumentos = proc.info['cmdline'] or []
+            es_servidor = 'runserver' in argumentos or any(a.endswith('gunicorn') for a in argumentos)
+            if es_servidor and any(str(puerto) in a for a in argumentos) and proc.pid != os.getpid():
+                raices.append(proc)
+    procesos = {}
+    for raiz in raices:
+        try:
+            for proc in [raiz, *raiz.children(recursive=True)]:
+                procesos[proc.pid] = proc
+        except psutil.NoSuchProcess:
+            pass
+    return list(procesos.values())
+
+
+def cpu_por_hilo(proc):
+    """{tid: (segundos de CPU acumulados, núcleo en que corrió por última vez)}"""
+    directorio = f"/proc/{proc.pid}/task"
+    try:
+        hilos = {}
+        for tid in os.listdir(directorio):
+            with open(f"{directorio}/{tid}/stat") as archivo:
+                # Tras el nombre entre paréntesis: campo 3 (estado) en el índice 0
+                campos = archivo.read().rpartition(')')[2].split()
+            hilos[int(tid)] = ((int(campos[11]) + int(campos[12])) / TICKS_POR_SEGUNDO, int(campos[36]))
+        return hilos
+    except (OSError, IndexError, ValueError):
+        if not hasattr(proc, 'cpu_num'):
+            return {}
+        cpu = proc.cpu_times()
+        return {proc.pid: (cpu.user + cpu.system, proc.cpu_num())}
+
+
+class MuestreadorRecursos:
+    """Hilo que muestrea los procesos del servidor hasta detener()"""
+
+    def __init__(self, puerto=8002, pid=None, intervalo=INTERVALO):
+        self.puerto = puerto
+        self.pid = pid
+        self.intervalo = intervalo
+        self.columnas = {nombre: array(codigo) for nombre, (codigo, _) in COLUMNAS.items()}
+        self.nucleos = [array('d') for _ in range(psutil.cpu_count() or 1)]
+        self.lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._procesos = []
+        self._anteriores = {}
+
+    def __len__(self):
+        return len(self.columnas['tiempo_ns'])
+
+    def iniciar(self):
+        self._procesos = procesos_servidor(self.puerto, self.pid)
+        self._hilo = threading.Thread(target=self._bucle, name='muestreador-recursos', daemon=True)
+        self._hilo.start()
+        return bool(self._procesos)
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join()
+
+    def _bucle(self):
+        siguiente_descubrimiento = time.monotonic() + INTERVALO_DESCUBRIMIENTO
+        while not self._detener.wait(self.intervalo):
+            if time.monotonic() >= siguiente_descubrimiento:
+                self._procesos = procesos_servidor(self.puerto, self.pid)
+                siguiente_descubrimiento += INTERVALO_DESCUBRIMIENTO
+            self.muestrear()
+
+    def contadores(self, proc):
+        """Lecturas acumuladas de un proceso (None si terminó)"""
+        try:
+            with proc.oneshot():
+                cpu = proc.cpu_times()
+                contexto = proc.num_ctx_switches()
+                try:
+                    io = proc.io_counters()
+                    io = (io.read_bytes, io.write_bytes)
+                except (psutil.AccessDenied, AttributeError):
+                    io = (0, 0)
+                return {
+                    't': time.perf_counter(),
+                    'cpu': cpu.user + cpu.system,
+                    'rss': proc.memory_info().rss,
+                    'hilos': proc.num_threads(),
+                    'descriptores': proc.num_fds() if hasattr(proc, 'num_fds') else proc.num_handles(),
+                    'contexto': contexto.voluntary + contexto.involuntary,
+                    'io': io,
+                    'hilos_cpu': cpu_por_hilo(proc),
+                }
+        except (psutil.NoSuchProcess, psutil.ZombieProcess, psutil.AccessDenied):
+            return None
+
+    def muestrear(self):
+        tiempo_ns = time.time_ns()
+        actuales = {}
+        for proc in self._procesos:
+            lectura = self.contadores(proc)
+            if lectura:
+                actuales[proc.pid] = lectura
+
+        # CPU, contexto e I/O son acumulados: se registra la diferencia con la lectura anterior
+        cpu = contexto = lectura_io = escritura_io = 0.0
+        por_nucleo = [0.0] * len(self.nucleos)
+        for pid, lectura in actuales.items():
+            previa = self._anteriores.get(pid)
+            if not previa:
+                continue
+            segundos = lectura['t'] - previa['t']
+            if segundos <= 0:
+                continue
+            cpu += 100 * (lectura['cpu'] - previa['cpu']) / segundos
+            for tid, (cpu_hilo, nucleo) in lectura['hilos_cpu'].items():
+                cpu_previa = previa['hilos_cpu'].get(tid, (0.0,))[0]  # hilo nuevo: todo su uso es del intervalo
+                if nucleo < len(por_nucleo):
+                    por_nucleo[nucleo] += 100 * (cpu_hilo - cpu_previa) / segundos
+            contexto += lectura['contexto'] - previa['contexto']
+            lectura_io += lectura['io'][0] - previa['io'][0]
+            escritura_io += lectura['io'][1] - previa['io'][1]
+        self._anteriores = actuales
+
+        fila = {
+            'tiempo_ns': tiempo_ns,
+            'procesos': len(actuales),
+            'cpu_servidor': cpu,
+            'rss_bytes': sum(lectura['rss'] for lectura in actuales.values()),
+            'hilos': sum(lectura['hilos'] for lectura in actuales.values()),
+            'descriptores': sum(lectura['descriptores'] for lectura in actuales.values()),
+            'cambios_contexto': int(contexto),
+            'io_lectura_bytes': int(lectura_io),
+            'io_escritura_bytes': int(escritura_io),
+        }
+        with self.lock:
+            for nombre, valor in fila.items():
+                self.columnas[nombre].append(valor)
+            for serie, valor in zip(self.nucleos, por_nucleo):
+                serie.append(valor)
+
+    def resumen(self, desde_ns, hasta_ns=None):
+        """Agregados de las muestras en [desde_ns, hasta_ns] para anotar en el resultado de una prueba"""
+        hasta_ns = hasta_ns or time.time_ns()
+        with self.lock:
+            tiempos = self.columnas['tiempo_ns']
+            indices = [i for i, t in enumerate(tiempos) if desde_ns <= t <= hasta_ns]
+            if not indices:
+                return {}
+            valores = {nombre: [columna[i] for i in indices] for nombre, columna in self.columnas.items()}
+            nucleos = [max(serie[i] for i in indices) for serie in self.nucleos]
+        return {
+            'recursos_muestras': len(indices),
+            'cpu_servidor_promedio': sum(valores['cpu_servidor']) / len(indices),
+            'cpu_servidor_max': max(valores['cpu_servidor']),
+            'cpu_nucleo_max': max(nucleos),
+            'rss_max_mb': max(valores['rss_bytes']) / 2**20,
+            'hilos_max': max(valores['hilos']),
+            'descriptores_max': max(valores['descriptores']),
+            'cambios_contexto': sum(valores['cambios_contexto']),
+            'io_lectura_bytes': sum(valores['io_lectura_bytes']),
+            'io_escritura_bytes': sum(valores['io_escritura_bytes']),
+        }
+
+    def guardar(self, directorio, metadatos=None):
+        """Escribe <columna>.npy, cpu_nucleo_<i>.npy y recursos.json; devuelve el directorio"""
+        os.makedirs(directorio, exist_ok=True)
+        with self.lock:
+            n = len(self)
+            for nombre, (_, dtype) in COLUMNAS.items():
+                escribir_npy(os.path.join(directorio, f"{nombre}.npy"), self.columnas[nombre], ORDEN_BYTES + dtype, n)
+            for i, serie in enumerate(self.nucleos):
+                escribir_npy(os.path.join(directorio, f"cpu_nucleo_{i}.npy"), serie, ORDEN_BYTES + 'f8', n)
+        with open(os.path.join(directorio, ARCHIVO_METADATOS), 'w') as archivo:
+            json.dump({
+                **(metadatos or {}),
+                'muestras': n,
+                'intervalo': self.intervalo,
+                'puerto': self.puerto,
+                'columnas': {**{nombre: dtype for nombre, (_, dtype) in COLUMNAS.items()},
+                             **{f"cpu_nucleo_{i}": 'f8' for i in range(len(self.nucleos))}},
+            }, archivo, indent=2)
+        return directorio
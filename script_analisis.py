@@ -7,6 +7,7 @@ Procesa resultados de todos los laboratorios y genera reportes consolidados
 import json
 import csv
 import os
+import glob
 import statistics
 from datetime import datetime
 import matplotlib.pyplot as plt
@@ -14,11 +15,37 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 
+from histograma_latencias import combinar_histogramas
+
+
+def etiqueta_histograma(fila):
+    """Grupo de un histograma: endpoint y tipo de prueba, más el paso en recorridos y perfiles
+
+    Los pasos de un recorrido comparten URL (GET y POST de login, detalle de
+    orden en varios recorridos) y los de un perfil difieren en concurrencia:
+    combinarlos mezclaría latencias que no son comparables.
+    """
+    etiqueta = f"{fila['url']} ({fila['tipo_prueba']})"
+    paso = fila.get('paso')
+    if paso is None or pd.isna(paso):
+        # Corridas anteriores sin estos campos
+        return etiqueta
+    if fila['tipo_prueba'] == 'recorrido_paso':
+        return f"{etiqueta} {fila['recorrido']}/{paso}"
+    if str(fila['tipo_prueba']).startswith('perfil_'):
+        return f"{etiqueta} {fila['perfil']} paso {int(paso)} ({int(fila['usuarios'])} usuarios)"
+    return etiqueta
+
 class AnalisisEstadistico:
     def __init__(self):
         self.resultados_dir = "resultados"
         self.datos_rendimiento = None
         self.datos_patrones = None
+        self.datos_trazas = None
+        self.stats_trazas = None
+        self.datos_histogramas = None
+        self.stats_histogramas = None
+        self.stats_muestras = None
         
     def cargar_datos(self):
         """Carga datos de todos los laboratorios"""
@@ -40,6 +67,209 @@ class AnalisisEstadistico:
             print("✓ Datos de patrones cargados")
         else:
             print("⚠ No se encontraron datos de patrones")
+        
+        # Cargar trazas del servidor (InstrumentacionMiddleware, un JSONL por proceso)
+        self.datos_trazas = self.cargar_trazas()
+        if self.datos_trazas is not None:
+            print(f"✓ Trazas del servidor cargadas: {len(self.datos_trazas)} requests")
+        
+        # Histogramas HDR de latencia de todas las corridas de laboratorio_rendimiento.py
+        histogramas_jsonl = os.path.join(self.resultados_dir, "histogramas_latencia.jsonl")
+        if os.path.exists(histogramas_jsonl) and os.path.getsize(histogramas_jsonl) > 0:
+            self.datos_histogramas = pd.read_json(histogramas_jsonl, lines=True)
+            print(f"✓ Histogramas de latencia cargados: {self.datos_histogramas['corrida'].nunique()} corridas")
+    
+    def cargar_trazas(self):
+        """Lee los archivos JSONL de trazas (incluidos los rotados)"""
+        archivos = sorted(glob.glob(os.path.join(self.resultados_dir, "trazas", "trazas-*.jsonl*")))
+        frames = [pd.read_json(archivo, lines=True) for archivo in archivos if os.path.getsize(archivo) > 0]
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+    
+    def analisis_trazas(self):
+        """Desglose del tiempo de servidor por vista: SQL, templates y resto de Python"""
+        if self.datos_trazas is None:
+            return None
+        
+        print("=== DESGLOSE DE LATENCIA DEL SERVIDOR ===")
+        
+        trazas = self.datos_trazas.copy()
+        trazas['python_ms'] = (trazas['total_ms'] - trazas['sql_ms'] - trazas['template_ms']).clip(lower=0)
+        
+        desglose = {}
+        for vista, grupo in trazas.groupby('vista'):
+            consultas_cache = grupo['cache_hits'].sum() + grupo['cache_misses'].sum()
+            desglose[vista] = {
+                'requests': len(grupo),
+                'total_promedio': grupo['total_ms'].mean(),
+                'total_p95': grupo['total_ms'].quantile(0.95),
+                'sql_promedio': grupo['sql_ms'].mean(),
+                'consultas_promedio': grupo['sql_count'].mean(),
+                'template_promedio': grupo['template_ms'].mean(),
+                'python_promedio': grupo['python_ms'].mean(),
+                'cache_hit_ratio': grupo['cache_hits'].sum() / consultas_cache if consultas_cache else None,
+            }
+            print(f"✓ {vista}: {desglose[vista]['total_promedio']:.2f}ms "
+                  f"(SQL {desglose[vista]['sql_promedio']:.2f}, "
+                  f"templates {desglose[vista]['template_promedio']:.2f}, "
+                  f"Python {desglose[vista]['python_promedio']:.2f})")
+        
+        # Latencia del cliente = transporte + servidor (SQL + templates + Python),
+        # a partir de la cabecera Server-Timing medida por laboratorio_rendimiento.py
+        desglose_cliente = {}
+        if self.datos_rendimiento is not None and 'servidor_promedio' in self.datos_rendimiento.columns:
+            for _, fila in self.datos_rendimiento.dropna(subset=['servidor_promedio']).iterrows():
+                desglose_cliente[f"{fila['url']} ({fila['tipo_prueba']})"] = {
+                    'cliente_promedio': fila['tiempo_promedio'],
+                    'redirect_promedio': fila.get('tiempo_redirect_promedio', 0),
+                    'transporte_promedio': fila['transporte_promedio'],
+                    'servidor_promedio': fila['servidor_promedio'],
+                    'sql_promedio': fila['sql_promedio'],
+                    'template_promedio': fila['template_promedio'],
+                }
+        
+        self.stats_trazas = {'vistas': desglose, 'cliente': desglose_cliente}
+        return self.stats_trazas
+    
+    def analisis_histogramas(self):
+        """Combina los histogramas de todas las corridas por endpoint y tipo de prueba
+        (y por paso en recorridos y perfiles de carga, ver etiqueta_histograma)
+        
+        Promediar percentiles de distintas corridas no da el percentil del total;
+        sumar los histogramas sí.
+        """
+        if self.datos_histogramas is None:
+            return None
+        
+        print("=== ESPECTRO DE LATENCIA (HISTOGRAMAS COMBINADOS) ===")
+        
+        espectros = {}
+        grupos = self.datos_histogramas.apply(etiqueta_histograma, axis=1)
+        for etiqueta, grupo in self.datos_histogramas.groupby(grupos):
+            combinado = combinar_histogramas(grupo['histograma'])
+            espectro = {'corridas': grupo['corrida'].nunique(), 'requests': combinado.total,
+                        'promedio': combinado.promedio(), **combinado.espectro()}
+            if 'histograma_corregido' in grupo and grupo['histograma_corregido'].notna().any():
+                corregido = combinar_histogramas(grupo['histograma_corregido'].dropna())
+                espectro['corregido'] = corregido.espectro()
+            espectros[etiqueta] = espectro
+            print(f"✓ {etiqueta}: {espectro['requests']} requests en {espectro['corridas']} corridas, "
+                  f"P50 {espectro['p50']:.2f} / P99 {espectro['p99']:.2f} / "
+                  f"P99.9 {espectro['p99.9']:.2f} / P99.99 {espectro['p99.99']:.2f} / "
+                  f"max {espectro['max']:.2f}ms")
+        
+        self.stats_histogramas = espectros
+        return espectros
+    
+    def cargar_muestras(self, corrida=None):
+        """Muestras por request de laboratorio_rendimiento.py, sin copiarlas a memoria
+        
+        Devuelve una lista de pruebas: sus metadatos (muestras.json) y un dict
+        columna -> np.memmap de solo lectura sobre el .npy correspondiente.
+        """
+        patron = os.path.join(self.resultados_dir, "muestras_carga", corrida or "*", "*", "muestras.json")
+        pruebas = []
+        for archivo in sorted(glob.glob(patron)):
+            directorio = os.path.dirname(archivo)
+            with open(archivo, 'r', encoding='utf-8') as f:
+                metadatos = json.load(f)
+            columnas = {
+                columna: np.load(os.path.join(directorio, f"{columna}.npy"), mmap_mode='r')
+                for columna in metadatos['columnas']
+            }
+            pruebas.append({'directorio': directorio, 'metadatos': metadatos, 'columnas': columnas})
+        return pruebas
+    
+    def analisis_muestras(self):
+        """Percentiles exactos y tasa de error por prueba a partir de las muestras crudas"""
+        pruebas = self.cargar_muestras()
+        if not pruebas:
+            return None
+        
+        print("=== MUESTRAS POR REQUEST ===")
+        
+        resumen = {}
+        for prueba in pruebas:
+            metadatos, columnas = prueba['metadatos'], prueba['columnas']
+            if not metadatos['muestras']:
+                continue
+            # El calentamiento se conserva en las muestras pero no entra en los percentiles
+            estables = columnas['enviado_ns'] >= (metadatos.get('estable_desde_ns') or 0)
+            exitosas = columnas['status'] == 200
+            latencias_ms = columnas['latencia_ns'][exitosas & estables] / 1e6
+            envios = columnas['enviado_ns']
+            duracion = (envios.max() - envios.min()) / 1e9
+            clave = f"{metadatos['url']} ({os.path.relpath(prueba['directorio'], self.resultados_dir)})"
+            resumen[clave] = {
+                'muestras': int(metadatos['muestras']),
+                'tasa_error': float(1 - exitosas.mean()),
+                'workers': int(len(np.unique(columnas['worker']))),
+                'tasa_envio': float(metadatos['muestras'] / duracion) if duracion > 0 else None,
+                'calentamiento': int(metadatos.get('calentamiento_requests') or 0),
+                **{f"p{p:g}": float(np.percentile(latencias_ms, p)) if len(latencias_ms) else None
+                   for p in (50, 99, 99.9)},
+            }
+            print(f"✓ {clave}: {resumen[clave]['muestras']} requests, "
+                  f"error {100 * resumen[clave]['tasa_error']:.1f}%, "
+                  f"P99 exacto {resumen[clave]['p99'] or 0:.2f}ms")
+        
+        self.stats_muestras = resumen
+        return resumen
+    
+    def cargar_recursos(self, corrida=None):
+        """Serie de recursos del servidor de una corrida (la más reciente por defecto)
+        
+        Devuelve los metadatos (recursos.json) y un dict columna -> np.memmap;
+        tiempo_ns está en el mismo reloj que enviado_ns de las muestras.
+        """
+        patron = os.path.join(self.resultados_dir, "muestras_carga", corrida or "*", "recursos_servidor", "recursos.json")
+        series = []
+        for archivo in glob.glob(patron):
+            with open(archivo, 'r', encoding='utf-8') as f:
+                series.append((json.load(f), os.path.dirname(archivo)))
+        if not series:
+            return None
+        metadatos, directorio = max(series, key=lambda serie: serie[0]['fecha'])
+        columnas = {
+            columna: np.load(os.path.join(directorio, f"{columna}.npy"), mmap_mode='r')
+            for columna in metadatos['columnas']
+        }
+        return {'directorio': directorio, 'metadatos': metadatos, 'columnas': columnas}
+    
+    def grafico_recursos_servidor(self):
+        """Latencia por request y recursos del servidor sobre el mismo eje de tiempo"""
+        recursos = self.cargar_recursos()
+        if not recursos or not recursos['metadatos']['muestras']:
+            return
+        columnas = recursos['columnas']
+        origen = columnas['tiempo_ns'][0]
+        segundos = (columnas['tiempo_ns'] - origen) / 1e9
+        
+        fig, (ax_latencia, ax_cpu, ax_memoria) = plt.subplots(3, 1, figsize=(14, 10), sharex=True)
+        for prueba in self.cargar_muestras(recursos['metadatos']['corrida']):
+            muestras = prueba['columnas']
+            if len(muestras['enviado_ns']):
+                ax_latencia.scatter((muestras['enviado_ns'] - origen) / 1e9, muestras['latencia_ns'] / 1e6,
+                                    s=2, alpha=0.4, label=prueba['metadatos']['tipo_prueba'])
+        ax_latencia.set_yscale('log')
+        ax_latencia.set_ylabel('Latencia (ms)')
+        ax_latencia.set_title('Latencia por Request y Recursos del Servidor')
+        
+        ax_cpu.plot(segundos, columnas['cpu_servidor'], label='Servidor', color='#FF6B6B')
+        nucleos = sorted(c for c in columnas if c.startswith('cpu_nucleo_'))
+        for nucleo in nucleos:
+            ax_cpu.plot(segundos, columnas[nucleo], linewidth=0.5, alpha=0.5, label=nucleo.replace('cpu_', ''))
+        ax_cpu.set_ylabel('CPU (%)')
+        ax_cpu.legend(loc='upper right', fontsize='small', ncol=min(len(nucleos) + 1, 8))
+        
+        ax_memoria.plot(segundos, columnas['rss_bytes'] / 2**20, color='#45B7D1')
+        ax_memoria.set_ylabel('RSS (MB)')
+        ax_memoria.set_xlabel('Tiempo (s)')
+        
+        plt.tight_layout()
+        plt.savefig('resultados/recursos_servidor.png', dpi=150, bbox_inches='tight')
+        plt.close()
     
     def analisis_rendimiento_estadistico(self):
         """Análisis estadístico detallado de rendimiento"""
@@ -299,6 +529,29 @@ class AnalisisEstadistico:
             plt.savefig('resultados/analisis_rendimiento_completo.png', dpi=300, bbox_inches='tight')
             plt.close()
         
+        # Gráfico de desglose de latencia del servidor por vista
+        if self.stats_trazas and self.stats_trazas['vistas']:
+            por_vista = self.stats_trazas['vistas']
+            vistas = list(por_vista)
+            sql = [por_vista[v]['sql_promedio'] for v in vistas]
+            templates = [por_vista[v]['template_promedio'] for v in vistas]
+            python = [por_vista[v]['python_promedio'] for v in vistas]
+            
+            fig, ax = plt.subplots(figsize=(12, 6))
+            ax.bar(vistas, sql, label='SQL', color='#FF6B6B')
+            ax.bar(vistas, templates, bottom=sql, label='Templates', color='#4ECDC4')
+            ax.bar(vistas, python, bottom=[a + b for a, b in zip(sql, templates)], label='Python', color='#45B7D1')
+            ax.set_title('Desglose del Tiempo de Servidor por Vista')
+            ax.set_ylabel('Tiempo (ms)')
+            ax.tick_params(axis='x', rotation=45)
+            ax.legend()
+            
+            plt.tight_layout()
+            plt.savefig('resultados/desglose_latencia.png', dpi=300, bbox_inches='tight')
+            plt.close()
+        
+        self.grafico_recursos_servidor()
+        
         # Gráfico 2: Métricas de patrones
         if self.datos_patrones is not None:
             fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
@@ -606,6 +859,38 @@ Observer Pattern:
 Score General del Sistema: {stats_patrones['score_general']}/100
             """
         
+        if self.stats_trazas and self.stats_trazas['vistas']:
+            texto += """
+
+Desglose de Latencia del Servidor (trazas por request):
+"""
+            for vista, d in self.stats_trazas['vistas'].items():
+                texto += (f"- {vista}: {d['total_promedio']:.2f} ms (P95 {d['total_p95']:.2f} ms) = "
+                          f"SQL {d['sql_promedio']:.2f} ms [{d['consultas_promedio']:.1f} consultas] + "
+                          f"templates {d['template_promedio']:.2f} ms + Python {d['python_promedio']:.2f} ms\n")
+            
+            if self.stats_trazas['cliente']:
+                texto += "\nLatencia del Cliente = redirecciones + transporte + servidor:\n"
+                for url, d in self.stats_trazas['cliente'].items():
+                    texto += (f"- {url}: {d['cliente_promedio']:.2f} ms = "
+                              f"redirecciones {d['redirect_promedio']:.2f} ms + "
+                              f"transporte {d['transporte_promedio']:.2f} ms + "
+                              f"servidor {d['servidor_promedio']:.2f} ms "
+                              f"(SQL {d['sql_promedio']:.2f}, templates {d['template_promedio']:.2f})\n")
+        
+        if self.stats_histogramas:
+            texto += """
+
+Espectro de Latencia (histogramas HDR combinados entre corridas):
+"""
+            for prueba, e in self.stats_histogramas.items():
+                texto += (f"- {prueba}: {e['requests']} requests / {e['corridas']} corridas, "
+                          f"P50 {e['p50']:.2f} ms, P90 {e['p90']:.2f} ms, P99 {e['p99']:.2f} ms, "
+                          f"P99.9 {e['p99.9']:.2f} ms, P99.99 {e['p99.99']:.2f} ms, max {e['max']:.2f} ms\n")
+                if 'corregido' in e:
+                    texto += (f"  corregido por omisión coordinada: P99 {e['corregido']['p99']:.2f} ms, "
+                              f"P99.9 {e['corregido']['p99.9']:.2f} ms, max {e['corregido']['max']:.2f} ms\n")
+        
         texto += """
 
 4. CONCLUSIONES
@@ -646,6 +931,9 @@ Score General del Sistema: {stats_patrones['score_general']}/100
         # Realizar análisis
         stats_rendimiento = self.analisis_rendimiento_estadistico()
         stats_patrones = self.analisis_patrones_estadistico()
+        stats_trazas = self.analisis_trazas()
+        stats_histogramas = self.analisis_histogramas()
+        stats_muestras = self.analisis_muestras()
         
         # Generar gráficos
         self.generar_graficos_completos()
@@ -667,6 +955,9 @@ Score General del Sistema: {stats_patrones['score_general']}/100
         return {
             'rendimiento': stats_rendimiento,
             'patrones': stats_patrones,
+            'trazas': stats_trazas,
+            'histogramas': stats_histogramas,
+            'muestras': stats_muestras,
             'completado': True
         }
 
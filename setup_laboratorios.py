@@ -119,6 +119,12 @@ class InstaladorLaboratorios:
             else:
                 print(f"✅ Directorio existente: {dir_name}")
     
+    def descargar_assets_estaticos(self):
+        """Descarga Bootstrap y Bootstrap Icons en static/vendor/ (sin CDN en ejecución)"""
+        print("\n=== ASSETS ESTÁTICOS ===")
+        from vendorizar_assets import vendorizar_assets
+        return vendorizar_assets()
+    
     def verificar_servidor_django(self):
         """Verifica que el servidor Django puede iniciarse"""
         print("\n=== VERIFICACIÓN DEL SERVIDOR DJANGO ===")
@@ -278,6 +284,7 @@ Proyecto generado el {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             ("Instalar dependencias", self.instalar_dependencias),
             ("Verificar estructura", self.verificar_estructura_proyecto),
             ("Crear directorios", self.crear_directorios),
+            ("Descargar assets estáticos", self.descargar_assets_estaticos),
             ("Verificar servidor Django", self.verificar_servidor_django),
             ("Crear requirements.txt", self.crear_archivo_requirements),
             ("Crear documentación", self.crear_documentacion)
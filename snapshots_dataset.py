@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Snapshots de Dataset
+Genera datasets con nombre (small, 100k, 1M) una sola vez y los guarda como
+archivos SQLite compactos (VACUUM INTO, con ANALYZE ya ejecutado). Restaurar un
+snapshot es clonar el archivo sobre patron_mvc/snapshots/activa.sqlite3 (no
+versionado), de modo que cada corrida de laboratorio parte exactamente del mismo
+estado. El servidor la usa con DJANGO_DB_NAME; patron_mvc/db.sqlite3 no se toca.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import subprocess
+import tempfile
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_DJANGO = os.path.join(RAIZ, 'patron_mvc')
+DB_ACTIVA = os.path.join(DIRECTORIO_DJANGO, 'db.sqlite3')
+DIRECTORIO_SNAPSHOTS = os.path.join(DIRECTORIO_DJANGO, 'snapshots')
+# Copia de trabajo del snapshot restaurado (la base del servidor vía DJANGO_DB_NAME)
+DB_SNAPSHOT_ACTIVO = os.path.join(DIRECTORIO_SNAPSHOTS, 'activa.sqlite3')
+DIRECTORIO_CACHE_L2 = os.path.join(DIRECTORIO_DJANGO, 'cache_l2')
+
+# Escala de generador_datos.py: 1 = 1.000 clientes, 2.000 vehículos y 10.000 órdenes
+SNAPSHOTS = {
+    'small': {'escala': 0.1, 'descripcion': "1.000 órdenes, para iterar rápido"},
+    '100k': {'escala': 10, 'descripcion': "100.000 órdenes"},
+    '1M': {'escala': 100, 'descripcion': "1.000.000 de órdenes"},
+    # Clientes de flota con muchos vehículos y vehículos con muchas órdenes
+    '100k_zipf': {'escala': 10, 'descripcion': "100.000 órdenes con claves calientes",
+                  'distribuciones': {'vehiculos': 'zipf:1.1', 'ordenes': 'zipf:0.9'}},
+}
+
+TABLAS_VERIFICADAS = ('accounts_customuser', 'clientes_cliente', 'vehiculos_vehiculo', 'ordenes_ordentrabajo')
+
+# ioctl FICLONE de Linux: copia por reflink (btrfs, XFS) sin duplicar bloques
+FICLONE = 0x40049409
+BLOQUE_LECTURA = 8 * 1024 * 1024
+
+
+def ruta_snapshot(nombre):
+    return os.path.join(DIRECTORIO_SNAPSHOTS, f"{nombre}.sqlite3")
+
+
+def ruta_metadatos(nombre):
+    return os.path.join(DIRECTORIO_SNAPSHOTS, f"{nombre}.json")
+
+
+def contar_filas(ruta):
+    with sqlite3.connect(f"file:{ruta}?mode=ro", uri=True) as conn:
+        return {tabla: conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+                for tabla in TABLAS_VERIFICADAS}
+
+
+def clonar_archivo(origen, destino):
+    """Copia por reflink si el sistema de archivos lo permite; si no, copia normal"""
+    try:
+        import fcntl
+        with open(origen, 'rb') as entrada, open(destino, 'wb') as salida:
+            fcntl.ioctl(salida.fileno(), FICLONE, entrada.fileno())
+        return 'reflink'
+    except (ImportError, OSError):
+        shutil.copyfile(origen, destino)
+        return 'copia'
+
+
+def calentar_cache_so(ruta):
+    """Lee el archivo completo para que el primer request no pague lecturas de disco"""
+    with open(ruta, 'rb') as archivo:
+        while archivo.read(BLOQUE_LECTURA):
+            pass
+
+
+def generar_base(destino, escala, semilla, procesos, distribuciones=None):
+    """Migra y puebla una base nueva en `destino` sin tocar la base activa"""
+    entorno = dict(os.environ, DJANGO_DB_NAME=destino)
+    subprocess.run([sys.executable, 'manage.py', 'migrate', '-v0'],
+                   cwd=DIRECTORIO_DJANGO, env=entorno, check=True)
+    comando = [sys.executable, 'poblar_db.py', '--escala', str(escala), '--semilla', str(semilla)]
+    if procesos:
+        comando += ['--procesos', str(procesos)]
+    for tabla, distribucion in (distribuciones or {}).items():
+        comando += [f'--dist-{tabla}', distribucion]
+    subprocess.run(comando, cwd=DIRECTORIO_DJANGO, env=entorno, check=True)
+
+
+def compactar(origen, destino):
+    """Estadísticas del planificador al día y copia compacta con VACUUM INTO"""
+    conn = sqlite3.connect(origen, isolation_level=None)
+    try:
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM INTO ?", (destino,))
+    finally:
+        conn.close()
+
+
+def crear_snapshot(nombre, semilla=42, procesos=None, desde_actual=False, forzar=False):
+    """Crea patron_mvc/snapshots/<nombre>.sqlite3; devuelve sus metadatos"""
+    if ruta_snapshot(nombre) == DB_SNAPSHOT_ACTIVO:
+        print(f"❌ '{nombre}' es el nombre de la copia de trabajo de los snapshots")
+        return None
+    if os.path.exists(ruta_snapshot(nombre)) and not forzar:
+        print(f"✅ Snapshot '{nombre}' ya existe (use --forzar para regenerarlo)")
+        return cargar_metadatos(nombre)
+    if not desde_actual and nombre not in SNAPSHOTS:
+        print(f"❌ Snapshot desconocido: {nombre} (disponibles: {', '.join(SNAPSHOTS)})")
+        return None
+
+    print(f"=== CREANDO SNAPSHOT '{nombre}' ===")
+    os.makedirs(DIRECTORIO_SNAPSHOTS, exist_ok=True)
+    inicio = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(dir=DIRECTORIO_SNAPSHOTS) as directorio:
+        temporal = os.path.join(directorio, 'db.sqlite3')
+        if desde_actual:
+            # Backup en línea: consistente aunque el servidor esté escribiendo
+            origen, copia = sqlite3.connect(DB_ACTIVA), sqlite3.connect(temporal)
+            with copia:
+                origen.backup(copia)
+            origen.close()
+            copia.close()
+            escala = None
+        else:
+            escala = SNAPSHOTS[nombre]['escala']
+            generar_base(temporal, escala, semilla, procesos, SNAPSHOTS[nombre].get('distribuciones'))
+
+        compactado = os.path.join(directorio, 'snapshot.sqlite3')
+        compactar(temporal, compactado)
+        os.replace(compactado, ruta_snapshot(nombre))
+
+    metadatos = {
+        'nombre': nombre,
+        'escala': escala,
+        'semilla': None if desde_actual else semilla,
+        'origen': 'db.sqlite3' if desde_actual else 'generador_datos',
+        'distribuciones': None if desde_actual else SNAPSHOTS[nombre].get('distribuciones'),
+        'filas': contar_filas(ruta_snapshot(nombre)),
+        'bytes': os.path.getsize(ruta_snapshot(nombre)),
+        'creado': datetime.now().isoformat(timespec='seconds'),
+        'duracion_creacion': round(time.perf_counter() - inicio, 1),
+        'sqlite_version': sqlite3.sqlite_version,
+    }
+    with open(ruta_metadatos(nombre), 'w') as archivo:
+        json.dump(metadatos, archivo, indent=2)
+
+    print(f"✅ Snapshot '{nombre}': {metadatos['bytes'] / 1e6:.1f} MB en "
+          f"{metadatos['duracion_creacion']}s {metadatos['filas']}")
+    return metadatos
+
+
+def cargar_metadatos(nombre):
+    if not os.path.exists(ruta_metadatos(nombre)):
+        return None
+    with open(ruta_metadatos(nombre)) as archivo:
+        return json.load(archivo)
+
+
+def restaurar_snapshot(nombre, destino=DB_SNAPSHOT_ACTIVO):
+    """Clona el snapshot en la copia de trabajo; el servidor que la usa debe estar detenido"""
+    origen = ruta_snapshot(nombre)
+    if not os.path.exists(origen):
+        print(f"❌ Snapshot '{nombre}' no existe (cree con: python snapshots_dataset.py crear {nombre})")
+        return False
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+    inicio = time.perf_counter()
+    temporal = f"{destino}.restaurando"
+    metodo = clonar_archivo(origen, temporal)
+
+    # Un -wal sobrante se aplicaría sobre el snapshot y lo corrompería
+    for sufijo in ('-wal', '-shm', '-journal'):
+        if os.path.exists(destino + sufijo):
+            os.remove(destino + sufijo)
+    os.replace(temporal, destino)
+
+    # Las entradas de la L2 en archivos describen la base anterior
+    shutil.rmtree(DIRECTORIO_CACHE_L2, ignore_errors=True)
+    calentar_cache_so(destino)
+
+    print(f"✅ Snapshot '{nombre}' restaurado por {metodo} en {time.perf_counter() - inicio:.2f}s")
+    print(f"   Inicie el servidor con DJANGO_DB_NAME={os.path.relpath(destino)}")
+    return True
+
+
+def verificar_snapshot(nombre, ruta=DB_SNAPSHOT_ACTIVO):
+    """True si la base tiene las mismas filas que el snapshot (no detecta ediciones)"""
+    metadatos = cargar_metadatos(nombre)
+    if metadatos is None or not os.path.exists(ruta):
+        return False
+    return contar_filas(ruta) == metadatos['filas']
+
+
+def listar_snapshots():
+    print("=== SNAPSHOTS DE DATASET ===")
+    nombres = list(SNAPSHOTS)
+    if os.path.isdir(DIRECTORIO_SNAPSHOTS):
+        # Snapshots capturados con --desde-actual bajo otros nombres
+        nombres += sorted(
+            archivo[:-len('.json')] for archivo in os.listdir(DIRECTORIO_SNAPSHOTS)
+            if archivo.endswith('.json') and archivo[:-len('.json')] not in SNAPSHOTS
+        )
+
+    for nombre in nombres:
+        metadatos = cargar_metadatos(nombre)
+        if metadatos:
+            print(f"✅ {nombre:<10} {metadatos['bytes'] / 1e6:>8.1f} MB  "
+                  f"{metadatos['filas']['ordenes_ordentrabajo']:>9} órdenes  ({metadatos['creado']})")
+        else:
+            print(f"   {nombre:<10} (sin crear) {SNAPSHOTS[nombre]['descripcion']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crea y restaura snapshots del dataset de laboratorio")
+    subparsers = parser.add_subparsers(dest='accion', required=True)
+
+    crear = subparsers.add_parser('crear', help="Genera uno o más snapshots")
+    crear.add_argument('nombres', nargs='+')
+    crear.add_argument('--semilla', type=int, default=42)
+    crear.add_argument('--procesos', type=int, help="Workers de generación (poblar_db.py --procesos)")
+    crear.add_argument('--desde-actual', action='store_true',
+                       help="Capturar patron_mvc/db.sqlite3 en lugar de generar el dataset")
+    crear.add_argument('--forzar', action='store_true', help="Regenerar aunque ya exista")
+
+    restaurar = subparsers.add_parser('restaurar', help="Restaura un snapshot en patron_mvc/snapshots/activa.sqlite3")
+    restaurar.add_argument('nombre')
+
+    subparsers.add_parser('listar', help="Lista los snapshots disponibles")
+    args = parser.parse_args()
+
+    if args.accion == 'crear':
+        exito = all(
+            crear_snapshot(nombre, args.semilla, args.procesos, args.desde_actual, args.forzar)
+            for nombre in args.nombres
+        )
+    elif args.accion == 'restaurar':
+        exito = restaurar_snapshot(args.nombre)
+    else:
+        listar_snapshots()
+        exito = True
+
+    sys.exit(0 if exito else 1)
@@ -0,0 +1,74 @@
+"""Pruebas de estado_estable.py: calentamiento automático, fijo y mayor que la prueba"""
+
+import unittest
+
+from carga_async import AcumuladorCarga
+from estado_estable import AUTO, aplicar_calentamiento, detectar_estado_estable, parsear_calentamiento
+
+
+def resultado_carga(latencias_ms, intervalo_ms=10):
+    """Resumen de AcumuladorCarga con un request cada `intervalo_ms`, en orden de envío"""
+    acumulador = AcumuladorCarga(len(latencias_ms))
+    for i, latencia in enumerate(latencias_ms):
+        acumulador.registrar({
+            'url': '/', 'success': True, 'status_code': 200, 'tiempo_ms': latencia,
+            'tiempo_redirect_ms': 0.0, 'redirecciones': 0, 'enviado_ns': i * intervalo_ms * 1_000_000,
+        })
+    return acumulador.resumen(len(latencias_ms), len(latencias_ms) * intervalo_ms / 1000)
+
+
+# 40 requests lentos de calentamiento y 160 estables
+CON_CALENTAMIENTO = [100.0] * 40 + [10.0] * 160
+
+
+class DetectarEstadoEstableTest(unittest.TestCase):
+
+    def test_detecta_fin_del_calentamiento(self):
+        self.assertEqual(detectar_estado_estable(CON_CALENTAMIENTO), 40)
+
+    def test_sin_estado_estable(self):
+        alternante = [10.0 if (i // 20) % 2 else 100.0 for i in range(200)]
+        self.assertIsNone(detectar_estado_estable(alternante))
+
+
+class AplicarCalentamientoTest(unittest.TestCase):
+
+    def test_auto_excluye_calentamiento(self):
+        resultado = aplicar_calentamiento(resultado_carga(CON_CALENTAMIENTO), AUTO)
+        self.assertTrue(resultado['estado_estable'])
+        self.assertEqual(resultado['calentamiento_requests'], 40)
+        self.assertEqual(resultado['requests_exitosos'], 160)
+        self.assertAlmostEqual(resultado['tiempo_promedio'], 10.0, delta=0.1)
+        self.assertAlmostEqual(resultado['tiempo_promedio_total'], 28.0, delta=0.3)
+
+    def test_fijo_excluye_los_primeros_requests(self):
+        resultado = aplicar_calentamiento(resultado_carga(CON_CALENTAMIENTO), 50)
+        self.assertTrue(resultado['estado_estable'])
+        self.assertEqual(resultado['calentamiento_requests'], 50)
+        self.assertEqual(resultado['requests_exitosos'], 150)
+
+    def test_fijo_mayor_que_la_prueba_conserva_todo(self):
+        original = resultado_carga(CON_CALENTAMIENTO)
+        promedio = original['tiempo_promedio']
+        resultado = aplicar_calentamiento(original, 500)
+        self.assertFalse(resultado['estado_estable'])
+        self.assertEqual(resultado['calentamiento_requests'], 0)
+        self.assertEqual(resultado['requests_exitosos'], 200)
+        self.assertEqual(resultado['tiempo_promedio'], promedio)
+
+    def test_cero_no_modifica_el_resultado(self):
+        resultado = aplicar_calentamiento(resultado_carga(CON_CALENTAMIENTO), 0)
+        self.assertNotIn('estado_estable', resultado)
+
+
+class ParsearCalentamientoTest(unittest.TestCase):
+
+    def test_valores(self):
+        self.assertEqual(parsear_calentamiento('auto'), AUTO)
+        self.assertEqual(parsear_calentamiento('25'), 25)
+        with self.assertRaises(ValueError):
+            parsear_calentamiento('-1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Vendorización de Assets Estáticos
+Descarga una sola vez las versiones fijadas de Bootstrap y Bootstrap Icons en
+static/vendor/ para que la aplicación no dependa del CDN en tiempo de ejecución.
+"""
+
+import os
+import sys
+import argparse
+
+import requests
+
+DIRECTORIO_VENDOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'vendor')
+
+CDN = "https://cdn.jsdelivr.net/npm"
+
+# Destino relativo a static/vendor/ -> URL de la versión fijada. Se incluyen los
+# .map porque ManifestStaticFilesStorage resuelve los comentarios sourceMappingURL.
+ASSETS = {
+    'bootstrap/css/bootstrap.min.css': f"{CDN}/bootstrap@5.3.0/dist/css/bootstrap.min.css",
+    'bootstrap/css/bootstrap.min.css.map': f"{CDN}/bootstrap@5.3.0/dist/css/bootstrap.min.css.map",
+    'bootstrap/js/bootstrap.bundle.min.js': f"{CDN}/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js",
+    'bootstrap/js/bootstrap.bundle.min.js.map': f"{CDN}/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js.map",
+    'bootstrap-icons/bootstrap-icons.css': f"{CDN}/bootstrap-icons@1.10.0/font/bootstrap-icons.css",
+    'bootstrap-icons/fonts/bootstrap-icons.woff2': f"{CDN}/bootstrap-icons@1.10.0/font/fonts/bootstrap-icons.woff2",
+    'bootstrap-icons/fonts/bootstrap-icons.woff': f"{CDN}/bootstrap-icons@1.10.0/font/fonts/bootstrap-icons.woff",
+}
+
+
+def vendorizar_assets(forzar=False):
+    """Descarga los assets que falten; devuelve True si todos quedan disponibles"""
+    print("=== VENDORIZACIÓN DE ASSETS ESTÁTICOS ===")
+    faltantes = []
+
+    for destino, url in ASSETS.items():
+        ruta = os.path.join(DIRECTORIO_VENDOR, destino)
+        if os.path.exists(ruta) and not forzar:
+            print(f"✅ {destino} (existente)")
+            continue
+
+        try:
+            response = requests.get(url, timeout=30)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"❌ {destino}: {e}")
+            faltantes.append(destino)
+            continue
+
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, 'wb') as archivo:
+            archivo.write(response.content)
+        print(f"✅ {destino} ({len(response.content)} bytes)")
+
+    if faltantes:
+        print(f"\n❌ Assets sin descargar: {', '.join(faltantes)}")
+        return False
+
+    print("✅ Assets disponibles en static/vendor/")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Descarga los assets de Bootstrap en static/vendor/")
+    parser.add_argument('--forzar', action='store_true', help="Volver a descargar aunque ya existan")
+    args = parser.parse_args()
+
+    sys.exit(0 if vendorizar_assets(args.forzar) else 1)